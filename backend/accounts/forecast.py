@@ -0,0 +1,279 @@
+"""
+Prévision de trésorerie : solde quotidien projeté de chaque compte sur N jours.
+
+La prévision part du solde actuel des comptes (hors transactions futures) et
+lui ajoute, jour par jour :
+
+- les transactions futures enregistrées, y compris les occurrences générées
+  des transactions récurrentes : au-delà de ces transactions, le solde prévu
+  rejoint le solde projeté du compte (Account.get_projected_balance) ;
+- les occurrences des règles de récurrence non encore générées (au-delà de
+  l'horizon de génération, voir transactions.recurrence) ;
+- le salaire du profil (monthly_income le jour salary_day) si aucune règle de
+  revenu récurrent n'existe ;
+- le reste à dépenser des budgets de dépenses actifs, réparti uniformément
+  sur les jours restants de chaque période (déduction faite des dépenses déjà
+  prévues dans la catégorie).
+
+Les montants sont accumulés en centimes dans une grille (comptes x jours)
+NumPy, puis les soldes sont obtenus par une somme cumulée : le calcul reste de
+l'ordre de la milliseconde pour une année et tous les comptes. Le salaire et
+les budgets, qui ne sont pas liés à un compte, sont portés par le compte
+courant principal. Le total des soldes est donné par devise.
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Q, Sum
+
+from . import ledger
+
+DEFAULT_FORECAST_DAYS = 90
+MAX_FORECAST_DAYS = 730
+
+
+def to_cents(value):
+    return int((Decimal(value or 0) * 100).to_integral_value())
+
+
+def from_cents(values):
+    """Montants en centimes (tableau NumPy) vers une liste de nombres décimaux."""
+    return (np.asarray(values) / 100).round(2).tolist()
+
+
+def get_main_account(accounts):
+    """Compte courant principal (le plus ancien), sinon le premier compte."""
+    checking = [account for account in accounts if account.account_type == 'checking']
+    return min(checking or accounts, key=lambda account: account.pk)
+
+
+def period_windows(budget, first, last):
+    """Périodes (début, fin) du budget qui recouvrent l'intervalle [first, last]."""
+    day = first
+    while day <= last:
+        start, end = budget.get_period_window(budget.period, day)
+        if budget.start_date and start < budget.start_date:
+            start = budget.start_date
+        if budget.end_date and end > budget.end_date:
+            end = budget.end_date
+        if start <= end:
+            yield start, end
+        day = budget.get_period_window(budget.period, day)[1] + timedelta(days=1)
+
+
+class Forecast:
+    """
+    Grille des variations quotidiennes (en centimes) des comptes d'un
+    utilisateur entre aujourd'hui (colonne 0) et aujourd'hui + ``days``.
+    """
+
+    def __init__(self, user, days=DEFAULT_FORECAST_DAYS, today=None, include_budgets=True):
+        from .models import Account
+
+        self.user = user
+        self.days = days
+        self.today = today or date.today()
+        self.end = self.today + timedelta(days=days)
+        self.include_budgets = include_budgets
+
+        self.accounts = list(
+            Account.objects.filter(user=user, is_active=True).with_balances(self.today).order_by('pk')
+        )
+        self.index = {account.pk: position for position, account in enumerate(self.accounts)}
+        self.deltas = np.zeros((len(self.accounts), days + 1), dtype=np.int64)
+        # Dépenses prévues par catégorie (pour déduire les budgets), indexées par jour
+        self.expenses = {}
+        self.components = {'scheduled': 0, 'recurring': 0, 'salary': 0, 'budgets': 0}
+
+    def offsets(self, days):
+        return np.fromiter(((day - self.today).days for day in days), dtype=np.int64, count=len(days))
+
+    def add(self, account_ids, days, cents, component):
+        """Ajoute des montants (centimes) aux comptes et jours donnés."""
+        rows = [self.index.get(account_id, -1) for account_id in account_ids]
+        rows, offsets, cents = np.array(rows, dtype=np.int64), self.offsets(days), np.array(cents, dtype=np.int64)
+        kept = rows >= 0
+        np.add.at(self.deltas, (rows[kept], offsets[kept]), cents[kept])
+        self.components[component] += int(cents[kept].sum())
+
+    def add_expenses(self, category_id, days, cents):
+        if category_id not in self.expenses:
+            self.expenses[category_id] = np.zeros(self.days + 1, dtype=np.int64)
+        np.add.at(self.expenses[category_id], self.offsets(days), np.array(cents, dtype=np.int64))
+
+    def add_scheduled(self):
+        """
+        Transactions futures enregistrées, totalisées par jour, compte et
+        catégorie dans la base (une requête, au plus une ligne par jour et par
+        combinaison plutôt qu'une ligne par transaction)
+        """
+        from transactions.models import Transaction
+
+        account_ids = list(self.index)
+        rows = Transaction.objects.filter(
+            Q(account_id__in=account_ids) | Q(destination_account_id__in=account_ids, type='transfer'),
+            date__gt=self.today, date__lte=self.end,
+        ).values('account_id', 'destination_account_id', 'type', 'category_id', 'date').annotate(
+            signed=Sum('signed_amount'), total=Sum('amount')
+        ).order_by().values_list('account_id', 'destination_account_id', 'type', 'category_id', 'date',
+                                 'signed', 'total')
+
+        targets, days, cents = [], [], []
+        expenses = {}
+        for account_id, destination_id, kind, category_id, day, signed, total in rows:
+            targets.append(account_id)
+            days.append(day)
+            cents.append(to_cents(signed))
+            if kind == 'transfer' and destination_id:
+                targets.append(destination_id)
+                days.append(day)
+                cents.append(to_cents(total))
+            elif kind == 'expense':
+                expenses.setdefault(category_id, ([], []))
+                expenses[category_id][0].append(day)
+                expenses[category_id][1].append(to_cents(total))
+
+        if targets:
+            self.add(targets, days, cents, 'scheduled')
+        for category_id, (category_days, category_cents) in expenses.items():
+            self.add_expenses(category_id, category_days, category_cents)
+
+    def add_recurring(self):
+        """
+        Occurrences des règles de récurrence au-delà de ce qui est déjà généré
+        (une requête). Retourne True si une règle de revenu récurrent existe.
+        """
+        from transactions import recurrence
+        from transactions.models import Transaction
+
+        rules = Transaction.objects.filter(
+            user=self.user, is_recurring=True, recurrence_parent__isnull=True,
+            recurrence_frequency__in=recurrence.FREQUENCY_UNITS,
+        )
+        has_income_rule = False
+        for rule in rules:
+            has_income_rule = has_income_rule or rule.type == 'income'
+            after = max(recurrence.get_start(rule, self.today), self.today)
+            days = list(recurrence.iter_dates(rule, after, self.end))
+            if not days:
+                continue
+            effects = ledger.balance_effects(
+                rule.type, rule.amount, rule.account_id, rule.destination_account_id, rule.adjustment_direction
+            )
+            for account_id, delta in effects.items():
+                self.add([account_id] * len(days), days, [to_cents(delta)] * len(days), 'recurring')
+            if rule.type == 'expense':
+                self.add_expenses(rule.category_id, days, [to_cents(rule.amount)] * len(days))
+        return has_income_rule
+
+    def add_salary(self, profile):
+        """Salaire mensuel du profil, versé le jour salary_day de chaque mois."""
+        days = []
+        month = self.today.replace(day=1)
+        while month <= self.end:
+            last_day = calendar.monthrange(month.year, month.month)[1]
+            day = month.replace(day=min(profile.salary_day, last_day))
+            if self.today < day <= self.end:
+                days.append(day)
+            month = (month + timedelta(days=last_day)).replace(day=1)
+        if days:
+            amount = to_cents(profile.monthly_income)
+            self.add([self.main_account.pk] * len(days), days, [amount] * len(days), 'salary')
+
+    def add_budgets(self):
+        """
+        Reste à dépenser des budgets de dépenses actifs, réparti sur les jours
+        restants de chaque période
+        """
+        from budgets.models import Budget
+        from budgets.progress import attach_progress
+
+        budgets = Budget.objects.filter(
+            user=self.user, is_active=True, is_savings_goal=False
+        ).filter(Q(end_date__isnull=True) | Q(end_date__gt=self.today))
+        first = self.today + timedelta(days=1)
+
+        for budget in attach_progress(budgets, self.today):
+            expenses = self.expenses.get(budget.category_id)
+            planned = np.cumsum(expenses) if expenses is not None else None
+            for start, end in period_windows(budget, first, self.end):
+                if start <= self.today:
+                    # Période en cours : dépensé et prévu jusqu'à la fin de la période
+                    remaining = to_cents(budget.amount - budget.get_projected_amount())
+                    start = first
+                else:
+                    remaining = to_cents(budget.amount)
+                    if planned is not None:
+                        upper = (min(end, self.end) - self.today).days
+                        lower = (start - self.today).days - 1
+                        remaining -= int(planned[upper] - planned[lower])
+                if remaining <= 0:
+                    continue
+
+                # Répartition uniforme en centimes sur les jours de la période
+                length = (end - start).days + 1
+                shares = np.full(length, remaining // length, dtype=np.int64)
+                shares[:remaining % length] += 1
+                lower = (start - self.today).days
+                upper = min((end - self.today).days, self.days)
+                self.deltas[self.index[self.main_account.pk], lower:upper + 1] -= shares[:upper - lower + 1]
+                self.components['budgets'] -= int(shares[:upper - lower + 1].sum())
+
+    def compute(self):
+        from authentication.models import UserProfile
+
+        dates = [(self.today + timedelta(days=offset)).isoformat() for offset in range(self.days + 1)]
+        result = {
+            'start_date': self.today.isoformat(),
+            'end_date': self.end.isoformat(),
+            'days': self.days,
+            'dates': dates,
+            'accounts': [],
+            'total': {},
+            'components': {component: 0.0 for component in self.components},
+        }
+        if not self.accounts:
+            return result
+
+        self.main_account = get_main_account(self.accounts)
+        self.add_scheduled()
+        has_income_rule = self.add_recurring()
+        profile = UserProfile.objects.filter(user=self.user).first()
+        if profile and profile.salary_day and profile.monthly_income > 0 and not has_income_rule:
+            self.add_salary(profile)
+        if self.include_budgets:
+            self.add_budgets()
+
+        current = np.array([to_cents(account.get_current_balance()) for account in self.accounts], dtype=np.int64)
+        self.deltas[:, 0] += current
+        balances = np.cumsum(self.deltas, axis=1)
+
+        for account, row in zip(self.accounts, balances):
+            lowest = int(row.argmin())
+            result['accounts'].append({
+                'id': account.pk,
+                'name': account.name,
+                'currency': account.currency,
+                'current_balance': float(account.get_current_balance()),
+                'projected_balance': float(account.get_projected_balance()),
+                'end_balance': float(row[-1] / 100),
+                'min_balance': float(row[lowest] / 100),
+                'min_date': dates[lowest],
+                'balances': from_cents(row),
+            })
+
+        # Total par devise (comme AccountViewSet.summary)
+        currencies = np.array([account.currency for account in self.accounts])
+        result['total'] = {
+            currency: from_cents(balances[currencies == currency].sum(axis=0))
+            for currency in dict.fromkeys(currencies.tolist())
+        }
+        result['components'] = {component: cents / 100 for component, cents in self.components.items()}
+        return result
+
+
+def forecast(user, days=DEFAULT_FORECAST_DAYS, today=None, include_budgets=True):
+    """Prévision quotidienne des soldes des comptes actifs de l'utilisateur."""
+    return Forecast(user, days, today, include_budgets).compute()
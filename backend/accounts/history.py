@@ -0,0 +1,131 @@
+"""
+Historique des soldes des comptes (séries quotidiennes ou mensuelles).
+
+Les soldes sont calculés par une seule requête SQL : les montants signés des
+transactions émises et les transferts reçus sont totalisés par compte et par
+jour, puis cumulés avec une fonction de fenêtre
+(``SUM() OVER (PARTITION BY compte ORDER BY date)``). La requête retourne le
+solde à chaque jour de mouvement de l'intervalle, plus le dernier solde
+précédant l'intervalle ; les jours sans mouvement reprennent le solde
+précédent. Le solde d'un compte à une date est la somme de ses transactions
+jusqu'à cette date incluse, comme le registre (accounts.ledger). Le total
+des soldes est donné par devise, comme pour la prévision (accounts.forecast).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+GRANULARITIES = ('day', 'month')
+
+# Nombre maximal de points d'une série
+MAX_POINTS = 3660
+
+ZERO = Decimal('0.00')
+
+BALANCE_HISTORY_SQL = """
+WITH flows AS (
+    SELECT account_id AS account, date AS day, signed_amount AS amount
+    FROM {table}
+    WHERE account_id IN ({accounts}) AND date <= %s
+    UNION ALL
+    SELECT destination_account_id, date, amount
+    FROM {table}
+    WHERE type = 'transfer' AND destination_account_id IN ({accounts}) AND date <= %s
+),
+daily AS (
+    SELECT account, day, SUM(amount) AS delta
+    FROM flows
+    GROUP BY account, day
+),
+running AS (
+    SELECT account, day,
+           SUM(delta) OVER (PARTITION BY account ORDER BY day ROWS UNBOUNDED PRECEDING) AS balance,
+           ROW_NUMBER() OVER (PARTITION BY account, day < %s ORDER BY day DESC) AS recent
+    FROM daily
+)
+SELECT account, day, balance
+FROM running
+WHERE day >= %s OR recent = 1
+ORDER BY account, day
+"""
+
+
+def get_points(start, end, granularity):
+    """Dates des points de la série : chaque jour, ou chaque fin de mois (et la date de fin)."""
+    if granularity == 'day':
+        return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+    points = []
+    month = start.replace(day=1)
+    while month <= end:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        points.append(min(next_month - timedelta(days=1), end))
+        month = next_month
+    return points
+
+
+def to_date(value):
+    # SQLite retourne les dates du SQL brut sous forme de texte
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def fetch_balances(account_ids, start, end):
+    """
+    Soldes cumulés par compte aux jours de mouvement de [start, end], plus le
+    dernier solde avant start : {account_id: [(date, solde), ...]} trié par date
+    """
+    from transactions.models import Transaction
+
+    balances = {account_id: [] for account_id in account_ids}
+    if not account_ids:
+        return balances
+
+    placeholders = ', '.join(['%s'] * len(account_ids))
+    sql = BALANCE_HISTORY_SQL.format(
+        table=connection.ops.quote_name(Transaction._meta.db_table),
+        accounts=placeholders,
+    )
+    params = [*account_ids, end, *account_ids, end, start, start]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for account_id, day, balance in cursor.fetchall():
+            balances[account_id].append((to_date(day), Decimal(str(balance or 0)).quantize(ZERO)))
+    return balances
+
+
+def balance_history(accounts, start, end, granularity='day'):
+    """
+    Séries de soldes des comptes donnés entre deux dates (incluses)
+    """
+    accounts = list(accounts)
+    points = get_points(start, end, granularity)
+    balances = fetch_balances([account.pk for account in accounts], start, end)
+
+    result = {
+        'granularity': granularity,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'dates': [point.isoformat() for point in points],
+        'accounts': [],
+        'total': {},
+    }
+    for account in accounts:
+        # Report du dernier solde connu sur chaque point (parcours unique des deux listes triées)
+        changes, series = balances[account.pk], []
+        position, current = 0, ZERO
+        for point in points:
+            while position < len(changes) and changes[position][0] <= point:
+                current = changes[position][1]
+                position += 1
+            series.append(float(current))
+
+        result['accounts'].append({
+            'id': account.pk,
+            'name': account.name,
+            'currency': account.currency,
+            'balances': series,
+        })
+        total = result['total'].setdefault(account.currency, [0.0] * len(points))
+        total[:] = [round(value + balance, 2) for value, balance in zip(total, series)]
+    return result
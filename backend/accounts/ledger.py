@@ -0,0 +1,176 @@
+"""
+Registre des soldes par compte.
+
+Chaque compte conserve dans ``Account.ledger_balance`` la somme signée de
+toutes ses transactions (futures comprises) et des transferts qu'il reçoit.
+Le registre est tenu à jour par ``Transaction.save()``/``delete()`` et par
+les opérations en masse du ``TransactionQuerySet`` : le solde projeté devient
+une simple lecture et le solde actuel ne parcourt plus que les transactions
+futures.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce
+
+ZERO = Decimal('0.00')
+
+
+def balance_effects(type, amount, account_id, destination_account_id=None, adjustment_direction=None):
+    """
+    Calcule l'effet d'une transaction sur les soldes des comptes.
+
+    Retourne un dictionnaire {account_id: montant signé}.
+    """
+    effects = defaultdict(Decimal)
+    amount = Decimal(amount or 0)
+
+    if type == 'income':
+        effects[account_id] += amount
+    elif type == 'expense':
+        effects[account_id] -= amount
+    elif type == 'transfer' and destination_account_id:
+        effects[account_id] -= amount
+        effects[destination_account_id] += amount
+    elif type == 'adjustment' and adjustment_direction == 'credit':
+        effects[account_id] += amount
+    elif type == 'adjustment' and adjustment_direction == 'debit':
+        effects[account_id] -= amount
+
+    return {account_id: delta for account_id, delta in effects.items() if account_id and delta}
+
+
+def merge_effects(*effect_maps, sign=1):
+    """
+    Additionne plusieurs dictionnaires d'effets (``sign=-1`` pour les retirer).
+    """
+    merged = defaultdict(Decimal)
+    for effects in effect_maps:
+        for account_id, delta in effects.items():
+            merged[account_id] += sign * delta
+    return merged
+
+
+def apply_deltas(deltas, accounts=()):
+    """
+    Applique des variations de solde au registre avec une mise à jour atomique
+    (``F()``) par compte. Les instances ``accounts`` déjà chargées en mémoire
+    sont ajustées pour rester cohérentes avec la base (leur solde actuel
+    annoté, devenu obsolète, est retiré).
+    """
+    from .models import Account
+
+    for account_id, delta in deltas.items():
+        if delta:
+            Account.objects.filter(pk=account_id).update(
+                ledger_balance=F('ledger_balance') + delta
+            )
+
+    for account in accounts:
+        if account is not None and deltas.get(account.pk):
+            account.ledger_balance = Decimal(account.ledger_balance) + deltas[account.pk]
+            account.__dict__.pop('annotated_current_balance', None)
+
+
+def apply_transactions(transactions, sign=1):
+    """
+    Reporte dans le registre l'effet d'une liste de transactions en mémoire
+    (``sign=-1`` pour l'annuler). Utilisé après ``bulk_create``.
+    """
+    deltas = merge_effects(*(t.get_balance_effects() for t in transactions), sign=sign)
+    apply_deltas(deltas)
+
+
+def future_delta(account, today=None):
+    """
+    Somme signée des transactions futures d'un compte (transferts reçus inclus).
+    Une seule requête, limitée aux lignes postérieures à aujourd'hui.
+    """
+    from transactions.models import Transaction
+
+    today = today or date.today()
+    total = Transaction.objects.filter(
+        Q(account=account) | Q(destination_account=account, type='transfer'),
+        date__gt=today,
+    ).aggregate(
+        total=Sum(Case(
+            When(account=account, then=F('signed_amount')),
+            default=F('amount'),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        ))
+    )['total']
+    return total or ZERO
+
+
+def current_balance_expression(today=None):
+    """
+    Expression SQL du solde actuel d'un compte, à annoter sur un queryset
+    d'Account : registre moins les transactions futures, émises et reçues,
+    calculées par sous-requêtes agrégées dans la même requête.
+    """
+    from transactions.models import Transaction
+
+    today = today or date.today()
+    output_field = DecimalField(max_digits=15, decimal_places=2)
+
+    future_outgoing = Transaction.objects.filter(
+        account=OuterRef('pk'), date__gt=today
+    ).order_by().values('account').annotate(total=Sum('signed_amount')).values('total')
+
+    future_incoming = Transaction.objects.filter(
+        destination_account=OuterRef('pk'), type='transfer', date__gt=today
+    ).order_by().values('destination_account').annotate(total=Sum('amount')).values('total')
+
+    return ExpressionWrapper(
+        F('ledger_balance')
+        - Coalesce(Subquery(future_outgoing, output_field=output_field), Value(ZERO))
+        - Coalesce(Subquery(future_incoming, output_field=output_field), Value(ZERO)),
+        output_field=output_field,
+    )
+
+
+def compute_balances(account_ids):
+    """
+    Recalcule à partir des transactions le solde complet de chaque compte.
+    Retourne un dictionnaire {account_id: solde}.
+    """
+    from transactions.models import Transaction
+
+    account_ids = set(account_ids)
+    balances = {account_id: ZERO for account_id in account_ids}
+
+    outgoing = Transaction.objects.filter(account_id__in=account_ids).values('account_id').annotate(
+        total=Coalesce(Sum('signed_amount'), Value(ZERO))
+    ).order_by()
+    for row in outgoing:
+        balances[row['account_id']] += row['total']
+
+    incoming = Transaction.objects.filter(
+        destination_account_id__in=account_ids, type='transfer'
+    ).values('destination_account_id').annotate(total=Sum('amount')).order_by()
+    for row in incoming:
+        balances[row['destination_account_id']] += row['total']
+
+    return balances
+
+
+def rebuild(account_ids=None):
+    """
+    Reconstruit le registre des comptes donnés (tous les comptes si None).
+    """
+    from .models import Account
+
+    if account_ids is None:
+        account_ids = Account.objects.values_list('pk', flat=True)
+    account_ids = {account_id for account_id in account_ids if account_id}
+    if not account_ids:
+        return {}
+
+    balances = compute_balances(account_ids)
+    for account_id, balance in balances.items():
+        Account.objects.filter(pk=account_id).update(ledger_balance=balance)
+    return balances
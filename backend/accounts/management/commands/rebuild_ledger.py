@@ -0,0 +1,38 @@
+"""
+Commande Django pour reconstruire le registre des soldes des comptes.
+
+Usage:
+    python manage.py rebuild_ledger                 # Tous les comptes
+    python manage.py rebuild_ledger --user <username>
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from accounts.models import Account
+from accounts.ledger import rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recalcule le solde du registre (ledger_balance) de chaque compte à partir de ses transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Limiter la reconstruction aux comptes de cet utilisateur'
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'L\'utilisateur {options["user"]} n\'existe pas')
+            accounts = accounts.filter(user=user)
+
+        balances = rebuild(accounts.values_list('pk', flat=True))
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Registre reconstruit pour {len(balances)} compte(s)')
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_ledger_balance(apps, schema_editor):
+    """
+    Initialise le registre des soldes à partir des transactions existantes
+    """
+    Account = apps.get_model('accounts', 'Account')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    balances = {account_id: Decimal('0.00') for account_id in Account.objects.values_list('pk', flat=True)}
+    rows = Transaction.objects.values_list('type', 'amount', 'account_id', 'destination_account_id', 'notes')
+    for type, amount, account_id, destination_account_id, notes in rows.iterator(chunk_size=2000):
+        if type == 'income':
+            balances[account_id] += amount
+        elif type == 'expense':
+            balances[account_id] -= amount
+        elif type == 'transfer' and destination_account_id:
+            balances[account_id] -= amount
+            balances[destination_account_id] += amount
+        elif type == 'adjustment' and notes and 'ADJUSTMENT:' in notes:
+            sign = notes.split('ADJUSTMENT:')[1].strip()
+            balances[account_id] += amount if sign.startswith('+') else -amount
+
+    for account_id, balance in balances.items():
+        Account.objects.filter(pk=account_id).update(ledger_balance=balance)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_account_balance'),
+        ('transactions', '0004_transaction_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='ledger_balance',
+            field=models.DecimalField(decimal_places=2, default=0.0, editable=False, help_text='Somme signée de toutes les transactions du compte, futures comprises (maintenue automatiquement)', max_digits=15, verbose_name='Solde du registre'),
+        ),
+        migrations.RunPython(backfill_ledger_balance, migrations.RunPython.noop),
+    ]
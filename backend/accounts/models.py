@@ -2,6 +2,22 @@ from django.db import models
 from django.conf import settings
 
 
+class AccountQuerySet(models.QuerySet):
+    """
+    QuerySet des comptes avec calcul groupé des soldes
+    """
+
+    def with_balances(self, today=None):
+        """
+        Annote le solde actuel de chaque compte (annotated_current_balance) en
+        une seule requête, quel que soit le nombre de comptes. Le solde projeté
+        est lu directement depuis le registre (ledger_balance).
+        """
+        from .ledger import current_balance_expression
+
+        return self.annotate(annotated_current_balance=current_balance_expression(today))
+
+
 class Account(models.Model):
     """
     Représente un compte bancaire (compte courant, épargne, carte de crédit, etc.)
@@ -46,6 +62,14 @@ class Account(models.Model):
         verbose_name='Solde',
         help_text='Champ legacy - utiliser get_current_balance() ou get_projected_balance() pour obtenir le solde'
     )
+    ledger_balance = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0.00,
+        editable=False,
+        verbose_name='Solde du registre',
+        help_text='Somme signée de toutes les transactions du compte, futures comprises (maintenue automatiquement)'
+    )
     currency = models.CharField(
         max_length=3,
         choices=CURRENCY_CHOICES,
@@ -70,6 +94,8 @@ class Account(models.Model):
         verbose_name='Date de modification'
     )
 
+    objects = AccountQuerySet.as_manager()
+
     class Meta:
         db_table = 'account'
         verbose_name = 'Compte'
@@ -83,6 +109,38 @@ class Account(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_account_type_display()}) - {self.balance} {self.currency}"
 
+    def save(self, *args, **kwargs):
+        """
+        Sauvegarde le compte sans écraser le registre des soldes, qui est
+        modifié uniquement par des mises à jour atomiques (voir accounts.ledger)
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'ledger_balance'
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Supprime le compte puis recalcule le registre des comptes liés par des
+        transferts (leurs transferts perdent leur contrepartie)
+        """
+        from django.db import transaction as db_transaction
+        from django.db.models import Q
+        from transactions.models import Transaction
+        from .ledger import rebuild
+
+        with db_transaction.atomic():
+            linked = Transaction.objects.filter(
+                Q(account=self) | Q(destination_account=self), type='transfer'
+            ).values_list('account_id', 'destination_account_id')
+            linked_ids = {account_id for pair in linked for account_id in pair} - {self.pk}
+
+            result = super().delete(*args, **kwargs)
+            rebuild(linked_ids)
+        return result
+
     def update_balance(self, amount):
         """
         Met à jour le solde du compte
@@ -93,81 +151,32 @@ class Account(models.Model):
     def get_current_balance(self):
         """
         Retourne le solde actuel en excluant les transactions futures
+        (solde du registre moins les transactions postérieures à aujourd'hui)
+        Utilise le solde annoté par AccountQuerySet.with_balances() si présent
         """
-        from datetime import date
-        from transactions.models import Transaction
-        from decimal import Decimal
+        from .ledger import future_delta
+
+        if getattr(self, 'annotated_current_balance', None) is not None:
+            return self.annotated_current_balance
 
-        today = date.today()
-
-        # Calculer le solde à partir des transactions passées
-        transactions = Transaction.objects.filter(
-            account=self,
-            date__lte=today
-        )
-
-        balance = Decimal('0.00')
-        for transaction in transactions:
-            if transaction.type == 'income':
-                balance += transaction.amount
-            elif transaction.type == 'expense':
-                balance -= transaction.amount
-            elif transaction.type == 'transfer' and transaction.destination_account:
-                balance -= transaction.amount
-            elif transaction.type == 'adjustment':
-                # Lire le signe depuis les notes
-                if transaction.notes and 'ADJUSTMENT:' in transaction.notes:
-                    sign = transaction.notes.split('ADJUSTMENT:')[1].strip()
-                    if sign.startswith('+'):
-                        balance += transaction.amount
-                    else:
-                        balance -= transaction.amount
-
-        # Ajouter les transferts reçus
-        incoming_transfers = Transaction.objects.filter(
-            destination_account=self,
-            type='transfer',
-            date__lte=today
-        )
-        for transfer in incoming_transfers:
-            balance += transfer.amount
-
-        return balance
+        return self.get_projected_balance() - future_delta(self)
 
     def get_projected_balance(self):
         """
         Retourne le solde projeté (incluant les transactions futures)
-        Calcule le solde en incluant TOUTES les transactions (même les futures)
+        Lu directement depuis le registre tenu à jour par les transactions,
+        y compris les occurrences générées des transactions récurrentes
+        (transactions.recurrence)
         """
-        from transactions.models import Transaction
         from decimal import Decimal
 
-        # Calculer le solde à partir de TOUTES les transactions
-        transactions = Transaction.objects.filter(account=self)
-
-        balance = Decimal('0.00')
-        for transaction in transactions:
-            if transaction.type == 'income':
-                balance += transaction.amount
-            elif transaction.type == 'expense':
-                balance -= transaction.amount
-            elif transaction.type == 'transfer' and transaction.destination_account:
-                balance -= transaction.amount
-            elif transaction.type == 'adjustment':
-                # Lire le signe depuis les notes
-                if transaction.notes and 'ADJUSTMENT:' in transaction.notes:
-                    sign = transaction.notes.split('ADJUSTMENT:')[1].strip()
-                    if sign.startswith('+'):
-                        balance += transaction.amount
-                    else:
-                        balance -= transaction.amount
-
-        # Ajouter les transferts reçus
-        incoming_transfers = Transaction.objects.filter(
-            destination_account=self,
-            type='transfer'
-        )
-        for transfer in incoming_transfers:
-            balance += transfer.amount
-
-        return balance
+        return Decimal(self.ledger_balance)
+
+    def rebuild_ledger(self):
+        """
+        Recalcule le registre du compte à partir de ses transactions
+        """
+        from .ledger import rebuild
+
+        self.ledger_balance = rebuild([self.pk])[self.pk]
+        return self.ledger_balance
@@ -65,8 +65,6 @@ class AccountSerializer(serializers.ModelSerializer):
 
         # Si un solde initial non nul est fourni, créer une transaction d'ajustement
         if initial_balance != 0:
-            adjustment_sign = '+' if initial_balance > 0 else '-'
-
             Transaction.objects.create(
                 user=instance.user,
                 account=instance,
@@ -75,7 +73,7 @@ class AccountSerializer(serializers.ModelSerializer):
                 description=f"Solde initial du compte",
                 date=date.today(),
                 category=None,
-                notes=f"ADJUSTMENT:{adjustment_sign}"
+                adjustment_direction='credit' if initial_balance > 0 else 'debit'
             )
 
         return instance
@@ -96,10 +94,7 @@ class AccountSerializer(serializers.ModelSerializer):
             difference = Decimal(str(new_balance)) - current_balance
 
             if difference != 0:
-                # Créer une transaction d'ajustement
-                # Stocker le signe dans les notes pour savoir comment appliquer l'ajustement
-                adjustment_sign = '+' if difference > 0 else '-'
-
+                # Créer une transaction d'ajustement dans le sens de la différence
                 Transaction.objects.create(
                     user=instance.user,
                     account=instance,
@@ -108,7 +103,7 @@ class AccountSerializer(serializers.ModelSerializer):
                     description=f"Ajustement de solde: {current_balance:.2f} → {new_balance:.2f}",
                     date=date.today(),
                     category=None,
-                    notes=f"ADJUSTMENT:{adjustment_sign}"  # Stocker le signe
+                    adjustment_direction='credit' if difference > 0 else 'debit'
                 )
 
             # Retirer balance des validated_data car on ne met pas à jour le champ directement
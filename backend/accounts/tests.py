@@ -1,3 +1,257 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts import forecast as forecasting, history, ledger
+from accounts.models import Account
+from authentication.models import UserProfile
+from transactions import recurrence
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class LedgerTestCase(TestCase):
+    """
+    Le registre des soldes (Account.ledger_balance) maintenu de façon
+    incrémentale doit toujours correspondre à un recalcul complet
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.checking = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.savings = Account.objects.create(user=self.user, name='Épargne', account_type='savings')
+        self.today = date.today()
+
+    def create(self, **kwargs):
+        values = {
+            'user': self.user, 'account': self.checking, 'type': 'expense',
+            'amount': Decimal('10.00'), 'date': self.today,
+        }
+        values.update(kwargs)
+        return Transaction.objects.create(**values)
+
+    def assertLedgerConsistent(self):
+        accounts = [self.checking, self.savings]
+        stored = dict(Account.objects.filter(pk__in=[a.pk for a in accounts]).values_list('pk', 'ledger_balance'))
+        self.assertEqual(stored, ledger.compute_balances(stored))
+
+    def get_ledger_balance(self, account):
+        return Account.objects.get(pk=account.pk).ledger_balance
+
+    def test_create(self):
+        self.create(type='income', amount=Decimal('100.00'))
+        self.create(amount=Decimal('30.50'))
+        self.create(type='transfer', amount=Decimal('20.00'), destination_account=self.savings)
+        self.create(type='adjustment', adjustment_direction='credit', amount=Decimal('5.00'), account=self.savings)
+
+        self.assertEqual(self.get_ledger_balance(self.checking), Decimal('49.50'))
+        self.assertEqual(self.get_ledger_balance(self.savings), Decimal('25.00'))
+        self.assertLedgerConsistent()
+
+    def test_update(self):
+        transaction = self.create(amount=Decimal('10.00'))
+        transaction.amount = Decimal('25.00')
+        transaction.save()
+        transaction.type = 'transfer'
+        transaction.destination_account = self.savings
+        transaction.save()
+        transaction.account = self.savings
+        transaction.destination_account = self.checking
+        transaction.save()
+
+        self.assertEqual(self.get_ledger_balance(self.checking), Decimal('25.00'))
+        self.assertEqual(self.get_ledger_balance(self.savings), Decimal('-25.00'))
+        self.assertLedgerConsistent()
+
+    def test_delete(self):
+        kept = self.create(type='income', amount=Decimal('40.00'))
+        self.create(type='transfer', amount=Decimal('15.00'), destination_account=self.savings).delete()
+
+        self.assertEqual(self.get_ledger_balance(self.checking), kept.amount)
+        self.assertEqual(self.get_ledger_balance(self.savings), Decimal('0.00'))
+        self.assertLedgerConsistent()
+
+    def test_concurrent_updates(self):
+        transaction = self.create(amount=Decimal('10.00'))
+        # Deux copies chargées avant l'une ou l'autre modification
+        first = Transaction.objects.get(pk=transaction.pk)
+        second = Transaction.objects.get(pk=transaction.pk)
+        first.amount = Decimal('20.00')
+        first.save()
+        second.amount = Decimal('30.00')
+        second.save()
+
+        self.assertEqual(self.get_ledger_balance(self.checking), Decimal('-30.00'))
+        self.assertLedgerConsistent()
+
+        first.delete()
+        second.delete()
+        self.assertEqual(self.get_ledger_balance(self.checking), Decimal('0.00'))
+
+    def test_future_transactions(self):
+        self.create(type='income', amount=Decimal('100.00'))
+        self.create(amount=Decimal('30.00'), date=self.today + timedelta(days=10))
+
+        account = Account.objects.get(pk=self.checking.pk)
+        self.assertEqual(account.get_projected_balance(), Decimal('70.00'))
+        self.assertEqual(account.get_current_balance(), Decimal('100.00'))
+
+    def test_bulk_operations(self):
+        transactions = Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.checking, type='expense',
+                        amount=Decimal(index + 1), date=self.today)
+            for index in range(5)
+        ])
+        self.assertLedgerConsistent()
+
+        for transaction in transactions[:2]:
+            transaction.account = self.savings
+            transaction.amount += 1
+        Transaction.objects.bulk_update(transactions[:2], ['account', 'amount'])
+        self.assertLedgerConsistent()
+
+        Transaction.objects.filter(account=self.checking).update(type='income')
+        self.assertLedgerConsistent()
+
+        Transaction.objects.filter(account=self.savings).delete()
+        self.assertLedgerConsistent()
+        self.assertEqual(self.get_ledger_balance(self.checking), Decimal('12.00'))
+        self.assertEqual(self.get_ledger_balance(self.savings), Decimal('0.00'))
+
+
+class ForecastTestCase(TestCase):
+    """Prévision quotidienne des soldes (accounts.forecast)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.checking = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.savings = Account.objects.create(user=self.user, name='Épargne', account_type='savings')
+        self.euros = Account.objects.create(user=self.user, name='Euros', account_type='checking', currency='EUR')
+        self.today = date.today()
+
+    def create(self, **kwargs):
+        values = {
+            'user': self.user, 'account': self.checking, 'type': 'expense',
+            'amount': Decimal('10.00'), 'date': self.today,
+        }
+        values.update(kwargs)
+        return Transaction.objects.create(**values)
+
+    def get_account(self, result, account):
+        return next(row for row in result['accounts'] if row['id'] == account.pk)
+
+    def test_scheduled_and_currencies(self):
+        self.create(type='income', amount=Decimal('100.00'))
+        self.create(amount=Decimal('30.00'), date=self.today + timedelta(days=10))
+        self.create(type='transfer', amount=Decimal('20.00'), destination_account=self.savings,
+                    date=self.today + timedelta(days=5))
+        self.create(type='income', amount=Decimal('50.00'), account=self.euros)
+
+        result = forecasting.forecast(self.user, 30, include_budgets=False)
+        checking = self.get_account(result, self.checking)
+        self.assertEqual(len(checking['balances']), 31)
+        self.assertEqual([checking['balances'][day] for day in (0, 5, 10, 30)], [100.0, 80.0, 50.0, 50.0])
+        self.assertEqual(checking['end_balance'], checking['projected_balance'])
+        self.assertEqual((checking['min_balance'], checking['min_date']),
+                         (50.0, (self.today + timedelta(days=10)).isoformat()))
+
+        # Total par devise : les comptes en euros ne sont pas additionnés aux francs
+        self.assertEqual(set(result['total']), {'CHF', 'EUR'})
+        self.assertEqual(result['total']['CHF'][-1], 70.0)
+        self.assertEqual(set(result['total']['EUR']), {50.0})
+
+    @override_settings(RECURRENCE_HORIZON_DAYS=30)
+    def test_recurring_beyond_horizon(self):
+        rule = self.create(is_recurring=True, recurrence_frequency='weekly', recurrence_interval=1)
+        due = list(recurrence.iter_dates(rule, self.today, self.today + timedelta(days=120)))
+
+        result = forecasting.forecast(self.user, 120, include_budgets=False)
+        # Occurrences générées (jusqu'à l'horizon) puis calculées au-delà, sans doublon
+        self.assertEqual(self.get_account(result, self.checking)['end_balance'], -10.0 * (len(due) + 1))
+        self.assertEqual(result['components']['scheduled'] + result['components']['recurring'], -10.0 * len(due))
+        self.assertLess(result['components']['recurring'], 0)
+
+    def test_salary(self):
+        UserProfile.objects.create(user=self.user, monthly_income=Decimal('1000.00'), salary_day=1)
+        result = forecasting.forecast(self.user, 90, include_budgets=False)
+        self.assertIn(result['components']['salary'], (2000.0, 3000.0))
+
+        # Revenu récurrent enregistré : le salaire du profil n'est pas ajouté en plus
+        self.create(type='income', amount=Decimal('1000.00'), is_recurring=True,
+                    recurrence_frequency='monthly', recurrence_interval=1)
+        result = forecasting.forecast(self.user, 90, include_budgets=False)
+        self.assertEqual(result['components']['salary'], 0)
+
+    def test_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/accounts/forecast/', {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['dates']), 8)
+        for days in ('0', '1000', 'abc'):
+            self.assertEqual(client.get('/api/v1/accounts/forecast/', {'days': days}).status_code, 400)
+
+
+class HistoryTestCase(TestCase):
+    """Historique des soldes (accounts.history)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.checking = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.savings = Account.objects.create(user=self.user, name='Épargne', account_type='savings')
+        self.euros = Account.objects.create(user=self.user, name='Euros', account_type='checking', currency='EUR')
+        self.accounts = [self.checking, self.savings, self.euros]
+
+        for values in (
+            {'type': 'income', 'amount': Decimal('100.00'), 'date': date(2023, 12, 20)},
+            {'type': 'expense', 'amount': Decimal('30.00'), 'date': date(2024, 1, 5)},
+            {'type': 'transfer', 'amount': Decimal('20.00'), 'date': date(2024, 1, 10),
+             'destination_account': self.savings},
+            {'type': 'income', 'amount': Decimal('50.00'), 'date': date(2024, 2, 1), 'account': self.euros},
+        ):
+            Transaction.objects.create(**{'user': self.user, 'account': self.checking, **values})
+
+    def get_series(self, result):
+        return {row['id']: row['balances'] for row in result['accounts']}
+
+    def test_daily(self):
+        result = history.balance_history(self.accounts, date(2024, 1, 1), date(2024, 1, 10))
+        series = self.get_series(result)
+        self.assertEqual(len(result['dates']), 10)
+        self.assertEqual(series[self.checking.pk], [100.0] * 4 + [70.0] * 5 + [50.0])
+        self.assertEqual(series[self.savings.pk], [0.0] * 9 + [20.0])
+        self.assertEqual(result['total'], {'CHF': [100.0] * 4 + [70.0] * 6, 'EUR': [0.0] * 10})
+
+    def test_monthly(self):
+        result = history.balance_history(self.accounts, date(2023, 12, 1), date(2024, 2, 15), 'month')
+        self.assertEqual(result['dates'], ['2023-12-31', '2024-01-31', '2024-02-15'])
+        series = self.get_series(result)
+        self.assertEqual(series[self.checking.pk], [100.0, 50.0, 50.0])
+        self.assertEqual(series[self.euros.pk], [0.0, 0.0, 50.0])
+        # Totaux par devise ; la série se termine sur le solde du registre
+        self.assertEqual(result['total'], {'CHF': [100.0, 70.0, 70.0], 'EUR': [0.0, 0.0, 50.0]})
+        for account in self.accounts:
+            account.refresh_from_db()
+            self.assertEqual(series[account.pk][-1], float(account.ledger_balance))
+
+    def test_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/v1/accounts/history/'
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-31', 'account': self.savings.pk}
+        data = client.get(url, params).json()
+        self.assertEqual([row['id'] for row in data['accounts']], [self.savings.pk])
+        self.assertEqual(data['total']['CHF'][-1], 20.0)
+
+        self.assertEqual(client.get(url, {'granularity': 'week'}).status_code, 400)
+        self.assertEqual(client.get(url, {'start_date': '2024-02-01', 'end_date': '2024-01-01'}).status_code, 400)
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        client.force_authenticate(other)
+        self.assertEqual(client.get(url, {'account': self.savings.pk}).status_code, 404)
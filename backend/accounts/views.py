@@ -2,11 +2,16 @@ from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from core.cache import cached_response
+from core.conditional import ConditionalGetMixin
+from core.idempotency import IdempotentMixin
+from datetime import date, timedelta
+from . import forecast as forecasting, history
 from .models import Account
 from .serializers import AccountSerializer, AccountListSerializer
 
 
-class AccountViewSet(viewsets.ModelViewSet):
+class AccountViewSet(IdempotentMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les comptes bancaires
     """
@@ -20,8 +25,12 @@ class AccountViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retourne uniquement les comptes de l'utilisateur connecté
+        En lecture, les soldes actuels sont annotés en une seule requête
         """
-        return Account.objects.filter(user=self.request.user)
+        queryset = Account.objects.filter(user=self.request.user)
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.with_balances()
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -38,6 +47,7 @@ class AccountViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def summary(self, request):
         """
         Retourne un résumé des comptes (total par devise, excluant les transactions futures)
@@ -46,6 +56,7 @@ class AccountViewSet(viewsets.ModelViewSet):
 
         summary = {}
         for account in accounts:
+            current_balance = float(account.get_current_balance())
             currency = account.currency
             if currency not in summary:
                 summary[currency] = {
@@ -54,16 +65,85 @@ class AccountViewSet(viewsets.ModelViewSet):
                     'by_type': {}
                 }
 
-            summary[currency]['total'] += float(account.get_current_balance())
+            summary[currency]['total'] += current_balance
             summary[currency]['count'] += 1
 
             account_type = account.get_account_type_display()
             if account_type not in summary[currency]['by_type']:
                 summary[currency]['by_type'][account_type] = 0
-            summary[currency]['by_type'][account_type] += float(account.get_current_balance())
+            summary[currency]['by_type'][account_type] += current_balance
 
         return Response(summary)
 
+    @action(detail=False, methods=['get'])
+    @cached_response
+    def forecast(self, request):
+        """
+        Prévision du solde quotidien de chaque compte actif sur N jours
+
+        GET /api/v1/accounts/forecast/?days=365&include_budgets=false
+        Combine le solde actuel, les transactions futures (occurrences des
+        transactions récurrentes comprises), les occurrences non encore
+        générées, le salaire du profil et le reste à dépenser des budgets
+        (voir accounts.forecast).
+        """
+        try:
+            days = int(request.query_params.get('days', forecasting.DEFAULT_FORECAST_DAYS))
+        except ValueError:
+            return Response({'error': 'Nombre de jours invalide.'}, status=400)
+        if not 1 <= days <= forecasting.MAX_FORECAST_DAYS:
+            return Response(
+                {'error': f'Le nombre de jours doit être compris entre 1 et {forecasting.MAX_FORECAST_DAYS}.'},
+                status=400
+            )
+
+        include_budgets = request.query_params.get('include_budgets', 'true').lower() not in ('0', 'false', 'no')
+        return Response(forecasting.forecast(request.user, days, include_budgets=include_budgets))
+
+    @action(detail=False, methods=['get'])
+    @cached_response
+    def history(self, request):
+        """
+        Historique des soldes d'un compte ou de tous les comptes actifs
+
+        GET /api/v1/accounts/history/?account=<id>&start_date=AAAA-MM-JJ&end_date=AAAA-MM-JJ&granularity=day|month
+        Par défaut : 90 derniers jours, soldes quotidiens. Calculé par une
+        seule requête SQL avec somme cumulée (voir accounts.history).
+        """
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        if granularity not in history.GRANULARITIES:
+            return Response(
+                {'error': f"Granularité invalide. Valeurs possibles : {', '.join(history.GRANULARITIES)}."},
+                status=400
+            )
+
+        try:
+            end = date.fromisoformat(params['end_date']) if params.get('end_date') else date.today()
+            start = (
+                date.fromisoformat(params['start_date']) if params.get('start_date')
+                else end - timedelta(days=89)
+            )
+        except ValueError:
+            return Response({'error': 'Date invalide (format attendu : AAAA-MM-JJ).'}, status=400)
+
+        if start > end:
+            return Response({'error': 'La date de début doit précéder la date de fin.'}, status=400)
+        if len(history.get_points(start, end, granularity)) > history.MAX_POINTS:
+            return Response({'error': f'Intervalle trop long (maximum {history.MAX_POINTS} points).'}, status=400)
+
+        accounts = Account.objects.filter(user=request.user).order_by('pk')
+        if params.get('account'):
+            if not params['account'].isdigit():
+                return Response({'error': 'Compte introuvable.'}, status=404)
+            accounts = accounts.filter(pk=params['account'])
+            if not accounts:
+                return Response({'error': 'Compte introuvable.'}, status=404)
+        else:
+            accounts = accounts.filter(is_active=True)
+
+        return Response(history.balance_history(accounts, start, end, granularity))
+
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
         """
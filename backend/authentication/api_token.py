@@ -1,10 +1,20 @@
 """
 API Token authentication for external integrations like iOS Shortcuts.
+
+Le token brut n'est jamais stocké : la base conserve un préfixe public (les
+8 premiers caractères, indexé) et une empreinte HMAC-SHA256 du token, clé
+SECRET_KEY (changer SECRET_KEY invalide donc les tokens existants).
+L'authentification lit les tokens actifs du préfixe (une requête indexée)
+puis compare les empreintes en temps constant.
 """
 import secrets
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+# Longueur du préfixe public du token
+TOKEN_PREFIX_LENGTH = 8
 
 
 class APIToken(models.Model):
@@ -23,11 +33,18 @@ class APIToken(models.Model):
         verbose_name='Token Name',
         help_text='Friendly name for this token (e.g., "iPhone Shortcut")'
     )
-    token = models.CharField(
+    prefix = models.CharField(
+        max_length=TOKEN_PREFIX_LENGTH,
+        editable=False,
+        verbose_name='Token Prefix',
+        help_text='First characters of the token, used to look it up'
+    )
+    token_hash = models.CharField(
         max_length=64,
         unique=True,
-        verbose_name='Token',
-        help_text='The actual API token (auto-generated)'
+        editable=False,
+        verbose_name='Token Hash',
+        help_text='Keyed hash (HMAC-SHA256) of the token'
     )
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -50,10 +67,13 @@ class APIToken(models.Model):
         verbose_name_plural = 'API Tokens'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['token']),
+            models.Index(fields=['prefix', 'is_active']),
             models.Index(fields=['user', 'is_active']),
         ]
 
+    # Token brut, disponible uniquement sur l'instance qui vient de le générer
+    token = None
+
     def __str__(self):
         return f"{self.user.username} - {self.name}"
 
@@ -62,10 +82,28 @@ class APIToken(models.Model):
         """Generate a secure random token"""
         return secrets.token_urlsafe(48)  # 48 bytes = 64 characters
 
+    @staticmethod
+    def get_prefix(token_value):
+        return token_value[:TOKEN_PREFIX_LENGTH]
+
+    @staticmethod
+    def hash_token(token_value):
+        """Empreinte HMAC-SHA256 (hexadécimale) du token"""
+        return salted_hmac('authentication.APIToken', token_value, algorithm='sha256').hexdigest()
+
+    def set_token(self, token_value):
+        self.token = token_value
+        self.prefix = self.get_prefix(token_value)
+        self.token_hash = self.hash_token(token_value)
+
+    def check_token(self, token_hash):
+        """Compare l'empreinte en temps constant"""
+        return constant_time_compare(self.token_hash, token_hash)
+
     def save(self, *args, **kwargs):
         """Auto-generate token if not provided"""
-        if not self.token:
-            self.token = self.generate_token()
+        if not self.token_hash:
+            self.set_token(self.token or self.generate_token())
         super().save(*args, **kwargs)
 
     def update_last_used(self):
@@ -117,3 +155,76 @@ class PendingAlert(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.type} - {'vue' if self.seen else 'non vue'}"
+
+
+class QueuedTransaction(models.Model):
+    """
+    Transaction iOS reçue en mode asynchrone, en attente de création par la
+    commande process_ios_queue (voir authentication.ingestion).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('processed', 'Traitée'),
+        ('failed', 'En échec'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='queued_transactions',
+        verbose_name='Utilisateur'
+    )
+    idempotency_key = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        verbose_name="Clé d'idempotence",
+        help_text='En-tête Idempotency-Key : une même clé ne crée qu\'une transaction'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Données'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Statut'
+    )
+    transaction = models.ForeignKey(
+        'transactions.Transaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Transaction créée'
+    )
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Erreur'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de réception'
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Date de traitement'
+    )
+
+    class Meta:
+        db_table = 'queued_transaction'
+        verbose_name = 'Transaction iOS en file'
+        verbose_name_plural = 'Transactions iOS en file'
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='queued_transaction_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.payload.get('label', '')} ({self.status})"
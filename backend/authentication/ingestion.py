@@ -0,0 +1,169 @@
+"""
+Création des transactions iOS, immédiate ou différée.
+
+En mode synchrone, ios_create_transaction crée la transaction (et l'alerte
+si la catégorie est inconnue) pendant la requête. En mode asynchrone
+(``?async=1`` ou en-tête ``Prefer: respond-async``), la requête valide le
+corps sans accès à la base, enregistre une QueuedTransaction (une seule
+insertion) et répond 202 ; la commande process_ios_queue crée ensuite les
+transactions par lots.
+
+L'en-tête ``Idempotency-Key`` déduplique les envois du mode asynchrone : un
+raccourci qui renvoie la même requête après une coupure réseau reçoit
+l'accusé de réception de la première, sans nouvelle transaction.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, IntegrityError, connection, transaction as db_transaction
+from django.utils import timezone
+
+from .api_token import PendingAlert, QueuedTransaction
+from .resolver import get_resolver
+
+# Longueur maximale d'une clé d'idempotence
+MAX_KEY_LENGTH = 100
+
+# Montant maximal (exclu) : 13 chiffres avant la virgule (Transaction.amount)
+MAX_AMOUNT = Decimal(10) ** 13
+
+
+class IngestionError(ValueError):
+    """Transaction iOS refusée (champ manquant, montant invalide, aucun compte)."""
+
+
+def parse_payload(data):
+    """
+    Valide le corps de la requête (sans accès à la base) et retourne
+    {'amount', 'label', 'category'} (montant sous forme de texte)
+    """
+    amount_raw = data.get('amount')
+    label = data.get('label', '')
+    category_name = data.get('category', '')
+
+    if amount_raw is None:
+        raise IngestionError('Le montant est requis.')
+
+    try:
+        amount = Decimal(str(amount_raw))
+        if not amount.is_finite() or amount <= 0:
+            raise ValueError
+        amount = amount.quantize(Decimal('0.01'))
+        if amount <= 0 or amount >= MAX_AMOUNT:
+            raise ValueError
+    except (InvalidOperation, ValueError):
+        raise IngestionError('Montant invalide.')
+
+    if not label:
+        raise IngestionError('Le label est requis.')
+
+    return {'amount': str(amount), 'label': label, 'category': category_name or ''}
+
+
+def create_transaction(user_id, payload, today=None):
+    """
+    Crée la transaction de dépense, sur le compte par défaut, et l'alerte si
+    la catégorie est inconnue. Retourne les données de réponse de l'endpoint.
+    """
+    from transactions.models import Transaction
+
+    # Compte par défaut et catégorie (résolveur en mémoire, voir authentication.resolver)
+    resolver = get_resolver(user_id)
+    if not resolver.account_id:
+        raise IngestionError('Aucun compte actif trouvé.')
+
+    # Recherche de catégorie (nom exact, sans casse ni accents, ou le plus proche)
+    category_name = payload['category']
+    category = resolver.get_category(category_name) if category_name else None
+    multi_status = bool(category_name) and not category
+    source = 'ios_uncategorized' if multi_status else 'ios'
+
+    with db_transaction.atomic():
+        transaction = Transaction.objects.create(
+            user_id=user_id,
+            account_id=resolver.account_id,
+            category_id=category[0] if category else None,
+            type='expense',
+            amount=Decimal(payload['amount']),
+            description=payload['label'],
+            date=today or date.today(),
+            source=source,
+        )
+
+        # Alerte si catégorie inconnue
+        if multi_status:
+            PendingAlert.objects.create(
+                user_id=user_id,
+                type='unknown_category',
+                payload={
+                    'transaction_id': transaction.id,
+                    'category_name': category_name,
+                    'amount': payload['amount'],
+                    'label': payload['label'],
+                }
+            )
+
+    response_data = {
+        'id': transaction.id,
+        'amount': str(transaction.amount),
+        'description': transaction.description,
+        'category': category[1] if category else None,
+        'date': str(transaction.date),
+        'source': source,
+    }
+    if multi_status:
+        response_data['warning'] = (
+            f'Catégorie "{category_name}" non trouvée. '
+            f'Transaction créée sans catégorie.'
+        )
+    return response_data
+
+
+def enqueue(user_id, payload, idempotency_key=None):
+    """
+    Met la transaction en file. Retourne (élément, créé) : avec une clé déjà
+    reçue, l'élément existant est retourné sans nouvelle insertion.
+    """
+    try:
+        with db_transaction.atomic():
+            item = QueuedTransaction.objects.create(
+                user_id=user_id, payload=payload, idempotency_key=idempotency_key or None
+            )
+        return item, True
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        return QueuedTransaction.objects.get(user_id=user_id, idempotency_key=idempotency_key), False
+
+
+def process_queue(batch_size=100):
+    """
+    Crée les transactions d'un lot d'éléments en attente (les plus anciens
+    d'abord), datées du jour de leur réception. Sous PostgreSQL, les
+    éléments sont verrouillés (SKIP LOCKED) : plusieurs workers peuvent
+    vider la file en parallèle.
+
+    Retourne (traités, en échec).
+    """
+    processed = failed = 0
+    with db_transaction.atomic():
+        items = QueuedTransaction.objects.filter(status='pending').order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            items = items.select_for_update(skip_locked=True)
+        items = list(items[:batch_size])
+
+        for item in items:
+            try:
+                with db_transaction.atomic():
+                    received = timezone.localdate(item.created_at)
+                    response_data = create_transaction(item.user_id, item.payload, received)
+                item.status, item.transaction_id = 'processed', response_data['id']
+                processed += 1
+            except (IngestionError, KeyError, InvalidOperation, DatabaseError) as error:
+                # L'élément est écarté (savepoint annulé), le reste du lot est traité
+                item.status, item.error = 'failed', str(error)[:255]
+                failed += 1
+            item.processed_at = timezone.now()
+
+        QueuedTransaction.objects.bulk_update(items, ['status', 'transaction', 'error', 'processed_at'])
+    return processed, failed
@@ -1,141 +1,86 @@
 """
 Vues pour l'intégration iOS (endpoint transaction) et gestion des alertes/tokens.
 """
-from datetime import date
-from decimal import Decimal, InvalidOperation
-
 from rest_framework import status as http_status
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core.idempotency import idempotent
+
 from .api_token import APIToken, PendingAlert
-from .rate_limit import check_rate_limit
+from .ingestion import MAX_KEY_LENGTH, IngestionError, create_transaction, enqueue, parse_payload
+from .throttling import APITokenRateThrottle, APITokenUserRateThrottle
 from .token_auth import APITokenAuthentication
-from accounts.models import Account
-from categories.models import Category
-from transactions.models import Transaction
 
 
 # =============================================================================
 # Endpoint iOS — Transaction
 # =============================================================================
 
+def is_async_request(request):
+    """Mode asynchrone demandé par ?async=1 ou l'en-tête Prefer: respond-async."""
+    if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.META.get('HTTP_PREFER', '').lower()
+
+
 @api_view(['POST'])
 @authentication_classes([APITokenAuthentication])
 @permission_classes([IsAuthenticated])
+@throttle_classes([APITokenRateThrottle, APITokenUserRateThrottle])
+@idempotent(unless=is_async_request)
 def ios_create_transaction(request):
     """
     POST /api/v1/ios/transaction/
     Body: { "amount": 12.50, "label": "Café + sandwich", "category": "Alimentation" }
 
+    L'en-tête Idempotency-Key évite les doublons lorsque le raccourci renvoie
+    la requête (voir core.idempotency). Mode asynchrone (?async=1 ou Prefer:
+    respond-async) : la transaction est mise en file et créée par la
+    commande process_ios_queue, la clé est alors portée par l'élément en file
+    (voir authentication.ingestion).
+
     Réponses :
     - 201 : Transaction créée
+    - 202 : Transaction mise en file (mode asynchrone ; 200 si la clé d'idempotence a déjà été reçue)
     - 207 : Transaction créée mais catégorie inconnue
     - 401 : Token invalide
     - 422 : Champ manquant ou montant invalide
+    - 429 : Limite de requêtes atteinte (en-tête Retry-After)
     """
     user = request.user
-    api_token = request.auth
-
-    # Rate limiting
-    check_rate_limit(api_token.id)
 
     # Extraction et validation
-    amount_raw = request.data.get('amount')
-    label = request.data.get('label', '')
-    category_name = request.data.get('category', '')
-
-    if amount_raw is None:
-        return Response(
-            {'error': 'Le montant est requis.'},
-            status=http_status.HTTP_422_UNPROCESSABLE_ENTITY
-        )
-
     try:
-        amount = Decimal(str(amount_raw))
-        if amount <= 0:
-            raise ValueError
-    except (InvalidOperation, ValueError):
+        payload = parse_payload(request.data)
+    except IngestionError as error:
+        return Response({'error': str(error)}, status=http_status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if is_async_request(request):
+        idempotency_key = request.META.get('HTTP_IDEMPOTENCY_KEY', '').strip()
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f"Clé d'idempotence trop longue ({MAX_KEY_LENGTH} caractères maximum)."},
+                status=http_status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        item, created = enqueue(user.pk, payload, idempotency_key)
         return Response(
-            {'error': 'Montant invalide.'},
-            status=http_status.HTTP_422_UNPROCESSABLE_ENTITY
-        )
-
-    if not label:
-        return Response(
-            {'error': 'Le label est requis.'},
-            status=http_status.HTTP_422_UNPROCESSABLE_ENTITY
+            {
+                'queue_id': item.id,
+                'status': item.status,
+                'transaction_id': item.transaction_id,
+                'duplicate': not created,
+            },
+            status=http_status.HTTP_202_ACCEPTED if created else http_status.HTTP_200_OK
         )
 
-    # Compte par défaut (premier compte courant actif)
-    default_account = Account.objects.filter(
-        user=user, is_active=True, account_type='checking'
-    ).first()
-    if not default_account:
-        default_account = Account.objects.filter(user=user, is_active=True).first()
-    if not default_account:
-        return Response(
-            {'error': 'Aucun compte actif trouvé.'},
-            status=http_status.HTTP_422_UNPROCESSABLE_ENTITY
-        )
-
-    # Recherche de catégorie
-    category = None
-    source = 'ios'
-    multi_status = False
-
-    if category_name:
-        category = Category.objects.filter(
-            user=user,
-            name__iexact=category_name,
-            type='expense',
-            is_active=True
-        ).first()
-
-        if not category:
-            source = 'ios_uncategorized'
-            multi_status = True
-
-    # Création de la transaction
-    transaction = Transaction.objects.create(
-        user=user,
-        account=default_account,
-        category=category,
-        type='expense',
-        amount=amount,
-        description=label,
-        date=date.today(),
-        source=source,
-    )
-
-    # Alerte si catégorie inconnue
-    if multi_status:
-        PendingAlert.objects.create(
-            user=user,
-            type='unknown_category',
-            payload={
-                'transaction_id': transaction.id,
-                'category_name': category_name,
-                'amount': str(amount),
-                'label': label,
-            }
-        )
+    try:
+        response_data = create_transaction(user.pk, payload)
+    except IngestionError as error:
+        return Response({'error': str(error)}, status=http_status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-    response_data = {
-        'id': transaction.id,
-        'amount': str(transaction.amount),
-        'description': transaction.description,
-        'category': category.name if category else None,
-        'date': str(transaction.date),
-        'source': source,
-    }
-
-    if multi_status:
-        response_data['warning'] = (
-            f'Catégorie "{category_name}" non trouvée. '
-            f'Transaction créée sans catégorie.'
-        )
+    if 'warning' in response_data:
         return Response(response_data, status=207)
 
     return Response(response_data, status=http_status.HTTP_201_CREATED)
@@ -145,12 +90,9 @@ def ios_create_transaction(request):
 # Endpoints Alertes (auth JWT classique)
 # =============================================================================
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def alert_list(request):
-    """Liste des alertes non vues pour l'utilisateur."""
-    alerts = PendingAlert.objects.filter(user=request.user, seen=False)
-    data = [
+def serialize_alerts(alerts):
+    """Représentation des alertes (liste des alertes et tableau de bord)."""
+    return [
         {
             'id': a.id,
             'type': a.type,
@@ -160,7 +102,14 @@ def alert_list(request):
         }
         for a in alerts
     ]
-    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def alert_list(request):
+    """Liste des alertes non vues pour l'utilisateur."""
+    alerts = PendingAlert.objects.filter(user=request.user, seen=False)
+    return Response(serialize_alerts(alerts))
 
 
 @api_view(['GET'])
@@ -173,6 +122,7 @@ def alert_count(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent()
 def alert_dismiss(request, alert_id):
     """Marquer une alerte comme vue."""
     try:
@@ -212,7 +162,10 @@ def token_list(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def token_create(request):
-    """Créer un nouveau API token. Le token brut est retourné une seule fois."""
+    """
+    Créer un nouveau API token. Le token brut est retourné une seule fois.
+    Pas d'Idempotency-Key ici : la réponse (avec le token brut) serait conservée.
+    """
     name = request.data.get('name', '')
     if not name:
         return Response(
@@ -236,8 +189,9 @@ def token_create(request):
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
+@idempotent()
 def token_delete(request, token_id):
-    """Révoquer (supprimer) un API token."""
+    """Révoquer (supprimer) un API token. Il est aussitôt retiré du cache d'authentification."""
     try:
         api_token = APIToken.objects.get(id=token_id, user=request.user)
     except APIToken.DoesNotExist:
@@ -0,0 +1,89 @@
+"""
+Commande Django pour mesurer le coût de l'authentification par API token
+selon le nombre de tokens en base.
+
+Crée des tokens de test par paliers (jusqu'à --tokens) dans une transaction
+annulée à la fin, puis mesure pour chaque palier la durée moyenne de la
+recherche d'un token (préfixe indexé + comparaison de l'empreinte, sans le
+cache) et le nombre de requêtes par authentification.
+
+Usage:
+    python manage.py benchmark_token_auth
+    python manage.py benchmark_token_auth --tokens 100000 --lookups 500
+"""
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from authentication.api_token import APIToken
+from authentication.token_auth import find_api_token
+
+BATCH_SIZE = 2000
+
+
+class Rollback(Exception):
+    """Annule la transaction du benchmark."""
+
+
+class Command(BaseCommand):
+    help = "Mesure le coût de l'authentification par API token jusqu'à N tokens en base"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tokens',
+            type=int,
+            default=100000,
+            help='Nombre maximal de tokens en base (défaut : 100000)'
+        )
+        parser.add_argument(
+            '--lookups',
+            type=int,
+            default=200,
+            help='Nombre d\'authentifications mesurées par palier (défaut : 200)'
+        )
+
+    def handle(self, *args, **options):
+        total, lookups = options['tokens'], options['lookups']
+        if total < 1 or lookups < 1:
+            raise CommandError('--tokens et --lookups doivent être positifs')
+
+        steps = sorted({min(step, total) for step in (1000, 10000, 100000, total)})
+        self.stdout.write(f'{"Tokens":>10} {"Moyenne (µs)":>14} {"p99 (µs)":>10} {"Requêtes":>9}')
+        try:
+            with transaction.atomic():
+                self.run(steps, lookups)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, steps, lookups):
+        user = get_user_model().objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+        values = []
+        for step in steps:
+            # Ajout des tokens jusqu'au palier (hors save() : empreinte calculée ici)
+            while len(values) < step:
+                batch = []
+                for _ in range(min(BATCH_SIZE, step - len(values))):
+                    api_token = APIToken(user=user, name='benchmark')
+                    api_token.set_token(APIToken.generate_token())
+                    values.append(api_token.token)
+                    batch.append(api_token)
+                APIToken.objects.bulk_create(batch)
+
+            durations, queries = [], 0
+            for value in random.sample(values, min(lookups, len(values))):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    find_api_token(value)
+                    durations.append((time.perf_counter() - start) * 1_000_000)
+                queries += len(captured.captured_queries)
+
+            durations.sort()
+            average = sum(durations) / len(durations)
+            p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+            self.stdout.write(f'{step:>10} {average:>14.0f} {p99:>10.0f} {queries / len(durations):>9.1f}')
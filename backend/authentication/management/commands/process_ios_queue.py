@@ -0,0 +1,89 @@
+"""
+Commande Django pour créer les transactions iOS reçues en mode asynchrone
+(voir authentication.ingestion), par lots.
+
+Sans --loop, la file est vidée puis la commande s'arrête (cron) ; avec
+--loop, elle attend de nouveaux éléments (service dédié). Les éléments
+traités depuis plus de --keep-days jours sont supprimés : c'est la durée
+pendant laquelle une clé d'idempotence protège contre les doublons.
+
+Usage:
+    python manage.py process_ios_queue
+    python manage.py process_ios_queue --loop --interval 2 --batch-size 100
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from authentication.api_token import QueuedTransaction
+from authentication.ingestion import process_queue
+
+# Intervalle (secondes) entre deux purges des éléments traités, avec --loop
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Crée par lots les transactions iOS mises en file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Nombre d\'éléments traités par lot (défaut : 100)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Continuer à attendre de nouveaux éléments une fois la file vide'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Attente (secondes) quand la file est vide, avec --loop (défaut : 2)'
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=30,
+            help='Conservation (jours) des éléments traités (défaut : 30)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size doit être positif')
+
+        purged_at = None
+        try:
+            while True:
+                processed, failed = self.drain(batch_size)
+                if processed or failed:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'✅ {processed} transaction(s) créée(s), {failed} en échec')
+                    )
+                if purged_at is None or time.monotonic() - purged_at > PURGE_INTERVAL:
+                    self.purge(options['keep_days'])
+                    purged_at = time.monotonic()
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size):
+        """Traite des lots jusqu'à ce que la file soit vide."""
+        processed = failed = 0
+        while True:
+            batch_processed, batch_failed = process_queue(batch_size)
+            processed, failed = processed + batch_processed, failed + batch_failed
+            if batch_processed + batch_failed < batch_size:
+                return processed, failed
+
+    def purge(self, keep_days):
+        QueuedTransaction.objects.exclude(status='pending').filter(
+            processed_at__lt=timezone.now() - timedelta(days=keep_days)
+        ).delete()
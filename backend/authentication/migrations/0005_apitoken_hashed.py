@@ -0,0 +1,60 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:57
+
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+
+def hash_tokens(apps, schema_editor):
+    """
+    Remplace les tokens bruts par leur préfixe et leur empreinte HMAC-SHA256
+    (même calcul que APIToken.hash_token)
+    """
+    APIToken = apps.get_model('authentication', 'APIToken')
+
+    tokens = list(APIToken.objects.only('pk', 'token'))
+    for api_token in tokens:
+        api_token.prefix = api_token.token[:8]
+        api_token.token_hash = salted_hmac(
+            'authentication.APIToken', api_token.token, algorithm='sha256'
+        ).hexdigest()
+    APIToken.objects.bulk_update(tokens, ['prefix', 'token_hash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_userprofile_salary_day'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='apitoken',
+            name='api_token_token_5cc0f7_idx',
+        ),
+        migrations.AddField(
+            model_name='apitoken',
+            name='prefix',
+            field=models.CharField(default='', editable=False, help_text='First characters of the token, used to look it up', max_length=8, verbose_name='Token Prefix'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='apitoken',
+            name='token_hash',
+            field=models.CharField(editable=False, help_text='Keyed hash (HMAC-SHA256) of the token', max_length=64, null=True, verbose_name='Token Hash'),
+        ),
+        # Les tokens bruts ne peuvent pas être restaurés : migration irréversible
+        migrations.RunPython(hash_tokens),
+        migrations.RemoveField(
+            model_name='apitoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='apitoken',
+            name='token_hash',
+            field=models.CharField(editable=False, help_text='Keyed hash (HMAC-SHA256) of the token', max_length=64, unique=True, verbose_name='Token Hash'),
+        ),
+        migrations.AddIndex(
+            model_name='apitoken',
+            index=models.Index(fields=['prefix', 'is_active'], name='api_token_prefix_61789a_idx'),
+        ),
+    ]
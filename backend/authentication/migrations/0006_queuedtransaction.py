@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_apitoken_hashed'),
+        ('transactions', '0010_transaction_recurrence_occurrences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, help_text="En-tête Idempotency-Key : une même clé ne crée qu'une transaction", max_length=100, null=True, verbose_name="Clé d'idempotence")),
+                ('payload', models.JSONField(default=dict, verbose_name='Données')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processed', 'Traitée'), ('failed', 'En échec')], default='pending', max_length=10, verbose_name='Statut')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de réception')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de traitement')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction', verbose_name='Transaction créée')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_transactions', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Transaction iOS en file',
+                'verbose_name_plural': 'Transactions iOS en file',
+                'db_table': 'queued_transaction',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'id'], name='queued_tran_status_c847ab_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='queuedtransaction',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='queued_transaction_unique_key'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
-from .api_token import APIToken, PendingAlert  # noqa: F401
+from .api_token import APIToken, PendingAlert, QueuedTransaction  # noqa: F401
 
 
 class User(AbstractUser):
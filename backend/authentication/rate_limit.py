@@ -1,18 +1,18 @@
 """
 Rate limiting pour les endpoints API token (iOS).
-Utilise le cache Django (locmem déjà configuré).
+Conservé pour compatibilité : s'appuie sur le limiteur atomique de
+authentication.throttling (cache partagé, fenêtre glissante).
 """
-from django.core.cache import cache
 from rest_framework.exceptions import Throttled
 
+from .throttling import RateLimiter
+
 
 def check_rate_limit(token_id, max_requests=10, window=60):
     """
     Vérifie la limite de requêtes : 10 requêtes par minute par token.
-    Lève Throttled si la limite est dépassée.
+    Lève Throttled (avec le délai d'attente pour Retry-After) si la limite est dépassée.
     """
-    cache_key = f'ios_rate_limit_{token_id}'
-    current = cache.get(cache_key, 0)
-    if current >= max_requests:
-        raise Throttled(detail='Limite de requêtes atteinte (10/min).')
-    cache.set(cache_key, current + 1, window)
+    wait = RateLimiter('ios_token', max_requests, window).hit(token_id)
+    if wait is not None:
+        raise Throttled(wait=wait, detail=f'Limite de requêtes atteinte ({max_requests}/{window}s).')
@@ -0,0 +1,105 @@
+"""
+Résolution du compte par défaut et de la catégorie des transactions iOS.
+
+Pour chaque utilisateur, le compte par défaut (premier compte courant actif,
+sinon premier compte actif) et les catégories de dépenses actives, indexées
+par nom normalisé (casse, accents et espaces ignorés), sont gardés en
+mémoire du processus. Une écriture sur un compte ou une catégorie change la
+version du résolveur de l'utilisateur dans le cache partagé : chaque worker
+recharge alors ses données (deux requêtes) au prochain appel. Les soldes,
+mis à jour sans save() (accounts.ledger), ne l'invalident pas.
+
+Un nom inconnu est rapproché du nom de catégorie le plus proche
+(difflib, ratio >= CATEGORY_MATCH_CUTOFF) : « Alimentaton » donne
+« Alimentation » au lieu d'une transaction non catégorisée.
+"""
+import difflib
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Account
+from categories.models import Category
+
+VERSION_KEY = 'ios_resolver:{user_id}'
+
+# Similarité minimale (0 à 1) pour rapprocher un nom de catégorie inconnu
+CATEGORY_MATCH_CUTOFF = 0.8
+
+# Nombre maximal d'utilisateurs gardés en mémoire par processus
+MAX_USERS = 1000
+
+_resolvers = OrderedDict()
+
+
+def normalize_name(name):
+    """Nom sans accents, en minuscules (casefold), espaces réduits."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def get_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+class Resolver:
+    """Compte par défaut et catégories de dépenses actives d'un utilisateur."""
+
+    def __init__(self, user_id, version):
+        self.version = version
+
+        accounts = list(
+            Account.objects.filter(user_id=user_id, is_active=True).values_list('pk', 'account_type')
+        )
+        checking = [pk for pk, account_type in accounts if account_type == 'checking']
+        self.account_id = checking[0] if checking else (accounts[0][0] if accounts else None)
+
+        self.categories = {}
+        categories = Category.objects.filter(
+            user_id=user_id, type='expense', is_active=True
+        ).values_list('pk', 'name')
+        for pk, name in categories:
+            self.categories.setdefault(normalize_name(name), (pk, name))
+
+    def get_category(self, name):
+        """(id, nom) de la catégorie correspondant au nom, ou None."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        if normalized in self.categories:
+            return self.categories[normalized]
+        matches = difflib.get_close_matches(normalized, self.categories, n=1, cutoff=CATEGORY_MATCH_CUTOFF)
+        return self.categories[matches[0]] if matches else None
+
+
+def get_resolver(user_id):
+    """Résolveur de l'utilisateur (mémoire du processus, rechargé si sa version a changé)."""
+    version = get_version(user_id)
+    resolver = _resolvers.get(user_id)
+    if resolver is None or resolver.version != version:
+        resolver = Resolver(user_id, version)
+    _resolvers[user_id] = resolver
+    _resolvers.move_to_end(user_id)
+    while len(_resolvers) > MAX_USERS:
+        _resolvers.popitem(last=False)
+    return resolver
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_resolver(sender, instance, **kwargs):
+    key = VERSION_KEY.format(user_id=instance.user_id)
+    db_transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
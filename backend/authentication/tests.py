@@ -1,3 +1,265 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from authentication import ingestion, throttling, token_auth
+from authentication.api_token import APIToken, QueuedTransaction
+from categories.models import Category
+from core.models import IdempotencyRecord
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class IOSTransactionTestCase(TestCase):
+    """Création des transactions iOS (mode synchrone et file d'attente)"""
+
+    url = '/api/v1/ios/transaction/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.account = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.category = Category.objects.create(user=self.user, name='Alimentation', type='expense')
+        token = APIToken.objects.create(user=self.user, name='iPhone')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.token}')
+
+    def post(self, data, key=None, asynchronous=False):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        url = f'{self.url}?async=1' if asynchronous else self.url
+        return self.client.post(url, data, format='json', **headers)
+
+    def test_sync_replay(self):
+        data = {'amount': '4.50', 'label': 'Café', 'category': 'alimentation'}
+        first = self.post(data, 'key-1')
+        second = self.post(data, 'key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()['category'], 'Alimentation')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_client_error_replayed(self):
+        # Corps illisible : ParseError levée dans la vue, enregistrée comme une réponse 400
+        first = self.client.post(self.url, '{', content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1')
+        second = self.client.post(self.url, '{', content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_server_error_releases_key(self):
+        with mock.patch('authentication.ios_views.parse_payload', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post({'amount': '4.50', 'label': 'Café'}, 'key-1')
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        self.assertEqual(self.post({'amount': '4.50', 'label': 'Café'}, 'key-1').status_code, 201)
+
+    def test_queue_dedup(self):
+        data = {'amount': '4.50', 'label': 'Café'}
+        first = self.post(data, 'key-1', asynchronous=True)
+        second = self.post(data, 'key-1', asynchronous=True)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.json()['duplicate'])
+        self.assertEqual(second.json()['queue_id'], first.json()['queue_id'])
+        self.assertEqual(QueuedTransaction.objects.count(), 1)
+
+        self.assertEqual(ingestion.process_queue(), (1, 0))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+        # Renvoi après traitement : pas de nouvelle transaction
+        third = self.post(data, 'key-1', asynchronous=True)
+        self.assertEqual(third.json()['status'], 'processed')
+        self.assertEqual(ingestion.process_queue(), (0, 0))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_queue_rejects_invalid_amounts(self):
+        for amount in ('0', '-3', '1e20', 'Infinity', 'NaN', '0.001', 'abc'):
+            response = self.post({'amount': amount, 'label': 'Café'}, asynchronous=True)
+            self.assertEqual(response.status_code, 422, amount)
+        self.assertFalse(QueuedTransaction.objects.exists())
+
+    def test_queue_failure_does_not_block_batch(self):
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        ingestion.enqueue(other.pk, ingestion.parse_payload({'amount': '1', 'label': 'Sans compte'}))
+        ingestion.enqueue(self.user.pk, ingestion.parse_payload({'amount': '2', 'label': 'Pain'}))
+
+        self.assertEqual(ingestion.process_queue(), (1, 1))
+        failed = QueuedTransaction.objects.get(user=other)
+        self.assertEqual(failed.status, 'failed')
+        self.assertTrue(failed.error)
+        self.assertEqual(
+            Transaction.objects.get(user=self.user).amount, Decimal('2.00')
+        )
+
+
+class RateLimiterTestCase(TestCase):
+    """Limitation de débit (authentication.throttling)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('10/min'), (10, 60))
+        self.assertEqual(throttling.parse_rate('100/15min'), (100, 900))
+        self.assertEqual(throttling.parse_rate('5/10s'), (5, 10))
+        with self.assertRaises(ImproperlyConfigured):
+            throttling.parse_rate('10/fortnight')
+
+    def test_fixed_window(self):
+        limiter = throttling.RateLimiter('test', 3, 60, 'fixed')
+        for _ in range(3):
+            self.assertIsNone(limiter.hit('client', now=600))
+        self.assertEqual(limiter.hit('client', now=610), 50)
+        # Les requêtes refusées ne consomment pas de quota
+        self.assertEqual(cache.get(limiter.get_cache_key('client', 10)), 3)
+        self.assertIsNone(limiter.hit('other', now=610))
+        self.assertIsNone(limiter.hit('client', now=660))
+
+    def test_sliding_window(self):
+        limiter = throttling.RateLimiter('test', 4, 60, 'sliding')
+        for _ in range(4):
+            self.assertIsNone(limiter.hit('client', now=650))
+        self.assertIsNotNone(limiter.hit('client', now=655))
+        self.assertEqual(cache.get(limiter.get_cache_key('client', 10)), 4)
+
+        # Début de la fenêtre suivante : la fenêtre précédente pèse encore presque entièrement
+        self.assertIsNotNone(limiter.hit('client', now=661))
+        # Fenêtre précédente à moitié couverte : 4 * 0.5 + 2 <= 4
+        self.assertIsNone(limiter.hit('client', now=690))
+        self.assertIsNone(limiter.hit('client', now=690))
+        self.assertIsNotNone(limiter.hit('client', now=690))
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'login': '100/min', 'login_username': '3/hour',
+        },
+    })
+    def test_login_username_per_ip(self):
+        User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        url = '/api/v1/auth/login/'
+        for _ in range(3):
+            response = self.client.post(url, {'username': 'alice', 'password': 'wrong'}, REMOTE_ADDR='203.0.113.5')
+            self.assertNotEqual(response.status_code, 429)
+        response = self.client.post(url, {'username': 'alice', 'password': 'wrong'}, REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 429)
+
+        # Le titulaire du compte se connecte depuis une autre adresse
+        response = self.client.post(url, {'username': 'alice', 'password': 'password123'}, REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, 200)
+
+
+class APITokenTestCase(TestCase):
+    """Stockage des API tokens sous forme d'empreinte (authentication.api_token)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+
+    def test_hashing(self):
+        token = APIToken.objects.create(user=self.user, name='iPhone')
+        self.assertEqual(token.prefix, token.token[:8])
+        self.assertEqual(token.token_hash, APIToken.hash_token(token.token))
+        self.assertEqual(len(token.token_hash), 64)
+        self.assertTrue(token.check_token(APIToken.hash_token(token.token)))
+        self.assertFalse(token.check_token(APIToken.hash_token(token.token + 'x')))
+
+        # Empreinte liée à SECRET_KEY
+        with override_settings(SECRET_KEY='autre-cle-secrete-pour-les-tests-0123456789'):
+            self.assertNotEqual(APIToken.hash_token(token.token), token.token_hash)
+
+    def test_raw_token_not_stored(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/auth/tokens/create/', {'name': 'iPhone'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        raw = response.json()['token']
+
+        stored = APIToken.objects.filter(pk=response.json()['id']).values().get()
+        self.assertNotIn(raw, [str(value) for value in stored.values()])
+        self.assertNotIn('token', client.get('/api/v1/auth/tokens/').json()[0])
+
+    def test_prefix_lookup(self):
+        token = APIToken.objects.create(user=self.user, name='iPhone')
+        # Autre token du même préfixe : départagé par l'empreinte
+        other = APIToken(user=self.user, name='iPad')
+        other.set_token(token.prefix + APIToken.generate_token())
+        other.save()
+
+        self.assertEqual(token_auth.find_api_token(token.token).pk, token.pk)
+        self.assertEqual(token_auth.find_api_token(other.token).pk, other.pk)
+        with self.assertRaises(APIToken.DoesNotExist):
+            token_auth.find_api_token(token.prefix + 'inconnu')
+
+        token.is_active = False
+        token.save()
+        with self.assertRaises(APIToken.DoesNotExist):
+            token_auth.find_api_token(token.token)
+
+
+class TokenAuthTestCase(TestCase):
+    """Authentification par API token et cache des tokens (authentication.token_auth)"""
+
+    url = '/api/v1/ios/transaction/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.token = APIToken.objects.create(user=self.user, name='iPhone')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.token}')
+
+    def post(self):
+        # Corps vide : 422 une fois authentifié
+        return self.client.post(self.url, {}, format='json')
+
+    def test_cache(self):
+        with self.assertNumQueries(1):
+            api_token = token_auth.get_api_token(self.token.token)
+        with self.assertNumQueries(0):
+            cached = token_auth.get_api_token(self.token.token)
+        self.assertEqual((cached.pk, cached.user_id), (api_token.pk, self.user.pk))
+
+        # Ni l'utilisateur ni le token brut ne sont mis en cache
+        stored = cache.get(token_auth.get_token_cache_key(self.token.token_hash))
+        self.assertEqual(stored, (self.token.pk, self.user.pk, self.token.token_hash, True))
+        self.assertNotIn(self.token.token, stored)
+
+    def test_authenticate(self):
+        self.assertEqual(self.post().status_code, 422)
+        self.assertIsNotNone(APIToken.objects.get(pk=self.token.pk).last_used)
+
+        for header in ('Bearer inconnu', 'Token abc'):
+            self.client.credentials(HTTP_AUTHORIZATION=header)
+            self.assertEqual(self.post().status_code, 401)
+
+    def test_revoked_token(self):
+        self.assertEqual(self.post().status_code, 422)
+        self.token.is_active = False
+        self.token.save()
+        self.assertEqual(self.post().status_code, 401)
+
+    def test_inactive_user(self):
+        self.assertEqual(self.post().status_code, 422)
+        # Token toujours en cache : l'utilisateur désactivé est refusé immédiatement
+        self.user.is_active = False
+        self.user.save()
+        response = self.post()
+        self.assertEqual(response.status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.post().status_code, 401)
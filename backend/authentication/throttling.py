@@ -0,0 +1,216 @@
+"""
+Limitation de débit (rate limiting) basée sur le cache Django partagé.
+
+Les compteurs utilisent ``cache.add()`` puis ``cache.incr()`` : chaque requête
+incrémente atomiquement le compteur de sa fenêtre, même avec plusieurs
+workers (voir CACHE_BACKEND). Deux algorithmes sont disponibles :
+
+- ``fixed`` : compteur par fenêtre fixe (ex: de 12:00:00 à 12:00:59) ;
+- ``sliding`` : fenêtre glissante approchée, le compteur de la fenêtre
+  précédente est pondéré par la part de celle-ci encore couverte. Évite
+  les rafales de 2x la limite à la frontière de deux fenêtres.
+
+Avec les deux algorithmes, une requête refusée ne consomme pas de quota :
+son incrément est annulé. Un client qui insiste pendant le blocage
+n'allonge donc pas son attente.
+
+Les quotas sont définis par scope dans ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``
+(ex: ``'ios_token': '10/min'``). Les classes de throttle DRF ci-dessous
+permettent de protéger une vue avec ``@throttle_classes([...])`` : une requête
+refusée reçoit une réponse 429 avec l'en-tête ``Retry-After``.
+"""
+import hashlib
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Durée (secondes) par unité de période
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+ALGORITHMS = ('fixed', 'sliding')
+
+RATE_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*$')
+
+
+def parse_rate(rate):
+    """
+    Convertit un quota ``'<nombre>/<période>'`` en (nombre, durée en secondes).
+    La période accepte un multiple : ``'100/15min'``, ``'5/10s'``.
+    """
+    match = RATE_PATTERN.match(rate or '')
+    if not match or match.group(3) not in PERIODS:
+        raise ImproperlyConfigured(f'Quota de requêtes invalide : {rate!r}')
+    count, multiple, unit = match.groups()
+    return int(count), int(multiple or 1) * PERIODS[unit]
+
+
+class RateLimiter:
+    """
+    Limiteur de débit pour un scope (ex: 'ios_token') : ``limit`` requêtes
+    par ``window`` secondes et par identifiant (token, utilisateur, IP...).
+    """
+
+    def __init__(self, scope, limit, window, algorithm=None):
+        algorithm = algorithm or getattr(settings, 'RATE_LIMIT_ALGORITHM', 'sliding')
+        if algorithm not in ALGORITHMS:
+            raise ImproperlyConfigured(f'Algorithme de limitation inconnu : {algorithm}')
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+
+    @classmethod
+    def from_rate(cls, scope, rate, algorithm=None):
+        limit, window = parse_rate(rate)
+        return cls(scope, limit, window, algorithm)
+
+    def get_cache_key(self, ident, index):
+        # Identifiant haché : les clés memcached n'acceptent ni espaces ni caractères de contrôle
+        digest = hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+        return f'throttle:{self.scope}:{digest}:{index}'
+
+    def _incr(self, key, timeout):
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Compteur expiré entre add() et incr()
+            cache.add(key, 0, timeout)
+            return cache.incr(key)
+
+    def hit(self, ident, now=None):
+        """
+        Comptabilise une requête pour l'identifiant.
+
+        Retourne None si la requête est autorisée, sinon le nombre de
+        secondes à attendre avant de réessayer.
+        """
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, self.window)
+        index = int(index)
+
+        key = self.get_cache_key(ident, index)
+        if self.algorithm == 'fixed':
+            count = self._incr(key, self.window)
+            if count <= self.limit:
+                return None
+            self._release(key)
+            return max(1, math.ceil(self.window - elapsed))
+
+        # Fenêtre glissante : le compteur courant est conservé pendant deux fenêtres
+        current = self._incr(key, self.window * 2)
+        previous = cache.get(self.get_cache_key(ident, index - 1), 0)
+        weight = (self.window - elapsed) / self.window
+        if previous * weight + current <= self.limit:
+            return None
+        self._release(key)
+        return self._get_wait(previous, current - 1, elapsed)
+
+    def _release(self, key):
+        # Requête refusée : elle ne consomme pas de quota
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def _get_wait(self, previous, current, elapsed):
+        """Secondes avant que la prochaine requête repasse sous la limite."""
+        window, room = self.window, self.limit - 1
+        if current <= room and previous:
+            # Attendre que le poids de la fenêtre précédente diminue suffisamment
+            wait = window * (1 - (room - current) / previous) - elapsed
+        elif current:
+            # Attendre la fenêtre suivante, où le compteur courant devient le précédent
+            wait = (window - elapsed) + window * max(0, 1 - room / current)
+        else:
+            wait = window - elapsed
+        return max(1, math.ceil(wait))
+
+
+class LimiterThrottle(BaseThrottle):
+    """
+    Throttle DRF s'appuyant sur RateLimiter. Les sous-classes définissent
+    ``scope`` et ``get_ident_for(request)`` (None pour ne pas limiter).
+    """
+    scope = None
+    algorithm = None
+
+    def get_rate(self):
+        rates = api_settings.DEFAULT_THROTTLE_RATES or {}
+        if self.scope not in rates:
+            raise ImproperlyConfigured(f'Aucun quota défini pour le scope {self.scope!r}')
+        return rates[self.scope]
+
+    def get_ident_for(self, request):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        ident = self.get_ident_for(request)
+        if rate is None or ident is None:
+            return True
+        self._wait = RateLimiter.from_rate(self.scope, rate, self.algorithm).hit(ident)
+        return self._wait is None
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class APITokenRateThrottle(LimiterThrottle):
+    """Quota par API token (intégrations iOS)."""
+    scope = 'ios_token'
+
+    def get_ident_for(self, request):
+        return getattr(request.auth, 'pk', None)
+
+
+class APITokenUserRateThrottle(LimiterThrottle):
+    """Quota par utilisateur, tous ses API tokens confondus."""
+    scope = 'ios_user'
+
+    def get_ident_for(self, request):
+        return request.user.pk if request.user.is_authenticated else None
+
+
+class LoginRateThrottle(LimiterThrottle):
+    """Tentatives de connexion par adresse IP."""
+    scope = 'login'
+
+    def get_ident_for(self, request):
+        return self.get_ident(request)
+
+
+class LoginUsernameRateThrottle(LimiterThrottle):
+    """
+    Tentatives de connexion par identifiant visé et adresse IP. La clé
+    comprend l'IP : des échecs envoyés depuis une autre adresse ne bloquent
+    pas la connexion du titulaire du compte.
+    """
+    scope = 'login_username'
+
+    def get_ident_for(self, request):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username or not isinstance(username, str):
+            return None
+        return f'{username.strip().casefold()}:{self.get_ident(request)}'
+
+
+class WebAuthnRateThrottle(LimiterThrottle):
+    """Requêtes WebAuthn par utilisateur connecté, sinon par adresse IP."""
+    scope = 'webauthn'
+
+    def get_ident_for(self, request):
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
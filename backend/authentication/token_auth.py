@@ -1,10 +1,88 @@
 """
 Custom DRF authentication backend for API tokens (iOS Shortcuts, etc.).
+
+Les tokens sont stockés sous forme d'empreinte (voir
+authentication.api_token). Les tokens vérifiés sont gardés dans le cache
+partagé pendant API_TOKEN_CACHE_TIMEOUT secondes : une requête iOS ne
+recherche plus le token en base. Seuls les identifiants et l'état du token
+sont mis en cache ; l'utilisateur est relu à chaque requête (une requête sur
+la clé primaire), un utilisateur désactivé est donc refusé immédiatement.
+Toute écriture sur un token (révocation, désactivation) le retire du cache.
+La date de dernière utilisation est écrite au plus une fois par minute et
+par token, sans passer par save() (pas de signal, le cache reste valide).
 """
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .api_token import APIToken
 
+TOKEN_CACHE_KEY = 'api_token:{digest}'
+LAST_USED_KEY = 'api_token_used:{pk}'
+
+# Intervalle minimal (secondes) entre deux écritures de last_used d'un token
+LAST_USED_INTERVAL = 60
+
+# Champs du token gardés en cache (dans l'ordre des champs du modèle)
+CACHED_FIELDS = ('id', 'user_id', 'token_hash', 'is_active')
+
+
+def get_token_cache_key(token_hash):
+    # Clé dérivée de l'empreinte stockée (le token brut n'apparaît pas dans le cache)
+    return TOKEN_CACHE_KEY.format(digest=token_hash)
+
+
+def find_api_token(token_value):
+    """
+    Token actif correspondant à la valeur : tokens actifs du même préfixe
+    (une requête indexée), puis comparaison des empreintes en temps constant
+    """
+    token_hash = APIToken.hash_token(token_value)
+    candidates = APIToken.objects.filter(
+        prefix=APIToken.get_prefix(token_value), is_active=True
+    )
+    for candidate in candidates:
+        if candidate.check_token(token_hash):
+            return candidate
+    raise APIToken.DoesNotExist
+
+
+def get_api_token(token_value):
+    """
+    Token actif correspondant à la valeur (cache, sinon une requête), sans son
+    utilisateur. Seuls les champs CACHED_FIELDS sont chargés, les autres le
+    sont à la demande.
+    """
+    key = get_token_cache_key(APIToken.hash_token(token_value))
+    values = cache.get(key)
+    if values is None:
+        api_token = find_api_token(token_value)
+        values = tuple(getattr(api_token, field) for field in CACHED_FIELDS)
+        cache.set(key, values, settings.API_TOKEN_CACHE_TIMEOUT)
+    return APIToken.from_db(None, CACHED_FIELDS, values)
+
+
+def get_token_user(api_token):
+    """Utilisateur actif du token, relu en base (None s'il est désactivé ou supprimé)."""
+    return get_user_model()._default_manager.filter(pk=api_token.user_id, is_active=True).first()
+
+
+def touch_api_token(api_token):
+    """Met à jour last_used si la dernière écriture date de plus d'une minute."""
+    if cache.add(LAST_USED_KEY.format(pk=api_token.pk), True, LAST_USED_INTERVAL):
+        api_token.last_used = timezone.now()
+        APIToken.objects.filter(pk=api_token.pk).update(last_used=api_token.last_used)
+
+
+@receiver(post_save, sender=APIToken)
+@receiver(post_delete, sender=APIToken)
+def invalidate_api_token(sender, instance, **kwargs):
+    cache.delete(get_token_cache_key(instance.token_hash))
+
 
 class APITokenAuthentication(BaseAuthentication):
     """
@@ -25,8 +103,16 @@ class APITokenAuthentication(BaseAuthentication):
             return None
 
         try:
-            api_token = APIToken.objects.get(token=token_value, is_active=True)
-            api_token.update_last_used()
-            return (api_token.user, api_token)
+            api_token = get_api_token(token_value)
         except APIToken.DoesNotExist:
             raise AuthenticationFailed('Token invalide ou désactivé.')
+        user = get_token_user(api_token)
+        if user is None:
+            raise AuthenticationFailed('Utilisateur inactif ou supprimé.')
+        api_token.user = user
+        touch_api_token(api_token)
+        return (user, api_token)
+
+    def authenticate_header(self, request):
+        # Échec d'authentification répondu en 401 (et non 403) avec WWW-Authenticate
+        return 'Bearer'
@@ -1,11 +1,13 @@
 from rest_framework import status, generics, viewsets
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
+from core.idempotency import IdempotentMixin
 from .serializers import RegisterSerializer, UserSerializer, LoginSerializer, UserProfileSerializer
 from .models import UserProfile
+from .throttling import LoginRateThrottle, LoginUsernameRateThrottle
 
 User = get_user_model()
 
@@ -58,6 +60,7 @@ class RegisterView(generics.CreateAPIView):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle, LoginUsernameRateThrottle])
 def login_view(request):
     """
     API endpoint for user login with username/email and password.
@@ -176,7 +179,7 @@ def logout_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(IdempotentMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing user profile (income, available budget)
     """
@@ -213,6 +216,8 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         """
         Créer ou mettre à jour une transaction récurrente pour le salaire mensuel.
         Propose de créer automatiquement si le salaire est défini dans le profil.
+        Les salaires des mois suivants sont générés jusqu'à l'horizon de
+        récurrence et suivent les modifications du montant (transactions.recurrence).
         """
         from transactions.models import Transaction
         from categories.models import Category
@@ -263,6 +268,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                 'message': 'Transaction de salaire mise à jour',
                 'transaction_id': existing_transaction.id,
                 'amount': float(salary_amount),
+                'occurrences': existing_transaction.occurrences.filter(date__gte=date.today()).count(),
                 'created': False
             })
         else:
@@ -311,6 +317,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                 'message': 'Transaction de salaire récurrente créée',
                 'transaction_id': transaction.id,
                 'amount': float(salary_amount),
+                'occurrences': transaction.occurrences.count(),
                 'created': True
             }, status=201)
 
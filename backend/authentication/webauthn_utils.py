@@ -45,8 +45,10 @@ def get_and_delete_challenge(identifier: str) -> Optional[bytes]:
     if challenge_b64 is None:
         return None
 
-    # Delete immediately to prevent reuse
-    cache.delete(cache_key)
+    # Delete immediately to prevent reuse. Only the worker whose delete
+    # actually removed the key may use the challenge.
+    if not cache.delete(cache_key):
+        return None
 
     # Convert back to bytes
     try:
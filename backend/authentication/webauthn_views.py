@@ -3,7 +3,7 @@ WebAuthn/Passkey authentication views.
 Implements registration, authentication, and credential management endpoints.
 """
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -28,6 +28,7 @@ from webauthn.helpers.structs import (
 from webauthn.helpers.cose import COSEAlgorithmIdentifier
 
 from .models import WebAuthnCredential
+from .throttling import WebAuthnRateThrottle
 from .serializers import UserSerializer
 from .webauthn_serializers import (
     WebAuthnRegisterBeginSerializer,
@@ -50,6 +51,7 @@ User = get_user_model()
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([WebAuthnRateThrottle])
 def webauthn_register_begin(request):
     """
     Begin WebAuthn registration flow.
@@ -109,6 +111,7 @@ def webauthn_register_begin(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([WebAuthnRateThrottle])
 def webauthn_register_complete(request):
     """
     Complete WebAuthn registration flow.
@@ -181,6 +184,7 @@ def webauthn_register_complete(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([WebAuthnRateThrottle])
 def webauthn_login_begin(request):
     """
     Begin WebAuthn authentication flow.
@@ -223,6 +227,7 @@ def webauthn_login_begin(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([WebAuthnRateThrottle])
 def webauthn_login_complete(request):
     """
     Complete WebAuthn authentication flow.
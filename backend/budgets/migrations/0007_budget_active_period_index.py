@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0006_budget_is_mandatory_savings'),
+        ('categories', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'is_active', 'period'], name='budget_user_active_period_idx'),
+        ),
+    ]
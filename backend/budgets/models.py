@@ -3,6 +3,8 @@ from django.conf import settings
 from decimal import Decimal
 import logging
 
+from .tracing import trace
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,29 +62,30 @@ class Budget(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Progression précalculée ({'spent': ..., 'projected': ...}), voir budgets.progress
+    _progress = None
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Budgets actifs d'un type de période (tableau de bord, résumé)
+            models.Index(fields=['user', 'is_active', 'period'], name='budget_user_active_period_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.amount} ({self.get_period_display()})"
 
-    def get_spent_amount(self):
+    @staticmethod
+    def get_period_window(period, today):
         """
-        Calcule le montant dépensé pour ce budget sur la période en cours
-        (exclut les transactions avec une date future)
-        Pour les objectifs d'épargne, calcule les transferts vers comptes épargne
+        Retourne les bornes (début, fin) de la période en cours pour un type de période
         """
-        from transactions.models import Transaction
-        from accounts.models import Account
         from datetime import date, timedelta
 
-        today = date.today()
-
-        # Calculer la période en cours
-        if self.period == 'weekly':
+        if period == 'weekly':
             start = today - timedelta(days=today.weekday())
             end = start + timedelta(days=6)
-        elif self.period == 'monthly':
+        elif period == 'monthly':
             start = date(today.year, today.month, 1)
             if today.month == 12:
                 end = date(today.year + 1, 1, 1) - timedelta(days=1)
@@ -91,132 +94,97 @@ class Budget(models.Model):
         else:  # yearly
             start = date(today.year, 1, 1)
             end = date(today.year, 12, 31)
+        return start, end
+
+    def get_period_bounds(self, today):
+        """
+        Retourne les bornes de la période en cours, restreintes aux dates du budget
+        """
+        start, end = self.get_period_window(self.period, today)
 
         # Filtrer par les dates du budget si définies
         if self.start_date and start < self.start_date:
             start = self.start_date
         if self.end_date and end > self.end_date:
             end = self.end_date
+        return start, end
 
-        # Calculer le total des dépenses (excluant les transactions futures)
-        # Ne compter que les transactions avec une date <= aujourd'hui
-        end = min(end, today)
-
-        # Si c'est un objectif d'épargne, calculer les transferts vers comptes épargne
-        if self.is_savings_goal:
-            logger.debug(f"📊 Calcul objectif d'épargne: {self.name}")
-            logger.debug(f"   Période: {start} à {end}")
-
-            # Récupérer tous les comptes épargne de l'utilisateur
-            savings_accounts = Account.objects.filter(
-                user=self.user,
-                account_type='savings',
-                is_active=True
-            )
-
-            logger.debug(f"   Comptes épargne trouvés: {savings_accounts.count()}")
-            for acc in savings_accounts:
-                logger.debug(f"     - {acc.name} (ID: {acc.id}, type: {acc.account_type})")
-
-            # Calculer le total des transferts vers ces comptes
-            transfers = Transaction.objects.filter(
-                user=self.user,
-                type='transfer',
-                destination_account__in=savings_accounts,
-                date__gte=start,
-                date__lte=end
-            )
+    def get_spent_amount(self):
+        """
+        Calcule le montant dépensé pour ce budget sur la période en cours
+        (exclut les transactions avec une date future)
+        Pour les objectifs d'épargne, calcule les transferts vers comptes épargne
+        Utilise la progression précalculée par budgets.progress si disponible
+        """
+        if self._progress is not None:
+            return self._progress['spent']
 
-            logger.debug(f"   Transferts trouvés: {transfers.count()}")
-            for trans in transfers:
-                logger.debug(f"     - Date: {trans.date}, Montant: {trans.amount}, Vers: {trans.destination_account.name if trans.destination_account else 'N/A'}")
-
-            total = transfers.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-            logger.debug(f"   💰 Total épargné: {total} CHF")
-        else:
-            # Budget normal: calculer les dépenses de la catégorie
-            # Exclure les transactions de type 'adjustment' qui ne doivent pas compter dans les budgets
-            logger.debug(f"📊 Calcul budget normal: {self.name}")
-            logger.debug(f"   Catégorie: {self.category.name if self.category else 'N/A'}")
-            logger.debug(f"   Période: {start} à {end}")
-
-            expenses = Transaction.objects.filter(
-                user=self.user,
-                category=self.category,
-                type='expense',
-                date__gte=start,
-                date__lte=end
-            ).exclude(type='adjustment')
+        from datetime import date
 
-            logger.debug(f"   Dépenses trouvées: {expenses.count()}")
-            total = expenses.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-            logger.debug(f"   💸 Total dépensé: {total} CHF")
+        today = date.today()
+        start, end = self.get_period_bounds(today)
 
-        return total
+        # Ne compter que les transactions avec une date <= aujourd'hui
+        with trace(self, 'spent'):
+            return self._sum_transactions(start, min(end, today))
 
     def get_projected_amount(self):
         """
         Calcule le montant projeté (dépensé + transactions futures) pour ce budget sur la période en cours
         Inclut toutes les transactions jusqu'à la fin de la période, y compris les futures
+        et les occurrences générées des transactions récurrentes (transactions.recurrence)
+        Utilise la progression précalculée par budgets.progress si disponible
         """
-        from transactions.models import Transaction
-        from accounts.models import Account
-        from datetime import date, timedelta
+        if self._progress is not None:
+            return self._progress['projected']
+
+        from datetime import date
 
         today = date.today()
+        start, end = self.get_period_bounds(today)
 
-        # Calculer la période en cours
-        if self.period == 'weekly':
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif self.period == 'monthly':
-            start = date(today.year, today.month, 1)
-            if today.month == 12:
-                end = date(today.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end = date(today.year, today.month + 1, 1) - timedelta(days=1)
-        else:  # yearly
-            start = date(today.year, 1, 1)
-            end = date(today.year, 12, 31)
+        with trace(self, 'projected'):
+            return self._sum_transactions(start, end)
 
-        # Filtrer par les dates du budget si définies
-        if self.start_date and start < self.start_date:
-            start = self.start_date
-        if self.end_date and end > self.end_date:
-            end = self.end_date
+    def get_transactions(self, start, end):
+        """
+        Transactions comptées par le budget entre deux dates : transferts vers
+        les comptes épargne actifs pour un objectif d'épargne, dépenses de la
+        catégorie sinon (les ajustements ne comptent jamais)
+        """
+        from transactions.models import Transaction
 
-        # Calculer le total incluant les transactions futures (jusqu'à la fin de la période)
         if self.is_savings_goal:
-            # Récupérer tous les comptes épargne de l'utilisateur
-            savings_accounts = Account.objects.filter(
-                user=self.user,
-                account_type='savings',
-                is_active=True
-            )
-
-            # Calculer le total des transferts vers ces comptes (incluant futures)
-            transfers = Transaction.objects.filter(
-                user=self.user,
+            return Transaction.objects.filter(
+                user_id=self.user_id,
                 type='transfer',
-                destination_account__in=savings_accounts,
+                destination_account__account_type='savings',
+                destination_account__is_active=True,
                 date__gte=start,
                 date__lte=end
             )
-
-            total = transfers.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-        else:
-            # Budget normal: calculer les dépenses de la catégorie (incluant futures)
-            # Exclure les transactions de type 'adjustment' qui ne doivent pas compter dans les budgets
-            expenses = Transaction.objects.filter(
-                user=self.user,
-                category=self.category,
-                type='expense',
-                date__gte=start,
-                date__lte=end
-            ).exclude(type='adjustment')
-
-            total = expenses.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
-
+        return Transaction.objects.filter(
+            user_id=self.user_id,
+            category_id=self.category_id,
+            type='expense',
+            date__gte=start,
+            date__lte=end
+        )
+
+    def _sum_transactions(self, start, end):
+        """
+        Total des transactions du budget entre deux dates, en une seule agrégation
+        """
+        transactions = self.get_transactions(start, end)
+        total = transactions.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Budget %s (%s, %s): %s du %s au %s",
+                self.pk, self.name,
+                "objectif d'épargne" if self.is_savings_goal else f"catégorie {self.category_id}",
+                total, start, end
+            )
         return total
 
     def get_remaining_amount(self):
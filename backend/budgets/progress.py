@@ -0,0 +1,86 @@
+"""
+Calcul groupé de la progression des budgets.
+
+Au lieu d'une agrégation par budget et par appel (dépensé, restant,
+pourcentage, dépassement...), ``attach_progress`` exécute une seule requête
+groupée par utilisateur et type de période, puis attache à chaque budget ses
+montants dépensé et projeté. Les méthodes du modèle Budget lisent ensuite
+ces valeurs sans nouvelle requête.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+
+from .tracing import trace
+
+ZERO = Decimal('0.00')
+
+# Clé utilisée pour regrouper les transferts vers les comptes épargne
+SAVINGS_KEY = 'savings'
+
+
+def progress_queryset(user_id, budgets, start, end):
+    """
+    Totaux journaliers par (type, catégorie) des transactions comptées par
+    les budgets d'un utilisateur entre deux dates
+    """
+    from transactions.models import Transaction
+
+    category_ids = {b.category_id for b in budgets if not b.is_savings_goal}
+    filters = Q(type='expense', category_id__in=category_ids - {None})
+    if None in category_ids:
+        filters |= Q(type='expense', category__isnull=True)
+    if any(b.is_savings_goal for b in budgets):
+        filters |= Q(
+            type='transfer',
+            destination_account__account_type='savings',
+            destination_account__is_active=True,
+        )
+
+    return Transaction.objects.filter(
+        filters, user_id=user_id, date__gte=start, date__lte=end
+    ).values('type', 'category_id', 'date').annotate(total=Sum('amount')).order_by()
+
+
+def attach_progress(budgets, today=None):
+    """
+    Calcule et attache la progression (montants dépensé et projeté) de chaque
+    budget de la liste. Les budgets déjà calculés sont ignorés.
+
+    Retourne la liste des budgets.
+    """
+    today = today or date.today()
+    budgets = list(budgets)
+
+    groups = defaultdict(list)
+    for budget in budgets:
+        if budget._progress is None:
+            groups[(budget.user_id, budget.period)].append(budget)
+
+    for (user_id, period), group in groups.items():
+        bounds = {budget.pk: budget.get_period_bounds(today) for budget in group}
+        lower = min(start for start, end in bounds.values())
+        upper = max(end for start, end in bounds.values())
+
+        with trace(group, f'progress:{period}'):
+            # Totaux journaliers par (type, catégorie) sur l'ensemble de la période
+            daily_totals = defaultdict(list)
+            rows = progress_queryset(user_id, group, lower, upper)
+            for row in rows:
+                key = SAVINGS_KEY if row['type'] == 'transfer' else row['category_id']
+                daily_totals[key].append((row['date'], row['total']))
+
+            for budget in group:
+                start, end = bounds[budget.pk]
+                key = SAVINGS_KEY if budget.is_savings_goal else budget.category_id
+                spent = projected = ZERO
+                for day, total in daily_totals.get(key, ()):
+                    if start <= day <= end:
+                        projected += total
+                        if day <= today:
+                            spent += total
+                budget._progress = {'spent': spent, 'projected': projected}
+
+    return budgets
@@ -3,9 +3,21 @@ from datetime import date
 
 from rest_framework import serializers
 from .models import Budget, SavingsGoal
+from .progress import attach_progress
 from categories.serializers import CategoryListSerializer
 
 
+class BudgetProgressListSerializer(serializers.ListSerializer):
+    """
+    Calcule la progression de tous les budgets de la liste en une seule passe
+    avant la sérialisation (voir budgets.progress)
+    """
+
+    def to_representation(self, data):
+        budgets = attach_progress(data.all() if hasattr(data, 'all') else data)
+        return super().to_representation(budgets)
+
+
 class BudgetSerializer(serializers.ModelSerializer):
     """
     Serializer complet pour Budget avec toutes les informations calculées
@@ -27,6 +39,12 @@ class BudgetSerializer(serializers.ModelSerializer):
             'is_over_budget', 'is_alert_triggered', 'created_at', 'updated_at'
         ]
         read_only_fields = ['user', 'created_at', 'updated_at']
+        list_serializer_class = BudgetProgressListSerializer
+
+    def to_representation(self, instance):
+        if instance._progress is None:
+            attach_progress([instance])
+        return super().to_representation(instance)
 
     def get_spent_amount(self, obj):
         return float(obj.get_spent_amount())
@@ -116,6 +134,7 @@ class BudgetListSerializer(serializers.ModelSerializer):
             'projected_amount', 'projected_remaining_amount', 'projected_percentage_used',
             'is_projected_over_budget', 'created_at'
         ]
+        list_serializer_class = BudgetProgressListSerializer
 
     def get_spent_amount(self, obj):
         return float(obj.get_spent_amount())
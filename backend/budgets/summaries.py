@@ -0,0 +1,120 @@
+"""
+Résumés des budgets (synthèse des budgets actifs, budget vs réel du mois).
+
+Les fonctions reçoivent des budgets dont la progression est déjà calculée
+(voir ``budgets.progress.attach_progress``) et les dépenses réelles déjà
+agrégées : elles ne font aucune requête, ce qui permet au tableau de bord
+(core.dashboard) de les alimenter à partir de requêtes partagées.
+"""
+from decimal import Decimal
+
+ZERO = Decimal('0.00')
+
+
+def budget_summary(budgets):
+    """
+    Résumé des budgets actifs : montants, dépensé, restant, dépassements et alertes
+    """
+    total_budgets = len(budgets)
+    total_amount = sum(float(b.amount) for b in budgets)
+    total_spent = sum(float(b.get_spent_amount()) for b in budgets)
+    over_budget_count = sum(1 for b in budgets if b.is_over_budget())
+    alert_count = sum(1 for b in budgets if b.is_alert_triggered() and not b.is_over_budget())
+
+    return {
+        'total_budgets': total_budgets,
+        'total_amount': total_amount,
+        'total_spent': total_spent,
+        'total_remaining': total_amount - total_spent,
+        'over_budget_count': over_budget_count,
+        'alert_count': alert_count,
+        'percentage_used': round((total_spent / total_amount * 100) if total_amount > 0 else 0, 2)
+    }
+
+
+def budget_vs_actual(budgets, monthly_income, category_spending, actual_income):
+    """
+    Budget vs réel du mois : pour chaque budget, prévu, réel et écart, puis
+    les catégories avec dépenses mais sans budget.
+
+    ``category_spending`` : dépenses du mois par catégorie (category__id,
+    category__name, category__color, category__icon, spent), les catégories
+    budgétées étant écartées ici.
+    """
+    categories_data = []
+    budgeted_category_ids = set()
+    total_budget = ZERO
+    total_actual = ZERO
+
+    for budget in budgets:
+        spent = budget.get_spent_amount()
+        total_budget += budget.amount
+        total_actual += spent
+
+        # Gérer épargne obligatoire (sans catégorie)
+        if budget.is_mandatory_savings:
+            categories_data.append({
+                'category_id': None,
+                'category_name': budget.name,
+                'category_color': 'green',
+                'category_icon': 'i-heroicons-banknotes',
+                'prevu': float(budget.amount),
+                'reel': float(spent),
+                'ecart': float(budget.amount - spent),
+                'is_over': spent > budget.amount,
+                'unbudgeted': False,
+                'is_mandatory_savings': True,
+            })
+        elif budget.category:
+            # Budget normal avec catégorie
+            budgeted_category_ids.add(budget.category_id)
+            categories_data.append({
+                'category_id': budget.category_id,
+                'category_name': budget.category.name,
+                'category_color': budget.category.color,
+                'category_icon': budget.category.icon,
+                'prevu': float(budget.amount),
+                'reel': float(spent),
+                'ecart': float(budget.amount - spent),
+                'is_over': spent > budget.amount,
+                'unbudgeted': False,
+                'is_mandatory_savings': False,
+            })
+
+    # Catégories avec dépenses mais sans budget
+    for item in category_spending:
+        if item['category__id'] is None or item['category__id'] in budgeted_category_ids:
+            continue
+        amt = item['spent'] or ZERO
+        total_actual += amt
+        categories_data.append({
+            'category_id': item['category__id'],
+            'category_name': item['category__name'] or 'Sans catégorie',
+            'category_color': item['category__color'] or 'gray',
+            'category_icon': item['category__icon'] or 'i-heroicons-tag',
+            'prevu': 0,
+            'reel': float(amt),
+            'ecart': float(-amt),
+            'is_over': True,
+            'unbudgeted': True,
+        })
+
+    actual_income = actual_income or ZERO
+    return {
+        'categories': categories_data,
+        'solde_previsionnel': float(monthly_income - total_budget),
+        'solde_reel': float(actual_income - total_actual),
+        'ecart': float((actual_income - total_actual) - (monthly_income - total_budget)),
+        'revenu_mensuel': float(monthly_income),
+        'revenu_reel': float(actual_income),
+        'total_budget': float(total_budget),
+        'total_actual': float(total_actual),
+    }
+
+
+def is_dashboard_budget(budget):
+    """Budgets du budget vs réel : mensuels actifs, normaux ou épargne obligatoire."""
+    return (
+        budget.is_active and budget.period == 'monthly'
+        and (not budget.is_savings_goal or budget.is_mandatory_savings)
+    )
@@ -0,0 +1,87 @@
+"""
+Traçage optionnel du calcul des budgets.
+
+Un hook de traçage reçoit, pour chaque calcul de budget, un rapport
+contenant le nombre de requêtes SQL exécutées et la durée du calcul :
+
+    {'budget_ids': [3], 'operation': 'spent', 'queries': 1, 'duration_ms': 0.8}
+
+Les hooks sont déclarés dans le paramètre ``BUDGET_TRACE_HOOKS`` (chemins
+pointés vers des callables) ou enregistrés avec ``register_hook()``. Sans
+hook, ``trace()`` ne fait rien : aucune requête ni mesure supplémentaire.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_registered_hooks = []
+
+
+def register_hook(hook):
+    """Enregistre un hook de traçage (callable recevant un rapport)."""
+    if hook not in _registered_hooks:
+        _registered_hooks.append(hook)
+
+
+def unregister_hook(hook):
+    """Retire un hook de traçage enregistré avec register_hook()."""
+    if hook in _registered_hooks:
+        _registered_hooks.remove(hook)
+
+
+def get_hooks():
+    """Retourne les hooks configurés dans les paramètres puis ceux enregistrés."""
+    configured = [import_string(path) for path in getattr(settings, 'BUDGET_TRACE_HOOKS', [])]
+    return configured + _registered_hooks
+
+
+def log_hook(report):
+    """Hook prêt à l'emploi qui écrit les rapports dans les logs (niveau DEBUG)."""
+    logger.debug(
+        "Budgets %s - %s: %d requête(s) en %.2f ms",
+        report['budget_ids'], report['operation'], report['queries'], report['duration_ms']
+    )
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trace(budgets, operation):
+    """
+    Mesure le nombre de requêtes et la durée du bloc pour un budget ou une
+    liste de budgets, puis transmet le rapport aux hooks configurés.
+    """
+    hooks = get_hooks()
+    if not hooks:
+        yield
+        return
+
+    if not isinstance(budgets, (list, tuple)):
+        budgets = [budgets]
+
+    counter = _QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        yield
+
+    report = {
+        'budget_ids': [budget.pk for budget in budgets],
+        'operation': operation,
+        'queries': counter.count,
+        'duration_ms': (time.perf_counter() - started) * 1000,
+    }
+    for hook in hooks:
+        hook(report)
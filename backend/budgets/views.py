@@ -7,11 +7,17 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.cache import cached_response
+from core.conditional import ConditionalGetMixin
+from core.idempotency import IdempotentMixin
+
 from .models import Budget, SavingsGoal
+from .progress import attach_progress
+from .summaries import budget_summary, budget_vs_actual
 from .serializers import BudgetSerializer, BudgetListSerializer, SavingsGoalSerializer, SavingsGoalListSerializer
 
 
-class BudgetViewSet(viewsets.ModelViewSet):
+class BudgetViewSet(IdempotentMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les budgets
     """
@@ -45,36 +51,23 @@ class BudgetViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def summary(self, request):
         """
         Retourne un résumé des budgets actifs
         """
-        budgets = self.get_queryset().filter(is_active=True)
-
-        total_budgets = budgets.count()
-        total_amount = sum(float(b.amount) for b in budgets)
-        total_spent = sum(float(b.get_spent_amount()) for b in budgets)
-        over_budget_count = sum(1 for b in budgets if b.is_over_budget())
-        alert_count = sum(1 for b in budgets if b.is_alert_triggered() and not b.is_over_budget())
-
-        return Response({
-            'total_budgets': total_budgets,
-            'total_amount': total_amount,
-            'total_spent': total_spent,
-            'total_remaining': total_amount - total_spent,
-            'over_budget_count': over_budget_count,
-            'alert_count': alert_count,
-            'percentage_used': round((total_spent / total_amount * 100) if total_amount > 0 else 0, 2)
-        })
+        budgets = attach_progress(self.get_queryset().filter(is_active=True))
+        return Response(budget_summary(budgets))
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def dashboard_data(self, request):
         """
         Données budget vs réel pour le dashboard.
         Pour chaque budget actif mensuel : prévu, réel, écart.
         Inclut les catégories avec dépenses mais sans budget.
         """
-        from transactions.models import Transaction
+        from transactions.models import TransactionDailyRollup
         from authentication.models import UserProfile
 
         user = request.user
@@ -94,6 +87,7 @@ class BudgetViewSet(viewsets.ModelViewSet):
         ).filter(
             Q(is_savings_goal=False) | Q(is_mandatory_savings=True)
         ).select_related('category')
+        budgets = attach_progress(budgets, today)
 
         # Revenu mensuel du profil
         try:
@@ -102,94 +96,19 @@ class BudgetViewSet(viewsets.ModelViewSet):
         except UserProfile.DoesNotExist:
             monthly_income = Decimal('0.00')
 
-        # Données par catégorie
-        categories_data = []
-        budgeted_category_ids = set()
-        total_budget = Decimal('0.00')
-        total_actual = Decimal('0.00')
-
-        for budget in budgets:
-            spent = budget.get_spent_amount()
-            total_budget += budget.amount
-            total_actual += spent
-
-            # Gérer épargne obligatoire (sans catégorie)
-            if budget.is_mandatory_savings:
-                categories_data.append({
-                    'category_id': None,
-                    'category_name': budget.name,
-                    'category_color': 'green',
-                    'category_icon': 'i-heroicons-banknotes',
-                    'prevu': float(budget.amount),
-                    'reel': float(spent),
-                    'ecart': float(budget.amount - spent),
-                    'is_over': spent > budget.amount,
-                    'unbudgeted': False,
-                    'is_mandatory_savings': True,
-                })
-            elif budget.category:
-                # Budget normal avec catégorie
-                budgeted_category_ids.add(budget.category_id)
-                categories_data.append({
-                    'category_id': budget.category_id,
-                    'category_name': budget.category.name,
-                    'category_color': budget.category.color,
-                    'category_icon': budget.category.icon,
-                    'prevu': float(budget.amount),
-                    'reel': float(spent),
-                    'ecart': float(budget.amount - spent),
-                    'is_over': spent > budget.amount,
-                    'unbudgeted': False,
-                    'is_mandatory_savings': False,
-                })
-
-        # Catégories avec dépenses mais sans budget
-        unbudgeted = (
-            Transaction.objects.filter(
-                user=user, type='expense',
-                date__gte=start, date__lte=min(end, today)
-            )
-            .exclude(category_id__in=budgeted_category_ids)
-            .exclude(category__isnull=True)
-            .values('category__id', 'category__name', 'category__color', 'category__icon')
-            .annotate(total=Sum('amount'))
+        # Dépenses par catégorie et revenus réels du mois (lus dans les agrégats journaliers)
+        rollups = TransactionDailyRollup.objects.filter(
+            user=user, date__gte=start, date__lte=min(end, today)
         )
-
-        for item in unbudgeted:
-            amt = item['total'] or Decimal('0.00')
-            total_actual += amt
-            categories_data.append({
-                'category_id': item['category__id'],
-                'category_name': item['category__name'] or 'Sans catégorie',
-                'category_color': item['category__color'] or 'gray',
-                'category_icon': item['category__icon'] or 'i-heroicons-tag',
-                'prevu': 0,
-                'reel': float(amt),
-                'ecart': float(-amt),
-                'is_over': True,
-                'unbudgeted': True,
-            })
-
-        # Revenus réels du mois
-        actual_income = (
-            Transaction.objects.filter(
-                user=user, type='income',
-                date__gte=start, date__lte=min(end, today)
-            )
-            .aggregate(total=Sum('amount'))['total']
-            or Decimal('0.00')
+        category_spending = (
+            rollups.filter(type='expense')
+            .values('category__id', 'category__name', 'category__color', 'category__icon')
+            .annotate(spent=Sum('total'))
+            .order_by()
         )
+        actual_income = rollups.filter(type='income').aggregate(income=Sum('total'))['income']
 
-        return Response({
-            'categories': categories_data,
-            'solde_previsionnel': float(monthly_income - total_budget),
-            'solde_reel': float(actual_income - total_actual),
-            'ecart': float((actual_income - total_actual) - (monthly_income - total_budget)),
-            'revenu_mensuel': float(monthly_income),
-            'revenu_reel': float(actual_income),
-            'total_budget': float(total_budget),
-            'total_actual': float(total_actual),
-        })
+        return Response(budget_vs_actual(budgets, monthly_income, category_spending, actual_income))
 
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
@@ -203,7 +122,7 @@ class BudgetViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SavingsGoalViewSet(viewsets.ModelViewSet):
+class SavingsGoalViewSet(IdempotentMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les objectifs d'épargne
     """
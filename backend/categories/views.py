@@ -1,10 +1,12 @@
 from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from core.conditional import ConditionalGetMixin
+from core.idempotency import IdempotentMixin
 from .models import Category
 from .serializers import CategorySerializer, CategoryListSerializer
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(IdempotentMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les catégories
     """
@@ -13,6 +13,7 @@ import os
 import dj_database_url
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,7 +55,8 @@ INSTALLED_APPS = [
     'transactions',
     'budgets',
     'categories',
-    'authentication'
+    'authentication',
+    'core'
 ]
 
 MIDDLEWARE = [
@@ -116,6 +118,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 # REST Framework
@@ -128,8 +131,20 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
+    # Quotas des throttles de authentication.throttling ('<nombre>/<période>', ex: 100/15min)
+    'DEFAULT_THROTTLE_RATES': {
+        'ios_token': os.getenv('RATE_LIMIT_IOS_TOKEN', '10/min'),
+        'ios_user': os.getenv('RATE_LIMIT_IOS_USER', '30/min'),
+        # Connexion : par IP, et par couple (identifiant, IP)
+        'login': os.getenv('RATE_LIMIT_LOGIN', '10/min'),
+        'login_username': os.getenv('RATE_LIMIT_LOGIN_USERNAME', '20/hour'),
+        'webauthn': os.getenv('RATE_LIMIT_WEBAUTHN', '30/min'),
+    },
 }
 
+# Algorithme de limitation de débit : 'sliding' (fenêtre glissante) ou 'fixed'
+RATE_LIMIT_ALGORITHM = os.getenv('RATE_LIMIT_ALGORITHM', 'sliding')
+
 # JWT Settings
 from datetime import timedelta
 
@@ -146,16 +161,65 @@ WEBAUTHN_RP_NAME = os.getenv('WEBAUTHN_RP_NAME', 'Budget Tracker')
 WEBAUTHN_ORIGIN = os.getenv('WEBAUTHN_ORIGIN', 'http://localhost:3000')
 WEBAUTHN_CHALLENGE_TIMEOUT = 60  # seconds
 
-# Cache configuration for WebAuthn challenge storage
+# Cache partagé (challenges WebAuthn, limitation de débit, réponses de reporting)
+# Avec plusieurs workers gunicorn, le cache doit être partagé entre les processus :
+# - file      : fichiers dans CACHE_LOCATION (répertoire partagé), sans service externe (défaut)
+# - locmem    : mémoire du processus, uniquement pour un serveur à un seul processus
+#               (refusé avec DEBUG=False)
+# - db        : table SQL CACHE_LOCATION (créer avec `python manage.py createcachetable`)
+# - redis     : CACHE_LOCATION=redis://host:6379/0 (nécessite le paquet redis)
+# - memcached : CACHE_LOCATION=host:11211 (nécessite le paquet pymemcache)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file').lower()
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'budget-cache'),
+    'file': ('core.cache_backends.FileBasedCache', str(BASE_DIR / 'cache')),
+    'db': ('core.cache_backends.DatabaseCache', 'django_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND invalide : {CACHE_BACKEND} (valeurs possibles : {', '.join(CACHE_BACKENDS)})"
+    )
+
+if CACHE_BACKEND == 'locmem' and not DEBUG:
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND=locmem n'est pas partagé entre les workers : utiliser file, redis, memcached ou db"
+    )
+
+_cache_class, _cache_location = CACHE_BACKENDS[CACHE_BACKEND]
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'webauthn-cache',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000
-        }
+        'BACKEND': _cache_class,
+        'LOCATION': os.getenv('CACHE_LOCATION') or _cache_location,
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'budget'),
+        'TIMEOUT': 300,
     }
 }
+if CACHE_BACKEND in ('locmem', 'file', 'db'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    }
+
+# Hooks de traçage du calcul des budgets (chemins pointés séparés par des virgules)
+# Ex: BUDGET_TRACE_HOOKS=budgets.tracing.log_hook
+BUDGET_TRACE_HOOKS = [h.strip() for h in os.getenv('BUDGET_TRACE_HOOKS', '').split(',') if h.strip()]
+
+# Durée de vie (secondes) des réponses des endpoints de reporting en cache (0 pour désactiver)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 3600))
+
+# Durée de vie (secondes) des API tokens vérifiés gardés en cache (voir authentication.token_auth)
+API_TOKEN_CACHE_TIMEOUT = int(os.getenv('API_TOKEN_CACHE_TIMEOUT', 60))
+
+# Durée (heures) de conservation des réponses des requêtes avec Idempotency-Key (voir core.idempotency)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# Horizon (jours) jusqu'auquel les occurrences des transactions récurrentes
+# sont générées (voir transactions.recurrence)
+RECURRENCE_HORIZON_DAYS = int(os.getenv('RECURRENCE_HORIZON_DAYS', 366))
 
 ROOT_URLCONF = 'config.urls'
 
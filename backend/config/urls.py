@@ -24,6 +24,7 @@ from authentication.ios_views import (
     alert_dismiss,
 )
 from budgets.views import SavingsGoalViewSet
+from core.views import dashboard
 
 savings_router = SimpleRouter()
 savings_router.register(r'savings-goals', SavingsGoalViewSet, basename='savings-goal')
@@ -39,6 +40,9 @@ urlpatterns = [
     path('api/v1/budgets/', include('budgets.urls')),
     path('api/v1/', include(savings_router.urls)),
 
+    # Tableau de bord (page d'accueil)
+    path('api/v1/dashboard/', dashboard, name='dashboard'),
+
     # iOS integration
     path('api/v1/ios/transaction/', ios_create_transaction, name='ios-transaction'),
 
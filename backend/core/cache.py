@@ -0,0 +1,94 @@
+"""
+Cache des réponses des endpoints de reporting, par utilisateur.
+
+Chaque utilisateur possède une version de données (horodatage en
+nanosecondes) stockée dans le cache Django. Elle change à chaque écriture
+sur ses transactions, comptes, budgets, objectifs d'épargne, catégories,
+alertes ou son profil (voir ``core.signals``). La clé d'une réponse en cache
+contient cette version : après une écriture, les anciennes entrées ne sont
+plus jamais lues et expirent d'elles-mêmes. La même clé sert d'ETag aux
+requêtes conditionnelles (voir ``core.conditional``).
+"""
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'data_version:{user_id}'
+
+
+def get_data_version(user_id):
+    """Retourne la version de données de l'utilisateur (créée si absente)."""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(*user_ids):
+    """
+    Change la version de données des utilisateurs, une fois la transaction
+    de base de données validée (sinon une lecture concurrente pourrait mettre
+    en cache l'état précédent sous la nouvelle version).
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many({VERSION_KEY.format(user_id=user_id): version for user_id in user_ids}, None)
+
+    db_transaction.on_commit(bump)
+
+
+def response_cache_key(user_id, endpoint, params, today=None):
+    """
+    Clé de cache d'une réponse : endpoint, paramètres de requête triés,
+    version de données de l'utilisateur et date du jour (les calculs
+    dépendent de la date courante).
+    """
+    today = today or date.today()
+    query = '&'.join(
+        f'{name}={value}'
+        for name in sorted(params)
+        for value in sorted(params.getlist(name))
+    )
+    digest = hashlib.sha256(query.encode()).hexdigest()[:32]
+    version = get_data_version(user_id)
+    return f'response:{user_id}:{version}:{today.isoformat()}:{endpoint}:{digest}'
+
+
+def cached_response(view_method):
+    """
+    Décorateur d'action DRF : met en cache les données des réponses 200 par
+    utilisateur, endpoint et paramètres de requête.
+    """
+    endpoint = view_method.__qualname__
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+        if not timeout or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        key = response_cache_key(request.user.pk, endpoint, request.query_params)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout)
+        return response
+
+    return wrapper
+
@@ -0,0 +1,112 @@
+"""
+Backends de cache partagés sans service externe (table SQL, fichiers).
+
+Les backends ``db`` et ``file`` de Django implémentent ``incr()`` par une
+lecture suivie d'une écriture : deux workers peuvent lire la même valeur et
+perdre un incrément (la limite de requêtes devient alors approximative).
+Ces sous-classes rendent ``incr()`` atomique (verrou de ligne ou de fichier)
+et, pour les fichiers, ``add()`` atomique (création exclusive).
+"""
+import base64
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from django.core.cache.backends import db, filebased
+from django.core.files import locks
+from django.db import connections, models, router, transaction
+from django.utils.timezone import now as tz_now
+
+
+class DatabaseCache(db.DatabaseCache):
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        database = router.db_for_write(self.cache_model_class)
+        connection = connections[database]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        cache_key = quote_name('cache_key')
+
+        with transaction.atomic(using=database), connection.cursor() as cursor:
+            # Verrouille la ligne avant de la lire (verrou d'écriture sous SQLite)
+            cursor.execute(
+                'UPDATE %s SET %s = %s WHERE %s = %%s' % (
+                    table, quote_name('expires'), quote_name('expires'), cache_key
+                ),
+                [key],
+            )
+            cursor.execute(
+                'SELECT %s, %s FROM %s WHERE %s = %%s' % (
+                    quote_name('value'), quote_name('expires'), table, cache_key
+                ),
+                [key],
+            )
+            row = cursor.fetchone()
+            if row is None or self._is_expired(connection, row[1]):
+                raise ValueError(f"Key '{key}' not found.")
+
+            value = connection.ops.process_clob(row[0])
+            new_value = pickle.loads(base64.b64decode(value.encode())) + delta
+            pickled = pickle.dumps(new_value, self.pickle_protocol)
+            cursor.execute(
+                'UPDATE %s SET %s = %%s WHERE %s = %%s' % (table, quote_name('value'), cache_key),
+                [base64.b64encode(pickled).decode('latin1'), key],
+            )
+        return new_value
+
+    def _is_expired(self, connection, expires):
+        expression = models.Expression(output_field=models.DateTimeField())
+        converters = connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
+        for converter in converters:
+            expires = converter(expires, expression, connection)
+        return expires < tz_now()
+
+
+class FileBasedCache(filebased.FileBasedCache):
+
+    def add(self, key, value, timeout=filebased.DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            for attempt in range(2):
+                try:
+                    # Création exclusive : échoue si un autre worker a créé la clé
+                    os.link(tmp_path, fname)
+                    return True
+                except FileExistsError:
+                    if attempt or self.has_key(key, version):
+                        return False
+                    # Entrée expirée : supprimée puis recréée une seule fois
+                    self._delete(fname)
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            f = open(fname, 'r+b')
+        except FileNotFoundError:
+            raise ValueError(f"Key '{key}' not found.")
+
+        with f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                expiry = pickle.load(f)
+                if expiry is not None and expiry < time.time():
+                    raise ValueError(f"Key '{key}' not found.")
+                new_value = pickle.loads(zlib.decompress(f.read())) + delta
+                f.seek(0)
+                f.write(pickle.dumps(expiry, self.pickle_protocol))
+                f.write(zlib.compress(pickle.dumps(new_value, self.pickle_protocol)))
+                f.truncate()
+            finally:
+                locks.unlock(f)
+        return new_value
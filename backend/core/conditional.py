@@ -0,0 +1,110 @@
+"""
+Requêtes conditionnelles (ETag, Last-Modified) sur les lectures de l'API.
+
+Les validateurs sont dérivés de la version de données de l'utilisateur (voir
+``core.cache``) sans lire les données : l'ETag est l'empreinte de la clé de
+cache de la réponse (endpoint, paramètres, version, date du jour, format), et
+Last-Modified la date de la version (au plus tôt minuit, les calculs
+dépendant de la date courante). Une ressource inchangée est répondue par un
+304 avant toute requête sur les données et toute sérialisation.
+
+L'ETag est le seul validateur exact. Last-Modified n'a qu'une précision à la
+seconde : il est arrondi à la seconde supérieure, et une date
+If-Modified-Since égale à Last-Modified est traitée comme modifiée (une
+écriture a pu suivre dans la même seconde).
+"""
+import hashlib
+from datetime import date, datetime, time as datetime_time
+
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import permissions, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .cache import get_data_version, response_cache_key
+
+# Les navigateurs revalident à chaque lecture (réponses propres à l'utilisateur)
+CACHE_CONTROL = 'private, no-cache'
+
+
+def get_etag(key):
+    """ETag d'une réponse à partir de sa clé de cache."""
+    return '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def etag_matches(request, etag):
+    """True si l'en-tête If-None-Match de la requête contient l'ETag."""
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in tags or '*' in tags
+
+
+def get_last_modified(user_id):
+    """
+    Date de dernière modification des données de l'utilisateur (timestamp en
+    secondes, arrondi à la seconde supérieure), au plus tôt minuit du jour courant
+    """
+    midnight = datetime.combine(date.today(), datetime_time.min)
+    return max(-(-get_data_version(user_id) // 1_000_000_000), int(midnight.timestamp()))
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+    True si la copie du client est à jour : If-None-Match prime sur
+    If-Modified-Since (RFC 9110). If-Modified-Since doit être strictement
+    postérieur à Last-Modified (précision à la seconde)
+    """
+    if 'HTTP_IF_NONE_MATCH' in request.META:
+        return etag_matches(request, etag)
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and last_modified < since
+
+
+def get_validator_headers(etag, last_modified):
+    return {'ETag': etag, 'Last-Modified': http_date(last_modified), 'Cache-Control': CACHE_CONTROL}
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Non modifié.'
+
+    def __init__(self, headers):
+        super().__init__()
+        self.headers = headers
+
+
+class ConditionalGetMixin:
+    """
+    Mixin de ViewSet : ajoute ETag et Last-Modified aux lectures (GET, HEAD)
+    et répond 304 Not Modified, sans exécuter l'action, si la copie du client
+    est à jour.
+    """
+
+    def get_conditional_endpoint(self):
+        """Identifie la ressource : vue, action, arguments d'URL et format de réponse."""
+        kwargs = ','.join(f'{name}={value}' for name, value in sorted(self.kwargs.items()))
+        return f'{type(self).__name__}.{self.action}({kwargs}):{self.request.accepted_media_type}'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validator_headers = None
+        if request.method not in permissions.SAFE_METHODS or not request.user.is_authenticated:
+            return
+
+        key = response_cache_key(request.user.pk, self.get_conditional_endpoint(), request.query_params)
+        etag, last_modified = get_etag(key), get_last_modified(request.user.pk)
+        self.validator_headers = get_validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            raise NotModified(self.validator_headers)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code, headers=exc.headers)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'validator_headers', None) and response.status_code == status.HTTP_200_OK:
+            for header, value in self.validator_headers.items():
+                response[header] = value
+        return response
@@ -0,0 +1,175 @@
+"""
+Données de la page d'accueil en une seule réponse.
+
+Chaque section reprend le format de l'endpoint correspondant (statistiques et
+répartition par catégorie du mois, résumé mensuel de l'année, résumé et
+budget vs réel des budgets, comptes, catégories, dernières transactions,
+alertes). Les sections partagent leurs requêtes :
+
+- une seule requête groupée sur les agrégats journaliers de l'année, par mois,
+  type et catégorie (transactions.reports.month_rollups), pour les
+  statistiques, la répartition par catégorie, le résumé mensuel et le réel du
+  budget vs réel ;
+- les budgets actifs et leur progression (budgets.progress.attach_progress)
+  pour le résumé et le budget vs réel ;
+- une requête par liste (comptes avec soldes annotés, catégories,
+  transactions, alertes) et une pour le profil.
+
+Seules les données des sections demandées sont chargées.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cached_property
+
+SECTIONS = (
+    'statistics',
+    'by_category',
+    'monthly_summary',
+    'budgets_summary',
+    'budget_dashboard',
+    'accounts',
+    'categories',
+    'recent_transactions',
+    'alerts',
+)
+
+# Nombre de transactions récentes
+RECENT_TRANSACTIONS = 5
+
+
+class Dashboard:
+    """
+    Sections du tableau de bord d'un utilisateur, calculées à la demande à
+    partir de données chargées une seule fois.
+    """
+
+    def __init__(self, user, today=None):
+        self.user = user
+        self.today = today or date.today()
+        self.month = self.today.replace(day=1)
+
+    @cached_property
+    def month_rows(self):
+        """Totaux de l'année par mois, type et catégorie (une requête)."""
+        from transactions import reports
+
+        rows = []
+        for row in reports.month_rollups(self.user, self.today.year, self.today):
+            if isinstance(row['month'], datetime):
+                row['month'] = row['month'].date()
+            rows.append(row)
+        return rows
+
+    @cached_property
+    def current_month_rows(self):
+        return [row for row in self.month_rows if row['month'] == self.month]
+
+    @cached_property
+    def budgets(self):
+        """Budgets actifs avec leur progression."""
+        from budgets.models import Budget
+        from budgets.progress import attach_progress
+
+        budgets = Budget.objects.filter(user=self.user, is_active=True).select_related('category')
+        return attach_progress(budgets, self.today)
+
+    def get_totals(self, rows, key, fields=('amount', 'transactions', 'future')):
+        """Somme des champs des lignes par clé, dans l'ordre de première apparition."""
+        totals = {}
+        for row in rows:
+            group = key(row)
+            if group not in totals:
+                totals[group] = {**row, **{field: None for field in fields}}
+            for field in fields:
+                if row[field] is not None:
+                    totals[group][field] = (totals[group][field] or 0) + row[field]
+        return list(totals.values())
+
+    def get_statistics(self):
+        from transactions import reports
+
+        return reports.format_statistics(self.get_totals(self.current_month_rows, lambda row: row['type']))
+
+    def get_by_category(self):
+        from transactions import reports
+
+        rows = [row for row in self.current_month_rows if row['type'] == 'expense']
+        totals = [
+            total for total in self.get_totals(rows, lambda row: row['category__id'])
+            if total['amount'] is not None
+        ]
+        totals.sort(key=lambda total: total['amount'], reverse=True)
+        return reports.format_by_category(totals)
+
+    def get_monthly_summary(self):
+        from transactions import reports
+
+        totals = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00')])
+        for row in self.month_rows:
+            if row['type'] in ('income', 'expense') and row['amount'] is not None:
+                totals[row['month']][row['type'] == 'expense'] += row['amount']
+        start = date(self.today.year, 1, 1)
+        periods = reports.format_period_summary(
+            {month: tuple(values) for month, values in totals.items()}, 'month', start, self.today
+        )
+        return reports.format_monthly_summary(periods)
+
+    def get_budgets_summary(self):
+        from budgets.summaries import budget_summary
+
+        return budget_summary(self.budgets)
+
+    def get_budget_dashboard(self):
+        from authentication.models import UserProfile
+        from budgets.summaries import budget_vs_actual, is_dashboard_budget
+
+        profile = UserProfile.objects.filter(user=self.user).first()
+        monthly_income = profile.monthly_income if profile else Decimal('0.00')
+
+        expenses = [row for row in self.current_month_rows if row['type'] == 'expense']
+        category_spending = [
+            {**total, 'spent': total['amount']}
+            for total in self.get_totals(expenses, lambda row: row['category__id'], fields=('amount',))
+            if total['amount'] is not None
+        ]
+        actual_income = sum(
+            (row['amount'] for row in self.current_month_rows if row['type'] == 'income' and row['amount']),
+            Decimal('0.00')
+        )
+        budgets = [budget for budget in self.budgets if is_dashboard_budget(budget)]
+        return budget_vs_actual(budgets, monthly_income, category_spending, actual_income)
+
+    def get_accounts(self):
+        from accounts.models import Account
+        from accounts.serializers import AccountListSerializer
+
+        accounts = Account.objects.filter(user=self.user, is_active=True).with_balances(self.today)
+        return AccountListSerializer(accounts.order_by('-created_at'), many=True).data
+
+    def get_categories(self):
+        from categories.models import Category
+        from categories.serializers import CategoryListSerializer
+
+        categories = Category.objects.filter(user=self.user, is_active=True).order_by('type', 'name')
+        return CategoryListSerializer(categories, many=True).data
+
+    def get_recent_transactions(self):
+        from transactions.models import Transaction
+        from transactions.serializers import TransactionListSerializer
+
+        transactions = Transaction.objects.filter(user=self.user).select_related(
+            'account', 'category'
+        ).order_by('-date', '-created_at')[:RECENT_TRANSACTIONS]
+        return TransactionListSerializer(transactions, many=True).data
+
+    def get_alerts(self):
+        from authentication.api_token import PendingAlert
+        from authentication.ios_views import serialize_alerts
+
+        return serialize_alerts(PendingAlert.objects.filter(user=self.user, seen=False))
+
+    def compute(self, sections=SECTIONS):
+        """Sections demandées, dans l'ordre de SECTIONS."""
+        return {section: getattr(self, f'get_{section}')() for section in SECTIONS if section in sections}
+
@@ -0,0 +1,181 @@
+"""
+Idempotence des requêtes d'écriture (en-tête Idempotency-Key).
+
+Un client qui renvoie une requête après un délai d'attente (raccourci iOS,
+frontend) y joint la même clé : la première exécution enregistre sa réponse
+(IdempotencyRecord, par utilisateur et clé) et les envois suivants reçoivent
+cette réponse, avec l'en-tête ``Idempotent-Replayed: true``, sans
+réexécution. Les réponses sont conservées IDEMPOTENCY_KEY_TTL_HOURS heures
+(commande purge_idempotency_records).
+
+- Même clé, requête différente (méthode, chemin ou corps) : 422.
+- Même clé pendant que la première requête est en cours : 409.
+- Erreur serveur (5xx ou exception) : la clé est libérée, le client peut
+  réessayer.
+
+Les requêtes sans en-tête Idempotency-Key ne sont pas concernées.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+# Longueur maximale d'une clé
+MAX_KEY_LENGTH = 100
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyConflict(APIException):
+    """Requête refusée ou rejouée : ``response`` est retournée telle quelle."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def get_expiry():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def get_fingerprint(request):
+    """
+    Empreinte de la requête : méthode, chemin complet et corps (taille seule
+    pour les envois de fichiers, qui ne sont pas lus en mémoire)
+    """
+    digest = hashlib.sha256(f'{request.method} {request.get_full_path()}\n'.encode())
+    if request.content_type.startswith('multipart/'):
+        digest.update(request.META.get('CONTENT_LENGTH', '').encode())
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def error_response(message, status_code):
+    return Response({'error': message}, status=status_code)
+
+
+def begin(request):
+    """
+    Réserve la clé de la requête. Retourne l'enregistrement créé (à compléter
+    avec ``complete``), ou None si la requête n'est pas concernée.
+    Lève IdempotencyConflict avec la réponse à retourner sinon.
+    """
+    key = request.META.get('HTTP_IDEMPOTENCY_KEY', '').strip()
+    if not key or request.method in permissions.SAFE_METHODS or not request.user.is_authenticated:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyConflict(error_response(
+            f"Clé d'idempotence trop longue ({MAX_KEY_LENGTH} caractères maximum).",
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        ))
+
+    fingerprint = get_fingerprint(request._request)
+    for _ in range(2):
+        try:
+            with db_transaction.atomic():
+                return IdempotencyRecord.objects.create(user=request.user, key=key, fingerprint=fingerprint)
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+        if record is None or record.created_at < get_expiry():
+            # Clé libérée ou expirée entre-temps : nouvelle tentative
+            IdempotencyRecord.objects.filter(user=request.user, key=key, created_at__lt=get_expiry()).delete()
+            continue
+        if record.fingerprint != fingerprint:
+            raise IdempotencyConflict(error_response(
+                "Clé d'idempotence déjà utilisée pour une autre requête.",
+                status.HTTP_422_UNPROCESSABLE_ENTITY
+            ))
+        if record.status_code is None:
+            raise IdempotencyConflict(error_response(
+                'Une requête avec cette clé est en cours de traitement.',
+                status.HTTP_409_CONFLICT
+            ))
+        raise IdempotencyConflict(Response(
+            record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'}
+        ))
+    raise IdempotencyConflict(error_response(
+        'Une requête avec cette clé est en cours de traitement.', status.HTTP_409_CONFLICT
+    ))
+
+
+def complete(record, response):
+    """Enregistre la réponse (libère la clé en cas d'erreur serveur)."""
+    if record is None:
+        return
+    if response.status_code >= 500 or not hasattr(response, 'data'):
+        abort(record)
+        return
+    IdempotencyRecord.objects.filter(pk=record.pk).update(status_code=response.status_code, response=response.data)
+
+
+def abort(record):
+    if record is not None:
+        IdempotencyRecord.objects.filter(pk=record.pk).delete()
+
+
+class IdempotentMixin:
+    """
+    Mixin de ViewSet : rend les écritures (POST, PUT, PATCH, DELETE)
+    idempotentes lorsque la requête porte un en-tête Idempotency-Key.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.idempotency_record = None
+        super().initial(request, *args, **kwargs)
+        self.idempotency_record = begin(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotencyConflict):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            abort(getattr(self, 'idempotency_record', None))
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        complete(getattr(self, 'idempotency_record', None), response)
+        self.idempotency_record = None
+        return response
+
+
+def idempotent(unless=None):
+    """
+    Décorateur de vue fonction DRF (à placer sous @api_view et les autres
+    décorateurs) : même comportement que IdempotentMixin. Les exceptions de la
+    vue passent par le gestionnaire d'exceptions de DRF (handle_exception de
+    la vue) : une erreur client (APIException) est enregistrée et rejouée
+    comme une réponse 4xx retournée, seules les erreurs serveur libèrent la
+    clé. ``unless(request)`` permet d'exclure certaines requêtes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if unless is not None and unless(request):
+                return view(request, *args, **kwargs)
+            try:
+                record = begin(request)
+            except IdempotencyConflict as conflict:
+                return conflict.response
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception as exc:
+                try:
+                    response = request.parser_context['view'].handle_exception(exc)
+                except Exception:
+                    abort(record)
+                    raise
+            complete(record, response)
+            return response
+        return wrapper
+    return decorator
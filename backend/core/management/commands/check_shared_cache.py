@@ -0,0 +1,111 @@
+"""
+Commande Django pour vérifier que le cache est partagé entre les workers.
+
+Lance plusieurs processus (comme les workers gunicorn) qui utilisent le cache
+configuré (CACHE_BACKEND) et vérifie que :
+- un challenge WebAuthn stocké par un processus est consommé une seule fois
+  par les autres ;
+- la limite de requêtes d'un token est commune à tous les processus ;
+- la version de données d'un utilisateur est la même pour tous les processus.
+
+Usage:
+    python manage.py check_shared_cache
+    python manage.py check_shared_cache --workers 4
+"""
+import multiprocessing
+import os
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+RATE_LIMIT = 10
+
+
+def _init_worker():
+    """Initialise Django dans un processus worker (démarré avec spawn)."""
+    import django
+    django.setup()
+
+
+def _consume_challenge(identifier):
+    from authentication.webauthn_utils import get_and_delete_challenge
+    return get_and_delete_challenge(identifier) is not None
+
+
+def _hit_rate_limit(token_id):
+    from rest_framework.exceptions import Throttled
+    from authentication.rate_limit import check_rate_limit
+    try:
+        check_rate_limit(token_id, max_requests=RATE_LIMIT)
+    except Throttled:
+        return False
+    return True
+
+
+def _read_data_version(user_id):
+    from core.cache import get_data_version
+    return get_data_version(user_id)
+
+
+class Command(BaseCommand):
+    help = 'Vérifie, avec plusieurs processus, que le cache configuré est partagé entre les workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Nombre de processus workers simulés (défaut : 2)'
+        )
+
+    def handle(self, *args, **options):
+        from authentication.webauthn_utils import store_challenge
+        from core.cache import bump_data_version, get_data_version
+
+        workers = options['workers']
+        if workers < 2:
+            raise CommandError('Il faut au moins 2 workers pour vérifier le partage du cache')
+
+        backend = settings.CACHES['default']['BACKEND']
+        self.stdout.write(f'Cache : {backend} ({settings.CACHES["default"].get("LOCATION")})')
+        self.stdout.write(f'Workers simulés : {workers}')
+
+        run_id = uuid.uuid4().hex
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        context = multiprocessing.get_context('spawn')
+        failures = []
+
+        with context.Pool(workers, initializer=_init_worker) as pool:
+            # Challenge WebAuthn stocké ici, consommé par les workers
+            identifier = f'check_{run_id}'
+            store_challenge(identifier, os.urandom(32))
+            consumed = sum(pool.map(_consume_challenge, [identifier] * workers, chunksize=1))
+            failures += self._report('Challenge WebAuthn consommé une seule fois', consumed, 1)
+
+            # Limite de requêtes commune à tous les workers
+            token_id = f'check_{run_id}'
+            allowed = sum(pool.map(_hit_rate_limit, [token_id] * (RATE_LIMIT * workers), chunksize=1))
+            failures += self._report('Requêtes autorisées par la limite', allowed, RATE_LIMIT)
+
+            # Version de données vue par tous les workers
+            user_id = f'check_{run_id}'
+            bump_data_version(user_id)
+            expected = get_data_version(user_id)
+            versions = pool.map(_read_data_version, [user_id] * workers, chunksize=1)
+            same = sum(version == expected for version in versions)
+            failures += self._report('Workers voyant la même version de données', same, workers)
+
+        if failures:
+            raise CommandError(
+                'Le cache n\'est pas partagé entre les processus. '
+                'Configurer CACHE_BACKEND=db, file, redis ou memcached.'
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Cache partagé entre les workers'))
+
+    def _report(self, label, value, expected):
+        if value == expected:
+            self.stdout.write(f'  ✓ {label} : {value}')
+            return []
+        self.stdout.write(self.style.ERROR(f'  ✗ {label} : {value} (attendu : {expected})'))
+        return [label]
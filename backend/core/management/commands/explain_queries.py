@@ -0,0 +1,161 @@
+"""
+Commande Django d'audit des plans d'exécution des requêtes fréquentes.
+
+Exécute EXPLAIN sur les requêtes des endpoints les plus sollicités (liste
+des transactions, progression des budgets, soldes des comptes, reporting,
+authentification par token) et signale les parcours séquentiels de table.
+
+Usage:
+    python manage.py explain_queries
+    python manage.py explain_queries --user <username> --verbose
+    python manage.py explain_queries --no-seqscan      # PostgreSQL : force l'usage des index si possible
+    python manage.py explain_queries --strict          # code de sortie non nul si parcours séquentiel
+"""
+import re
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+User = get_user_model()
+
+# Parcours séquentiel d'une table : "Seq Scan on <table>" (PostgreSQL),
+# "SCAN <table>" sans index (SQLite)
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on "?(\w+)"?'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?"?(\w+)"?(?! USING (?:COVERING )?INDEX)(?!\w)'),
+}
+
+
+def get_hot_queries(user_id, today):
+    """
+    Requêtes fréquentes de l'application, construites avec les mêmes
+    fonctions que les vues. Retourne une liste de (nom, queryset).
+    """
+    from accounts.models import Account
+    from authentication.api_token import APIToken, PendingAlert
+    from budgets.models import Budget
+    from budgets.progress import progress_queryset
+    from categories.models import Category
+    from transactions import reports, rollups
+    from transactions.models import Transaction, TransactionDailyRollup
+    from transactions.pagination import TransactionCursorPagination
+
+    month_start = today.replace(day=1)
+    year_start = today.replace(month=1, day=1)
+    expense_budget = Budget(user_id=user_id, category_id=1, is_savings_goal=False)
+    savings_budget = Budget(user_id=user_id, is_savings_goal=True)
+    pagination = TransactionCursorPagination
+
+    return [
+        ('transactions: liste (première page)',
+         Transaction.objects.filter(user_id=user_id)
+         .select_related('account', 'category', 'destination_account')
+         .order_by(*pagination.ordering)[:51]),
+        ('transactions: liste par curseur (page suivante)',
+         Transaction.objects.filter(user_id=user_id)
+         .filter(pagination.get_position_filter((today, timezone.now(), 0), False))
+         .order_by(*pagination.ordering)[:51]),
+        ('budgets: progression groupée (dépenses + épargne)',
+         progress_queryset(user_id, [expense_budget, savings_budget], year_start, today)),
+        ('budgets: dépensé d\'un budget de catégorie',
+         expense_budget.get_transactions(month_start, today).values('user_id').annotate(total=Sum('amount'))),
+        ('budgets: dépensé d\'un objectif d\'épargne',
+         savings_budget.get_transactions(month_start, today).values('user_id').annotate(total=Sum('amount'))),
+        ('budgets: budgets mensuels actifs',
+         Budget.objects.filter(user_id=user_id, is_active=True, period='monthly')),
+        ('comptes: soldes actuels annotés',
+         Account.objects.filter(user_id=user_id).with_balances()),
+        ('comptes: transferts futurs reçus',
+         Transaction.objects.filter(
+             destination_account_id__in=Account.objects.filter(user_id=user_id).values('pk'),
+             type='transfer', date__gt=today,
+         ).values('destination_account_id').annotate(total=Sum('amount'))),
+        ('reporting: statistiques',
+         reports.get_rollups(user_id, month_start, today).values('type').annotate(total_amount=Sum('total'))),
+        ('reporting: dépenses sans budget (tableau de bord)',
+         TransactionDailyRollup.objects.filter(user_id=user_id, type='expense', date__gte=month_start, date__lte=today)
+         .values('category_id').annotate(spent=Sum('total')).order_by()),
+        ('agrégats: reconstruction d\'une journée',
+         Transaction.objects.filter(Q(user_id=user_id, date__in=[today]))
+         .values(*rollups.KEY_FIELDS).annotate(sum_amount=Sum('amount')).order_by()),
+        ('iOS: authentification par token',
+         APIToken.objects.filter(prefix='x' * 8, is_active=True)),
+        ('iOS: alertes non vues',
+         PendingAlert.objects.filter(user_id=user_id, seen=False)),
+        ('iOS: catégorie par nom',
+         Category.objects.filter(user_id=user_id, name__iexact='x', type='expense', is_active=True)),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Exécute EXPLAIN sur les requêtes fréquentes et signale les parcours séquentiels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Utilisateur dont les données servent aux requêtes (défaut : le premier)'
+        )
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help='PostgreSQL : désactive les parcours séquentiels pour vérifier qu\'un index est utilisable'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Échoue si une requête parcourt une table séquentiellement'
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Affiche le plan complet de chaque requête'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f'Base de données non prise en charge : {vendor}')
+
+        if options['user']:
+            try:
+                user_id = User.objects.get(username=options['user']).pk
+            except User.DoesNotExist:
+                raise CommandError(f'L\'utilisateur {options["user"]} n\'existe pas')
+        else:
+            user_id = User.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+
+        self.stdout.write(f'Base : {vendor} - utilisateur {user_id}')
+        pattern = SEQ_SCAN_PATTERNS[vendor]
+        flagged = []
+
+        with db_transaction.atomic():
+            if options['no_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in get_hot_queries(user_id, date.today()):
+                plan = queryset.explain()
+                tables = sorted(set(pattern.findall(plan)))
+                if tables:
+                    flagged.append(name)
+                    self.stdout.write(self.style.WARNING(
+                        f'  ✗ {name} : parcours séquentiel de {", ".join(tables)}'
+                    ))
+                else:
+                    self.stdout.write(f'  ✓ {name}')
+                if options['verbose']:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'      {line}')
+
+        if flagged:
+            message = f'{len(flagged)} requête(s) avec parcours séquentiel'
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Aucune requête ne parcourt une table séquentiellement'))
@@ -0,0 +1,20 @@
+"""
+Commande Django pour supprimer les réponses des requêtes idempotentes
+expirées (plus de IDEMPOTENCY_KEY_TTL_HOURS heures, voir core.idempotency).
+À planifier une fois par jour.
+
+Usage:
+    python manage.py purge_idempotency_records
+"""
+from django.core.management.base import BaseCommand
+
+from core.idempotency import get_expiry
+from core.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = 'Supprime les réponses des requêtes idempotentes expirées'
+
+    def handle(self, *args, **options):
+        count, _ = IdempotencyRecord.objects.filter(created_at__lt=get_expiry()).delete()
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} enregistrement(s) supprimé(s)'))
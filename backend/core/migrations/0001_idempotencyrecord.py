@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:02
+
+import django.db.models.deletion
+import rest_framework.utils.encoders
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, verbose_name='Clé')),
+                ('fingerprint', models.CharField(help_text='SHA-256 de la méthode, du chemin et du corps', max_length=64, verbose_name='Empreinte de la requête')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, help_text='Vide tant que la requête est en cours', null=True, verbose_name='Code de réponse')),
+                ('response', models.JSONField(blank=True, encoder=rest_framework.utils.encoders.JSONEncoder, null=True, verbose_name='Réponse')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_records', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': "Enregistrement d'idempotence",
+                'verbose_name_plural': "Enregistrements d'idempotence",
+                'db_table': 'idempotency_record',
+                'indexes': [models.Index(fields=['created_at'], name='idempotency_created_b0cdcd_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencyrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='idempotency_record_unique_key'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Réponse d'une requête d'écriture portant un en-tête Idempotency-Key,
+    rejouée si la même requête est renvoyée (voir core.idempotency).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_records',
+        verbose_name='Utilisateur'
+    )
+    key = models.CharField(
+        max_length=100,
+        verbose_name='Clé'
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        verbose_name='Empreinte de la requête',
+        help_text='SHA-256 de la méthode, du chemin et du corps'
+    )
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Code de réponse',
+        help_text='Vide tant que la requête est en cours'
+    )
+    response = models.JSONField(
+        null=True,
+        blank=True,
+        # Encodeur du rendu JSON de DRF : la réponse rejouée est identique
+        encoder=JSONEncoder,
+        verbose_name='Réponse'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de création'
+    )
+
+    class Meta:
+        db_table = 'idempotency_record'
+        verbose_name = "Enregistrement d'idempotence"
+        verbose_name_plural = "Enregistrements d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_record_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
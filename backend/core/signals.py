@@ -0,0 +1,33 @@
+"""
+Invalidation du cache des réponses : toute écriture sur les données d'un
+utilisateur change sa version de données (voir ``core.cache``).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Account
+from authentication.api_token import PendingAlert
+from authentication.models import UserProfile
+from budgets.models import Budget, SavingsGoal
+from categories.models import Category
+from transactions.models import Transaction
+
+from .cache import bump_data_version
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=SavingsGoal)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=PendingAlert)
+@receiver(post_delete, sender=PendingAlert)
+def invalidate_user_data(sender, instance, **kwargs):
+    bump_data_version(instance.user_id)
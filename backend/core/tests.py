@@ -0,0 +1,206 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from budgets.models import Budget
+from categories.models import Category
+from core import conditional
+from core.cache import VERSION_KEY, bump_data_version, get_data_version
+from core.dashboard import SECTIONS
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class APITestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.account = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = date.today()
+
+    def create(self, **kwargs):
+        values = {
+            'user': self.user, 'account': self.account, 'type': 'expense',
+            'amount': Decimal('10.00'), 'date': self.today,
+        }
+        values.update(kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Transaction.objects.create(**values)
+
+
+class DataVersionTestCase(APITestCase):
+    """Version de données par utilisateur (core.cache)"""
+
+    def test_bump_after_commit(self):
+        version = get_data_version(self.user.pk)
+        self.assertEqual(get_data_version(self.user.pk), version)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_data_version(self.user.pk)
+        # Pas de changement avant la validation de la transaction
+        self.assertEqual(get_data_version(self.user.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+    def test_bump_per_user(self):
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        version = get_data_version(other.pk)
+        self.create()
+        self.assertEqual(get_data_version(other.pk), version)
+
+    def test_bulk_writes_bump_version(self):
+        transaction = self.create()
+
+        version = get_data_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.filter(pk=transaction.pk).update(description='Courses')
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+        version = get_data_version(self.user.pk)
+        transaction.notes = 'Note'
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.bulk_update([transaction], ['notes'])
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+
+class CachedResponseTestCase(APITestCase):
+    """Réponses des endpoints de reporting en cache (core.cache.cached_response)"""
+
+    url = '/api/v1/transactions/statistics/'
+
+    def test_cached_until_write(self):
+        self.create(amount=Decimal('10.00'))
+        self.assertEqual(self.client.get(self.url).json()['expense']['total'], 10.0)
+
+        # Réponse en cache : aucune requête sur les transactions
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json()['expense']['total'], 10.0)
+
+        self.create(amount=Decimal('5.00'))
+        self.assertEqual(self.client.get(self.url).json()['expense']['total'], 15.0)
+
+    def test_params_and_users(self):
+        self.create(amount=Decimal('10.00'))
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'start_date': self.today.replace(day=1).isoformat()})
+        self.assertEqual(response.json()['expense']['total'], 10.0)
+
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).json()['expense']['total'], 0)
+
+
+class DashboardTestCase(APITestCase):
+    """Tableau de bord en une requête (core.dashboard)"""
+
+    url = '/api/v1/dashboard/'
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(user=self.user, name='Alimentation', type='expense')
+        Budget.objects.create(user=self.user, category=self.category, name='Courses', amount=Decimal('200.00'),
+                              start_date=self.today.replace(day=1))
+        self.create(type='income', amount=Decimal('1000.00'), date=self.today.replace(day=1))
+        for amount in ('12.50', '30.00', '7.25'):
+            self.create(category=self.category, amount=Decimal(amount))
+        self.create(amount=Decimal('4.00'))
+
+    def get_ids(self, data):
+        rows = data['results'] if isinstance(data, dict) else data
+        return [row['id'] for row in rows]
+
+    def test_sections_match_endpoints(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(list(data), list(SECTIONS))
+
+        endpoints = {
+            'statistics': '/api/v1/transactions/statistics/',
+            'by_category': '/api/v1/transactions/by_category/',
+            'monthly_summary': '/api/v1/transactions/monthly_summary/',
+            'budgets_summary': '/api/v1/budgets/summary/',
+            'budget_dashboard': '/api/v1/budgets/dashboard_data/',
+        }
+        for section, url in endpoints.items():
+            self.assertEqual(data[section], self.client.get(url).json(), section)
+
+        self.assertEqual(self.get_ids(data['accounts']), self.get_ids(self.client.get('/api/v1/accounts/').json()))
+        self.assertEqual(len(data['recent_transactions']), 5)
+        self.assertEqual(data['categories'][0]['name'], 'Alimentation')
+
+    def test_requested_sections(self):
+        response = self.client.get(self.url, {'sections': 'accounts, statistics'})
+        # Ordre de SECTIONS, quel que soit l'ordre demandé
+        self.assertEqual(list(response.json()), ['statistics', 'accounts'])
+
+        response = self.client.get(self.url, {'sections': 'statistics,unknown'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('unknown', response.json()['error'])
+        self.assertEqual(self.client.get(self.url, {'sections': ','}).status_code, 400)
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Requêtes conditionnelles (core.conditional)"""
+
+    url = '/api/v1/accounts/'
+
+    def test_etag(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], conditional.CACHE_CONTROL)
+
+        # Copie à jour : 304 sans requête sur les données
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"autre", W/{etag}').status_code, 304)
+
+        # Autre ressource, ou écriture sur les données : nouvel ETag
+        self.assertNotEqual(self.client.get(f'{self.url}{self.account.pk}/')['ETag'], etag)
+        self.create()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified(self):
+        # Version au milieu d'une seconde : Last-Modified arrondi à la seconde supérieure
+        midnight = int(datetime.combine(self.today, time.min).timestamp())
+        cache.set(VERSION_KEY.format(user_id=self.user.pk), (midnight + 3600) * 1_000_000_000 + 500_000_000, None)
+        self.assertEqual(conditional.get_last_modified(self.user.pk), midnight + 3601)
+
+        response = self.client.get(self.url)
+        last_modified = response['Last-Modified']
+        self.assertEqual(last_modified, http_date(midnight + 3601))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(midnight + 3602)).status_code, 304)
+        # Même seconde : une écriture a pu suivre, la ressource est renvoyée
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        # If-None-Match prime sur If-Modified-Since
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"autre"',
+                                   HTTP_IF_MODIFIED_SINCE=http_date(midnight + 3602))
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_not_conditional(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.post(self.url, {'name': 'Épargne', 'account_type': 'savings'},
+                                    format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('ETag', response)
+
+    def test_dashboard(self):
+        url = '/api/v1/dashboard/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(url, {'sections': 'accounts'})['ETag'], etag)
+        self.create()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,53 @@
+"""
+Vues transverses aux applications (tableau de bord).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .cache import response_cache_key
+from .conditional import get_etag, get_last_modified, get_validator_headers, is_not_modified
+from .dashboard import SECTIONS, Dashboard
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """
+    GET /api/v1/dashboard/?sections=statistics,accounts
+
+    Données de la page d'accueil en une requête (voir core.dashboard).
+    `sections` : sections à retourner, séparées par des virgules (toutes par défaut).
+
+    La réponse porte un ETag et une date Last-Modified qui changent à chaque
+    écriture sur les données de l'utilisateur : si la copie du client est à
+    jour, une réponse 304 est retournée sans aucun calcul (core.conditional).
+    """
+    requested = request.query_params.get('sections')
+    sections = SECTIONS
+    if requested:
+        sections = [section.strip() for section in requested.split(',') if section.strip()]
+        invalid = [section for section in sections if section not in SECTIONS]
+        if invalid or not sections:
+            return Response(
+                {'error': f"Section(s) invalide(s) : {', '.join(invalid)}. "
+                          f"Valeurs possibles : {', '.join(SECTIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    key = response_cache_key(request.user.pk, 'dashboard', request.query_params)
+    etag, last_modified = get_etag(key), get_last_modified(request.user.pk)
+    headers = get_validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    data = cache.get(key)
+    if data is None:
+        data = Dashboard(request.user).compute(sections)
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+        if timeout:
+            cache.set(key, data, timeout)
+    return Response(data, headers=headers)
@@ -6,6 +6,7 @@ from .models import Transaction
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ['description', 'type', 'amount', 'account', 'category', 'date', 'user', 'created_at']
     list_filter = ['type', 'date', 'is_recurring', 'created_at']
+    raw_id_fields = ['recurrence_parent']
     search_fields = ['description', 'notes', 'user__username']
     list_per_page = 50
     date_hierarchy = 'date'
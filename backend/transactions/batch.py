@@ -0,0 +1,221 @@
+"""
+Opérations groupées sur les transactions (création, modification, suppression).
+
+Toutes les opérations d'un lot sont validées contre les comptes et catégories
+de l'utilisateur chargés une seule fois, et les transactions à modifier ou
+supprimer sont chargées en une requête. Si une opération est invalide, aucune
+n'est appliquée ; sinon elles le sont dans une seule transaction avec
+``bulk_create``, ``bulk_update`` et une suppression groupée (le registre des
+soldes et les agrégats journaliers sont maintenus par TransactionQuerySet).
+
+Corps attendu :
+    {
+        "create": [{...transaction...}, ...],
+        "update": [{"id": 12, "category": 3}, ...],   # modifications partielles
+        "delete": [15, 16]
+    }
+"""
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from core.cache import bump_data_version
+from . import recurrence
+
+OPERATIONS = ('create', 'update', 'delete')
+
+# Nombre maximal d'opérations par lot
+MAX_OPERATIONS = 1000
+
+
+class BatchError(ValueError):
+    """Corps de requête mal formé (le lot est refusé dans son ensemble)."""
+
+
+def parse_pk(value):
+    """Identifiant de transaction entier, ou None si invalide."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TransactionBatch:
+    """
+    Valide puis applique un lot d'opérations pour l'utilisateur de la requête.
+
+    ``results`` contient, par opération et dans l'ordre reçu, soit le résultat
+    (``id``, ``status``), soit les erreurs de validation (``errors``).
+    """
+
+    def __init__(self, request, data):
+        if not isinstance(data, dict):
+            raise BatchError('Le corps doit être un objet avec les clés create, update et/ou delete.')
+        self.request = request
+        self.user = request.user
+        self.operations = {}
+        for operation in OPERATIONS:
+            items = data.get(operation) or []
+            if not isinstance(items, list):
+                raise BatchError(f'« {operation} » doit être une liste.')
+            self.operations[operation] = items
+
+        count = sum(len(items) for items in self.operations.values())
+        if not count:
+            raise BatchError('Aucune opération à effectuer.')
+        if count > MAX_OPERATIONS:
+            raise BatchError(f'Trop d\'opérations (maximum {MAX_OPERATIONS} par lot).')
+
+        self.results = {operation: [] for operation in OPERATIONS}
+        self.to_create, self.to_update, self.to_delete = [], [], []
+        self.updated_fields = set()
+        self.has_errors = False
+
+    def get_serializer_context(self):
+        """Contexte des serializers : comptes et catégories de l'utilisateur préchargés."""
+        from accounts.models import Account
+        from categories.models import Category
+
+        return {
+            'request': self.request,
+            'preloaded': {
+                Account: {account.pk: account for account in Account.objects.filter(user=self.user)},
+                Category: {category.pk: category for category in Category.objects.filter(user=self.user)},
+            },
+        }
+
+    def add_error(self, operation, index, errors):
+        self.has_errors = True
+        self.results[operation].append({'index': index, 'errors': errors})
+
+    def validate(self):
+        """Valide toutes les opérations ; retourne True si le lot peut être appliqué."""
+        from .models import Transaction
+        from .serializers import TransactionBatchSerializer
+
+        context = self.get_serializer_context()
+
+        for index, item in enumerate(self.operations['create']):
+            serializer = TransactionBatchSerializer(data=item, context=context)
+            if not serializer.is_valid():
+                self.add_error('create', index, serializer.errors)
+                continue
+            self.to_create.append((index, Transaction(**serializer.validated_data)))
+
+        update_ids = [parse_pk(item.get('id')) for item in self.operations['update'] if isinstance(item, dict)]
+        delete_ids = [parse_pk(value) for value in self.operations['delete']]
+        instances = Transaction.objects.filter(
+            user=self.user, pk__in={pk for pk in update_ids + delete_ids if pk is not None}
+        ).in_bulk()
+
+        # Une transaction ne peut être visée que par une seule opération du lot
+        seen = set()
+
+        for index, item in enumerate(self.operations['update']):
+            pk = parse_pk(item.get('id')) if isinstance(item, dict) else None
+            if pk is None:
+                self.add_error('update', index, {'id': ['Identifiant requis.']})
+                continue
+            if pk not in instances:
+                self.add_error('update', index, {'id': ['Transaction introuvable.']})
+                continue
+            if pk in seen:
+                self.add_error('update', index, {'id': ['Transaction déjà visée par une autre opération du lot.']})
+                continue
+            seen.add(pk)
+
+            instance = instances[pk]
+            serializer = TransactionBatchSerializer(instance, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                self.add_error('update', index, serializer.errors)
+                continue
+            changes = dict(serializer.validated_data)
+            changes.pop('user', None)
+            changes['source'] = instance.get_updated_source(changes)
+            for field, value in changes.items():
+                setattr(instance, field, value)
+            self.updated_fields.update(changes)
+            self.to_update.append((index, instance))
+
+        for index, value in enumerate(self.operations['delete']):
+            pk = parse_pk(value)
+            if pk is None or pk not in instances:
+                self.add_error('delete', index, {'id': ['Transaction introuvable.']})
+                continue
+            if pk in seen:
+                self.add_error('delete', index, {'id': ['Transaction déjà visée par une autre opération du lot.']})
+                continue
+            seen.add(pk)
+            self.to_delete.append((index, pk))
+
+        return not self.has_errors
+
+    def apply(self):
+        """Applique les opérations validées dans une seule transaction."""
+        from .models import Transaction
+        from .serializers import TransactionListSerializer
+
+        with db_transaction.atomic():
+            created = Transaction.objects.bulk_create([obj for index, obj in self.to_create])
+            rules = [instance for index, instance in self.to_update
+                     if instance.is_recurring or instance._stored_recurring]
+            # Règles avant modification : les occurrences modifiées individuellement sont conservées
+            previous_templates = recurrence.get_stored_templates([rule.pk for rule in rules]) if rules else {}
+            if self.to_update:
+                now = timezone.now()
+                for index, instance in self.to_update:
+                    instance.updated_at = now
+                Transaction.objects.bulk_update(
+                    [instance for index, instance in self.to_update],
+                    sorted(self.updated_fields | {'updated_at'})
+                )
+            if self.to_delete:
+                Transaction.objects.filter(
+                    user=self.user, pk__in=[pk for index, pk in self.to_delete]
+                ).delete()
+            # Occurrences des règles de récurrence créées ou modifiées (bulk_* ne passe pas par save())
+            recurrence.generate([obj for obj in created if obj.is_recurring])
+            for rule in rules:
+                recurrence.sync_rule(rule, previous=previous_templates.get(rule.pk))
+            # bulk_update ne change la version que si les soldes ou agrégats sont touchés
+            bump_data_version(self.user.pk)
+
+        # Transactions créées ou modifiées relues en une requête (montant signé calculé par la base)
+        saved = Transaction.objects.filter(
+            pk__in=[obj.pk for obj in created] + [instance.pk for index, instance in self.to_update]
+        ).select_related('account', 'category').in_bulk()
+
+        for (index, obj), created_obj in zip(self.to_create, created):
+            self.results['create'].append({
+                'index': index, 'id': created_obj.pk, 'status': 'created',
+                'transaction': TransactionListSerializer(saved[created_obj.pk]).data,
+            })
+        for index, instance in self.to_update:
+            self.results['update'].append({
+                'index': index, 'id': instance.pk, 'status': 'updated',
+                'transaction': TransactionListSerializer(saved[instance.pk]).data,
+            })
+        for index, pk in self.to_delete:
+            self.results['delete'].append({'index': index, 'id': pk, 'status': 'deleted'})
+
+    def run(self):
+        """Valide puis applique le lot si toutes les opérations sont valides."""
+        if self.validate():
+            self.apply()
+        else:
+            # Lot refusé : les opérations valides sont signalées comme non appliquées
+            for operation, items in (('create', self.to_create), ('update', self.to_update)):
+                for index, obj in items:
+                    self.results[operation].append({'index': index, 'id': obj.pk, 'status': 'not_applied'})
+            for index, pk in self.to_delete:
+                self.results['delete'].append({'index': index, 'id': pk, 'status': 'not_applied'})
+        for results in self.results.values():
+            results.sort(key=lambda result: result['index'])
+        return {
+            'applied': not self.has_errors,
+            'created': len(self.to_create) if not self.has_errors else 0,
+            'updated': len(self.to_update) if not self.has_errors else 0,
+            'deleted': len(self.to_delete) if not self.has_errors else 0,
+            **self.results,
+        }
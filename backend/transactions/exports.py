@@ -0,0 +1,82 @@
+"""
+Export des transactions en CSV ou en JSON lines (NDJSON).
+
+Les lignes sont lues avec ``values()`` (des dictionnaires, pas d'instances)
+et un curseur côté serveur (``iterator(chunk_size=...)``), puis écrites au fil
+de l'eau dans une StreamingHttpResponse : la mémoire utilisée reste constante
+quel que soit le nombre de transactions exportées.
+"""
+import csv
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Nombre de lignes lues par aller-retour avec la base
+CHUNK_SIZE = 2000
+
+# Colonnes exportées : nom de la colonne et chemin dans values()
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('type', 'type'),
+    ('amount', 'amount'),
+    ('signed_amount', 'signed_amount'),
+    ('description', 'description'),
+    ('account', 'account__name'),
+    ('category', 'category__name'),
+    ('destination_account', 'destination_account__name'),
+    ('adjustment_direction', 'adjustment_direction'),
+    ('notes', 'notes'),
+    ('is_recurring', 'is_recurring'),
+    ('source', 'source'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+
+def iter_rows(queryset):
+    """Lignes du queryset sous forme de dictionnaires {colonne: valeur}."""
+    paths = [path for name, path in EXPORT_COLUMNS]
+    for values in queryset.values_list(*paths).iterator(chunk_size=CHUNK_SIZE):
+        yield dict(zip((name for name, path in EXPORT_COLUMNS), values))
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de la stocker."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, path in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([
+            '' if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row.values()
+        ])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_response(queryset, export_format='csv'):
+    """
+    Réponse en flux de l'export des transactions du queryset (déjà filtré et trié)
+    """
+    rows = iter_rows(queryset)
+    content = iter_csv(rows) if export_format == 'csv' else iter_ndjson(rows)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    filename = f'transactions-{date.today().isoformat()}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,19 @@
+"""
+Filtres de la liste des transactions (et de l'export)
+"""
+import django_filters
+
+from .models import Transaction
+
+
+class TransactionFilter(django_filters.FilterSet):
+    """
+    Filtres par champ, plus des bornes de date inclusives :
+    ?start_date=2024-01-01&end_date=2024-12-31
+    """
+    start_date = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    end_date = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = Transaction
+        fields = ['type', 'account', 'category', 'date', 'is_recurring']
@@ -0,0 +1,427 @@
+"""
+Import de relevés bancaires (CSV, OFX, CAMT.053).
+
+Les fichiers sont lus en flux : chaque parseur produit les lignes une à une
+sans charger tout le fichier en mémoire. Les lignes sont validées contre les
+comptes et catégories de l'utilisateur chargés une seule fois, puis écrites
+par lots avec ``bulk_create`` dans une transaction. Une ligne invalide est
+signalée dans le rapport sans interrompre l'import.
+
+Montants : positifs pour un revenu, négatifs pour une dépense.
+"""
+import csv
+import io
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from defusedxml.ElementTree import iterparse
+from django.db import transaction as db_transaction
+
+FORMATS = ('csv', 'ofx', 'camt')
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Nombre maximal d'erreurs détaillées dans le rapport
+MAX_REPORTED_ERRORS = 100
+
+# Montant maximal (exclu) : 13 chiffres avant la virgule (Transaction.amount)
+MAX_AMOUNT = Decimal(10) ** 13
+
+# Noms de colonnes CSV reconnus (en minuscules, sans accents)
+CSV_COLUMNS = {
+    'date': ('date', 'booking date', 'date de comptabilisation', 'buchungsdatum', 'valuta', 'value date'),
+    'amount': ('amount', 'montant', 'betrag'),
+    'debit': ('debit', 'debit amount', 'belastung'),
+    'credit': ('credit', 'credit amount', 'gutschrift'),
+    'description': ('description', 'label', 'libelle', 'texte', 'text', 'buchungstext', 'memo'),
+    'category': ('category', 'categorie', 'kategorie'),
+    'account': ('account', 'compte', 'konto'),
+    'notes': ('notes', 'note', 'remarque'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d.%m.%y', '%Y%m%d')
+
+
+class ImportRowError(ValueError):
+    """Ligne de relevé invalide (rapportée sans interrompre l'import)."""
+
+
+def normalize_name(value):
+    """Nom comparable : minuscules, sans accents ni espaces superflus."""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def parse_amount(value):
+    """
+    Convertit un montant de relevé en Decimal : ``-1'234.50``, ``1 234,50``,
+    ``(12.00)``, ``12.00-``...
+    """
+    if isinstance(value, Decimal):
+        return value
+    text = str(value or '').strip()
+    for separator in (' ', '\u00a0', '\u202f', "'", '\u2019'):
+        text = text.replace(separator, '')
+    negative = text.startswith('(') and text.endswith(')') or text.endswith('-')
+    text = text.strip('()').rstrip('-')
+    if ',' in text and '.' in text:
+        # Le dernier séparateur est le séparateur décimal
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    else:
+        text = text.replace(',', '.')
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ImportRowError(f'Montant invalide : {value!r}')
+    if not amount.is_finite():
+        raise ImportRowError(f'Montant invalide : {value!r}')
+    return -amount if negative else amount
+
+
+def parse_date(value):
+    """Convertit une date de relevé (ISO, JJ.MM.AAAA, JJ/MM/AAAA, AAAAMMJJ...)."""
+    if isinstance(value, date):
+        return value
+    text = str(value or '').strip()
+    # Dates OFX : 20240131120000[-5:EST]
+    match = re.match(r'^(\d{8})\d*(?:\.\d+)?(?:\[.*\])?$', text)
+    if match:
+        text = match.group(1)
+    # Dates ISO avec heure : 2024-01-31T12:00:00
+    text = text.split('T')[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ImportRowError(f'Date invalide : {value!r}')
+
+
+# =============================================================================
+# Parseurs (générateurs de (numéro de ligne, dictionnaire))
+# =============================================================================
+
+def _text_stream(file, encoding='utf-8-sig'):
+    """Flux texte à partir d'un fichier binaire ou texte."""
+    if isinstance(file, io.TextIOBase):
+        return file
+    return io.TextIOWrapper(file, encoding=encoding, errors='replace', newline='')
+
+
+def parse_csv(file):
+    """
+    Lignes d'un CSV avec en-tête. Le séparateur (``,``, ``;`` ou tabulation)
+    est détecté sur la première ligne. Le montant vient d'une colonne
+    ``amount`` signée, ou des colonnes ``debit``/``credit``.
+    """
+    stream = _text_stream(file)
+    header_line = stream.readline()
+    delimiter = max(';,\t', key=header_line.count)
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+
+    columns = {}
+    for index, name in enumerate(header):
+        normalized = normalize_name(name)
+        for field, aliases in CSV_COLUMNS.items():
+            if normalized in aliases and field not in columns:
+                columns[field] = index
+    if 'date' not in columns or not ({'amount', 'debit', 'credit'} & set(columns)):
+        raise ValueError('En-tête CSV invalide : colonnes date et montant (ou débit/crédit) requises.')
+
+    for line_number, values in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(value.strip() for value in values):
+            continue
+        row = {
+            field: values[index].strip() if index < len(values) else ''
+            for field, index in columns.items()
+        }
+        if 'amount' not in row or not row['amount']:
+            credit = row.pop('credit', '') or '0'
+            debit = row.pop('debit', '') or '0'
+            row['amount'] = _CsvAmount(credit, debit)
+        yield line_number, row
+
+
+class _CsvAmount:
+    """Montant CSV réparti en colonnes débit/crédit, converti à la validation."""
+
+    def __init__(self, credit, debit):
+        self.credit, self.debit = credit, debit
+
+    def __str__(self):
+        return f'{self.credit}/{self.debit}'
+
+    def to_decimal(self):
+        return parse_amount(self.credit) - abs(parse_amount(self.debit))
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+def parse_ofx(file):
+    """
+    Transactions (<STMTTRN>) d'un relevé OFX, en SGML (OFX 1.x, balises non
+    fermées) ou XML (OFX 2.x).
+    """
+    stream = _text_stream(file, encoding='latin-1')
+    current = None
+    number = 0
+    for line in stream:
+        for match in OFX_TAG.finditer(line):
+            closing, tag, value = match.groups()
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    number += 1
+                    yield number, {
+                        'date': current.get('DTPOSTED', ''),
+                        'amount': current.get('TRNAMT', ''),
+                        'description': current.get('NAME') or current.get('MEMO', ''),
+                        'notes': current.get('MEMO', '') if current.get('NAME') else '',
+                    }
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _find(element, *path):
+    """Premier descendant suivant un chemin de noms locaux (espaces de noms ignorés)."""
+    for name in path:
+        if element is None:
+            return None
+        element = next((child for child in element if _local_name(child.tag) == name), None)
+    return element
+
+
+def _find_text(element, *path):
+    found = _find(element, *path)
+    return found.text.strip() if found is not None and found.text else ''
+
+
+def parse_camt(file):
+    """
+    Écritures (<Ntry>) d'un relevé ISO 20022 camt.053, lues avec iterparse :
+    chaque écriture est libérée de la mémoire une fois traitée. Le fichier
+    est lu avec defusedxml : les entités (expansion exponentielle, fichiers
+    externes) sont refusées.
+    """
+    number = 0
+    for event, element in iterparse(file, events=('end',)):
+        if _local_name(element.tag) != 'Ntry':
+            continue
+        number += 1
+        amount = _find_text(element, 'Amt')
+        if _find_text(element, 'CdtDbtInd') == 'DBIT':
+            amount = f'-{amount}'
+        booking_date = (
+            _find_text(element, 'BookgDt', 'Dt')
+            or _find_text(element, 'BookgDt', 'DtTm')
+            or _find_text(element, 'ValDt', 'Dt')
+        )
+        details = _find(element, 'NtryDtls', 'TxDtls')
+        additional = _find_text(element, 'AddtlNtryInf')
+        description = (
+            _find_text(details, 'RmtInf', 'Ustrd')
+            or _find_text(details, 'RltdPties', 'Cdtr', 'Nm')
+            or _find_text(details, 'RltdPties', 'Dbtr', 'Nm')
+            or additional
+        )
+        yield number, {
+            'date': booking_date,
+            'amount': amount,
+            'description': description,
+            'notes': additional if additional != description else '',
+        }
+        element.clear()
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+    'camt': parse_camt,
+}
+
+
+def detect_format(filename):
+    """Format d'import déduit de l'extension du fichier."""
+    name = (filename or '').lower()
+    if name.endswith(('.ofx', '.qfx')):
+        return 'ofx'
+    if name.endswith('.xml'):
+        return 'camt'
+    return 'csv'
+
+
+# =============================================================================
+# Import
+# =============================================================================
+
+class TransactionImporter:
+    """
+    Valide et importe les lignes d'un relevé pour un utilisateur.
+
+    Les comptes et catégories de l'utilisateur sont chargés une seule fois ;
+    ``account`` est le compte utilisé quand la ligne n'en précise pas.
+    Les lignes identiques à une transaction existante (compte, date, montant,
+    description) sont ignorées, ce qui permet de réimporter un relevé.
+    """
+
+    def __init__(self, user, account=None, batch_size=DEFAULT_BATCH_SIZE, skip_duplicates=True):
+        from accounts.models import Account
+        from categories.models import Category
+
+        self.user = user
+        self.default_account_id = account.pk if account is not None else None
+        self.batch_size = batch_size
+        self.skip_duplicates = skip_duplicates
+
+        self.accounts = {
+            normalize_name(name): pk
+            for pk, name in Account.objects.filter(user=user, is_active=True).values_list('pk', 'name')
+        }
+        self.categories = {
+            (normalize_name(name), category_type): pk
+            for pk, name, category_type in Category.objects.filter(
+                user=user, is_active=True
+            ).values_list('pk', 'name', 'type')
+        }
+
+        self.report = {'created': 0, 'duplicates': 0, 'uncategorized': 0, 'errors': [], 'error_count': 0}
+
+    def build(self, row):
+        """Transaction (non enregistrée) à partir d'une ligne, ou ImportRowError."""
+        from .models import Transaction
+
+        if not row.get('date'):
+            raise ImportRowError('Date manquante.')
+        day = parse_date(row['date'])
+
+        raw_amount = row.get('amount')
+        amount = raw_amount.to_decimal() if isinstance(raw_amount, _CsvAmount) else parse_amount(raw_amount)
+        try:
+            amount = amount.quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ImportRowError(f'Montant hors limites : {raw_amount}')
+        if abs(amount) >= MAX_AMOUNT:
+            raise ImportRowError(f'Montant hors limites : {raw_amount}')
+        if amount == 0:
+            raise ImportRowError('Montant nul.')
+        transaction_type = 'income' if amount > 0 else 'expense'
+
+        account_id = self.default_account_id
+        if row.get('account'):
+            account_id = self.accounts.get(normalize_name(row['account']))
+            if account_id is None:
+                raise ImportRowError(f'Compte inconnu : {row["account"]}')
+        if account_id is None:
+            raise ImportRowError('Aucun compte indiqué.')
+
+        category_id = None
+        if row.get('category'):
+            category_id = self.categories.get((normalize_name(row['category']), transaction_type))
+        if category_id is None:
+            self.report['uncategorized'] += 1
+
+        return Transaction(
+            user=self.user,
+            account_id=account_id,
+            category_id=category_id,
+            type=transaction_type,
+            amount=abs(amount),
+            description=(row.get('description') or '')[:255],
+            notes=row.get('notes') or None,
+            date=day,
+            source='import',
+        )
+
+    def add_error(self, line, message):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'line': line, 'error': message})
+
+    def _existing_keys(self, batch):
+        from .models import Transaction
+
+        dates = [transaction.date for transaction in batch]
+        return set(Transaction.objects.filter(
+            user=self.user,
+            account_id__in={transaction.account_id for transaction in batch},
+            date__gte=min(dates),
+            date__lte=max(dates),
+        ).values_list('account_id', 'date', 'type', 'amount', 'description'))
+
+    def _flush(self, batch, dry_run=False):
+        from .models import Transaction
+
+        if not batch:
+            return
+        if self.skip_duplicates:
+            existing = self._existing_keys(batch)
+            unique = []
+            for transaction in batch:
+                key = (transaction.account_id, transaction.date, transaction.type,
+                       transaction.amount, transaction.description)
+                if key in existing:
+                    self.report['duplicates'] += 1
+                else:
+                    # Les doublons à l'intérieur du fichier sont conservés
+                    unique.append(transaction)
+            batch = unique
+        if not dry_run:
+            Transaction.objects.bulk_create(batch, batch_size=self.batch_size)
+        self.report['created'] += len(batch)
+
+    def run(self, rows, dry_run=False):
+        """
+        Importe les lignes ``(numéro, dictionnaire)`` d'un parseur. Avec
+        ``dry_run``, les lignes sont validées sans rien enregistrer.
+        Retourne le rapport d'import.
+        """
+        batch = []
+        with db_transaction.atomic():
+            try:
+                for line, row in rows:
+                    try:
+                        transaction = self.build(row)
+                    except ImportRowError as exc:
+                        self.add_error(line, str(exc))
+                        continue
+                    batch.append(transaction)
+                    if len(batch) >= self.batch_size:
+                        self._flush(batch, dry_run)
+                        batch = []
+                self._flush(batch, dry_run)
+            except (ValueError, SyntaxError) as exc:
+                # Fichier illisible (en-tête, XML invalide) : rien n'est enregistré
+                db_transaction.set_rollback(True)
+                self.report['created'] = 0
+                self.report['fatal'] = str(exc) or exc.__class__.__name__
+        return self.report
+
+
+def import_file(user, file, file_format=None, filename=None, account=None, dry_run=False,
+                batch_size=DEFAULT_BATCH_SIZE, skip_duplicates=True):
+    """
+    Importe un relevé (fichier binaire ouvert) pour l'utilisateur.
+    Le format est déduit du nom du fichier s'il n'est pas précisé.
+    """
+    file_format = file_format or detect_format(filename or getattr(file, 'name', ''))
+    if file_format not in PARSERS:
+        raise ValueError(f'Format inconnu : {file_format} (valeurs possibles : {", ".join(FORMATS)})')
+
+    importer = TransactionImporter(user, account=account, batch_size=batch_size, skip_duplicates=skip_duplicates)
+    report = importer.run(PARSERS[file_format](file), dry_run=dry_run)
+    report['format'] = file_format
+    return report
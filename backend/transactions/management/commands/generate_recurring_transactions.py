@@ -0,0 +1,53 @@
+"""
+Commande Django pour générer les occurrences des transactions récurrentes
+jusqu'à l'horizon (RECURRENCE_HORIZON_DAYS). À planifier une fois par jour
+(cron, tâche planifiée...) : chaque exécution prolonge l'horizon d'un jour et
+rattrape les jours manqués, sans jamais créer deux fois la même occurrence.
+
+Usage:
+    python manage.py generate_recurring_transactions
+    python manage.py generate_recurring_transactions --user <username>
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction
+from transactions.recurrence import BATCH_SIZE, FREQUENCY_UNITS, generate
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Génère les occurrences des transactions récurrentes jusqu\'à l\'horizon configuré'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Limiter la génération aux règles de cet utilisateur'
+        )
+
+    def handle(self, *args, **options):
+        rules = Transaction.objects.filter(
+            is_recurring=True,
+            recurrence_parent__isnull=True,
+            recurrence_frequency__in=FREQUENCY_UNITS,
+        ).order_by('pk')
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'L\'utilisateur {options["user"]} n\'existe pas')
+            rules = rules.filter(user=user)
+
+        count, batch = 0, []
+        for rule in rules.iterator(chunk_size=BATCH_SIZE):
+            batch.append(rule)
+            if len(batch) >= BATCH_SIZE:
+                count += generate(batch)
+                batch = []
+        if batch:
+            count += generate(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {count} occurrence(s) générée(s)')
+        )
@@ -0,0 +1,64 @@
+"""
+Commande Django pour importer un relevé bancaire (CSV, OFX, CAMT.053).
+
+Usage:
+    python manage.py import_transactions releve.csv --user <username> --account <nom du compte>
+    python manage.py import_transactions releve.xml --user <username> --account <nom> --file-format camt
+    python manage.py import_transactions releve.ofx --user <username> --account <nom> --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from accounts.models import Account
+from transactions import importers
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Importe un relevé bancaire (CSV, OFX ou CAMT.053) par lots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Chemin du fichier à importer')
+        parser.add_argument('--user', type=str, required=True, help='Utilisateur propriétaire des transactions')
+        parser.add_argument('--account', type=str, help='Nom du compte des lignes qui n\'en précisent pas')
+        parser.add_argument('--file-format', choices=importers.FORMATS, help='Format (défaut : déduit de l\'extension)')
+        parser.add_argument('--batch-size', type=int, default=importers.DEFAULT_BATCH_SIZE,
+                            help='Nombre de transactions par insertion')
+        parser.add_argument('--dry-run', action='store_true', help='Valider sans enregistrer')
+        parser.add_argument('--keep-duplicates', action='store_true',
+                            help='Importer aussi les lignes identiques à des transactions existantes')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'L\'utilisateur {options["user"]} n\'existe pas')
+
+        account = None
+        if options['account']:
+            account = Account.objects.filter(user=user, name__iexact=options['account']).first()
+            if account is None:
+                raise CommandError(f'Le compte {options["account"]} n\'existe pas')
+
+        try:
+            with open(options['path'], 'rb') as file:
+                report = importers.import_file(
+                    user, file,
+                    file_format=options['file_format'], filename=options['path'],
+                    account=account, dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                    skip_duplicates=not options['keep_duplicates'],
+                )
+        except OSError as exc:
+            raise CommandError(f'Lecture impossible : {exc}')
+
+        if 'fatal' in report:
+            raise CommandError(f'Import annulé : {report["fatal"]}')
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f'  Ligne {error["line"]} : {error["error"]}'))
+        verb = 'validée(s)' if options['dry_run'] else 'importée(s)'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {report["created"]} transaction(s) {verb}, {report["duplicates"]} doublon(s) ignoré(s), '
+            f'{report["error_count"]} erreur(s), {report["uncategorized"]} sans catégorie'
+        ))
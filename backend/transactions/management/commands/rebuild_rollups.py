@@ -0,0 +1,37 @@
+"""
+Commande Django pour reconstruire les agrégats journaliers des transactions.
+
+Usage:
+    python manage.py rebuild_rollups                 # Tous les utilisateurs
+    python manage.py rebuild_rollups --user <username>
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from transactions.rollups import rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les agrégats journaliers (TransactionDailyRollup) à partir des transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Limiter la reconstruction aux transactions de cet utilisateur'
+        )
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'L\'utilisateur {options["user"]} n\'existe pas')
+            count = rebuild(user_ids=[user.pk])
+        else:
+            count = rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {count} agrégat(s) journalier(s) reconstruit(s)')
+        )
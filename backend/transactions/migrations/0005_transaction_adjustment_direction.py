@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:21
+
+import django.db.models.expressions
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_adjustment_direction(apps, schema_editor):
+    """
+    Reprend le sens des ajustements depuis les notes (ADJUSTMENT:+ / ADJUSTMENT:-)
+    """
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    credits, debits = [], []
+    adjustments = Transaction.objects.filter(type='adjustment', notes__contains='ADJUSTMENT:')
+    for pk, notes in adjustments.values_list('pk', 'notes').iterator(chunk_size=2000):
+        sign = notes.split('ADJUSTMENT:')[1].strip()
+        (credits if sign.startswith('+') else debits).append(pk)
+
+    Transaction.objects.filter(pk__in=credits).update(adjustment_direction='credit')
+    Transaction.objects.filter(pk__in=debits).update(adjustment_direction='debit')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transaction_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='adjustment_direction',
+            field=models.CharField(blank=True, choices=[('credit', 'Crédit (+)'), ('debit', 'Débit (-)')], help_text='Requis pour les ajustements de solde', max_length=6, null=True, verbose_name="Sens de l'ajustement"),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='signed_amount',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(then=models.F('amount'), type='income'), models.When(then=django.db.models.expressions.CombinedExpression(models.F('amount'), '*', models.Value(-1)), type='expense'), models.When(destination_account__isnull=False, then=django.db.models.expressions.CombinedExpression(models.F('amount'), '*', models.Value(-1)), type='transfer'), models.When(adjustment_direction='credit', then=models.F('amount'), type='adjustment'), models.When(adjustment_direction='debit', then=django.db.models.expressions.CombinedExpression(models.F('amount'), '*', models.Value(-1)), type='adjustment'), default=models.Value(Decimal('0.00'))), output_field=models.DecimalField(decimal_places=2, max_digits=15), verbose_name='Montant signé'),
+        ),
+        migrations.RunPython(backfill_adjustment_direction, migrations.RunPython.noop),
+    ]
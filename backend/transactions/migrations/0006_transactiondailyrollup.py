@@ -0,0 +1,62 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_rollups(apps, schema_editor):
+    """
+    Construit les agrégats journaliers à partir des transactions existantes
+    """
+    Transaction = apps.get_model('transactions', 'Transaction')
+    TransactionDailyRollup = apps.get_model('transactions', 'TransactionDailyRollup')
+
+    rows = Transaction.objects.values('user_id', 'date', 'account_id', 'category_id', 'type').annotate(
+        sum_amount=models.Sum('amount'), nb=models.Count('id')
+    ).order_by()
+    TransactionDailyRollup.objects.bulk_create(
+        [
+            TransactionDailyRollup(total=row.pop('sum_amount'), count=row.pop('nb'), **row)
+            for row in rows.iterator(chunk_size=2000)
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_ledger_balance'),
+        ('categories', '0001_initial'),
+        ('transactions', '0005_transaction_adjustment_direction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('type', models.CharField(choices=[('income', 'Revenu'), ('expense', 'Dépense'), ('transfer', 'Transfert'), ('adjustment', 'Ajustement de solde')], max_length=10, verbose_name='Type')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_rollups', to='accounts.account', verbose_name='Compte')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transaction_rollups', to='categories.category', verbose_name='Catégorie')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier',
+                'verbose_name_plural': 'Agrégats journaliers',
+                'db_table': 'transaction_daily_rollup',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['user', 'type', 'date'], name='transaction_user_id_ff362f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactiondailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'account', 'category', 'type'), name='unique_transaction_daily_rollup'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_ledger_balance'),
+        ('categories', '0001_initial'),
+        ('transactions', '0006_transactiondailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='transaction_user_keyset_idx'),
+        ),
+    ]
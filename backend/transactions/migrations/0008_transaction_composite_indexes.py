@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_ledger_balance'),
+        ('categories', '0001_initial'),
+        ('transactions', '0007_transaction_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'category', 'date'], name='transaction_user_type_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'date'], name='transaction_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('type', 'transfer')), fields=['destination_account', 'date'], name='transaction_transfer_dest_idx'),
+        ),
+    ]
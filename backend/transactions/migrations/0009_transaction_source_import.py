@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_transaction_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='source',
+            field=models.CharField(choices=[('web', 'Web'), ('ios', 'iOS'), ('ios_uncategorized', 'iOS (non catégorisé)'), ('import', 'Import bancaire')], default='web', max_length=20, verbose_name='Source'),
+        ),
+    ]
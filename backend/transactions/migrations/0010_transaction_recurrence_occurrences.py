@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_transaction_source_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='occurrence_key',
+            field=models.CharField(blank=True, editable=False, help_text="Règle et date prévue de l'occurrence, garantit une seule génération", max_length=40, null=True, unique=True, verbose_name="Clé d'occurrence"),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurrence_generated_until',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name="Occurrences générées jusqu'au"),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurrence_parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='transactions.transaction', verbose_name='Règle de récurrence'),
+        ),
+    ]
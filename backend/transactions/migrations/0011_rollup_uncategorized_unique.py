@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+def merge_uncategorized_duplicates(apps, schema_editor):
+    """
+    Fusionne les agrégats sans catégorie en double (catégories supprimées,
+    insertions concurrentes) avant d'ajouter la contrainte
+    """
+    TransactionDailyRollup = apps.get_model('transactions', 'TransactionDailyRollup')
+
+    duplicates = TransactionDailyRollup.objects.filter(category__isnull=True).values(
+        'user_id', 'date', 'account_id', 'type'
+    ).annotate(rows=models.Count('id')).filter(rows__gt=1).order_by()
+    for key in duplicates:
+        key.pop('rows')
+        rows = list(TransactionDailyRollup.objects.filter(category__isnull=True, **key).order_by('pk'))
+        row, others = rows[0], rows[1:]
+        row.total = sum((other.total for other in others), row.total)
+        row.count = sum((other.count for other in others), row.count)
+        TransactionDailyRollup.objects.filter(pk__in=[other.pk for other in others]).delete()
+        row.save(update_fields=['total', 'count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_transaction_recurrence_occurrences'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorized_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transactiondailyrollup',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('category__isnull', True)),
+                fields=('user', 'date', 'account', 'type'),
+                name='unique_transaction_daily_rollup_uncategorized',
+            ),
+        ),
+    ]
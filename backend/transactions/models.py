@@ -1,7 +1,120 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from decimal import Decimal
 
+from accounts import ledger
+from core.cache import bump_data_version
+from . import recurrence, rollups
+
+# Champs (attname) dont dépendent les données dérivées d'une transaction :
+# registre des soldes (accounts.ledger) et agrégats journaliers (rollups)
+STATE_FIELDS = ('user_id', 'type', 'amount', 'date', 'account_id', 'category_id',
+                'destination_account_id', 'adjustment_direction')
+
+# Champs dont dépend l'effet d'une transaction sur les soldes des comptes
+LEDGER_FIELDS = {'type', 'amount', 'account', 'account_id', 'destination_account',
+                 'destination_account_id', 'adjustment_direction'}
+
+# Champs dont dépendent les agrégats journaliers
+ROLLUP_FIELDS = {'user', 'user_id', 'date', 'account', 'account_id', 'category',
+                 'category_id', 'type', 'amount'}
+
+# Au-delà de ce nombre de transactions, bulk_create recalcule les agrégats des
+# journées touchées au lieu de les mettre à jour ligne par ligne
+ROLLUP_REBUILD_THRESHOLD = 200
+
+
+class TransactionQuerySet(models.QuerySet):
+    """
+    QuerySet qui maintient le registre des soldes (accounts.ledger) et les
+    agrégats journaliers (transactions.rollups) lors des opérations en masse,
+    qui ne passent pas par Transaction.save()/delete()
+    """
+
+    def _derived_keys(self):
+        """Comptes et couples (utilisateur, date) touchés par les lignes du queryset."""
+        account_ids, user_dates = set(), set()
+        rows = self.values_list('account_id', 'destination_account_id', 'user_id', 'date')
+        for account_id, destination_id, user_id, day in rows:
+            account_ids.update((account_id, destination_id))
+            user_dates.add((user_id, day))
+        return account_ids, user_dates
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with db_transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Les lignes ignorées ne sont pas identifiables : recalcul complet
+                ledger.rebuild({obj.account_id for obj in objs} | {obj.destination_account_id for obj in objs})
+                rollups.rebuild(user_dates={(obj.user_id, obj.date) for obj in objs})
+            elif len(objs) > ROLLUP_REBUILD_THRESHOLD:
+                # Gros lot (import) : un recalcul groupé des journées touchées
+                # coûte moins qu'une mise à jour par ligne d'agrégat
+                ledger.apply_transactions(objs)
+                rollups.rebuild(user_dates={(obj.user_id, obj.date) for obj in objs})
+            else:
+                ledger.apply_transactions(objs)
+                rollups.apply_transactions(objs)
+            bump_data_version(*{obj.user_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        touches_ledger = bool(LEDGER_FIELDS.intersection(fields))
+        touches_rollups = bool(ROLLUP_FIELDS.intersection(fields))
+        if not (touches_ledger or touches_rollups):
+            # Ni registre ni agrégats à recalculer, mais les réponses en cache sont obsolètes
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            bump_data_version(*{obj.user_id for obj in objs})
+            return rows
+        with db_transaction.atomic(using=self.db):
+            account_ids, user_dates = self.model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            )._derived_keys()
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            for obj in objs:
+                account_ids.update((obj.account_id, obj.destination_account_id))
+                user_dates.add((obj.user_id, obj.date))
+            if touches_ledger:
+                ledger.rebuild(account_ids)
+            if touches_rollups:
+                rollups.rebuild(user_dates=user_dates)
+            bump_data_version(*{user_id for user_id, day in user_dates})
+        return rows
+
+    def update(self, **kwargs):
+        touches_ledger = bool(LEDGER_FIELDS.intersection(kwargs))
+        touches_rollups = bool(ROLLUP_FIELDS.intersection(kwargs))
+        if not (touches_ledger or touches_rollups):
+            user_ids = set(self.order_by().values_list('user_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+            bump_data_version(*user_ids)
+            return rows
+        with db_transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            account_ids, user_dates = self._derived_keys()
+            rows = super().update(**kwargs)
+            new_account_ids, new_user_dates = self.model.objects.filter(pk__in=pks)._derived_keys()
+            if touches_ledger:
+                ledger.rebuild(account_ids | new_account_ids)
+            if touches_rollups:
+                rollups.rebuild(user_dates=user_dates | new_user_dates)
+            bump_data_version(*{user_id for user_id, day in user_dates | new_user_dates})
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        with db_transaction.atomic(using=self.db):
+            # Les occurrences futures des règles de récurrence supprimées disparaissent avec elles
+            recurrence.delete_future_occurrences(self.filter(is_recurring=True).values('pk'))
+            account_ids, user_dates = self._derived_keys()
+            result = super().delete()
+            ledger.rebuild(account_ids)
+            rollups.rebuild(user_dates=user_dates)
+        return result
+
+    delete.alters_data = True
+
 
 class Transaction(models.Model):
     """
@@ -14,10 +127,16 @@ class Transaction(models.Model):
         ('adjustment', 'Ajustement de solde'),
     ]
 
+    DIRECTION_CHOICES = [
+        ('credit', 'Crédit (+)'),
+        ('debit', 'Débit (-)'),
+    ]
+
     SOURCE_CHOICES = [
         ('web', 'Web'),
         ('ios', 'iOS'),
         ('ios_uncategorized', 'iOS (non catégorisé)'),
+        ('import', 'Import bancaire'),
     ]
 
     user = models.ForeignKey(
@@ -50,6 +169,29 @@ class Transaction(models.Model):
         decimal_places=2,
         verbose_name='Montant'
     )
+    adjustment_direction = models.CharField(
+        max_length=6,
+        choices=DIRECTION_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="Sens de l'ajustement",
+        help_text='Requis pour les ajustements de solde'
+    )
+    # Montant signé pour le compte source, calculé par la base de données
+    # (les transferts reçus par destination_account sont comptés à part)
+    signed_amount = models.GeneratedField(
+        expression=models.Case(
+            models.When(type='income', then=models.F('amount')),
+            models.When(type='expense', then=-models.F('amount')),
+            models.When(type='transfer', destination_account__isnull=False, then=-models.F('amount')),
+            models.When(type='adjustment', adjustment_direction='credit', then=models.F('amount')),
+            models.When(type='adjustment', adjustment_direction='debit', then=-models.F('amount')),
+            default=models.Value(Decimal('0.00')),
+        ),
+        output_field=models.DecimalField(max_digits=15, decimal_places=2),
+        db_persist=True,
+        verbose_name='Montant signé'
+    )
     description = models.CharField(
         max_length=255,
         blank=True,
@@ -101,6 +243,31 @@ class Transaction(models.Model):
         blank=True,
         verbose_name='Fin de récurrence'
     )
+    # Occurrences générées à partir d'une transaction récurrente (la règle),
+    # voir transactions.recurrence
+    recurrence_parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences',
+        verbose_name='Règle de récurrence'
+    )
+    occurrence_key = models.CharField(
+        max_length=40,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Clé d'occurrence",
+        help_text='Règle et date prévue de l\'occurrence, garantit une seule génération'
+    )
+    recurrence_generated_until = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Occurrences générées jusqu'au"
+    )
     source = models.CharField(
         max_length=20,
         choices=SOURCE_CHOICES,
@@ -116,6 +283,8 @@ class Transaction(models.Model):
         verbose_name='Date de modification'
     )
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         db_table = 'transaction'
         verbose_name = 'Transaction'
@@ -126,20 +295,200 @@ class Transaction(models.Model):
             models.Index(fields=['account', 'date']),
             models.Index(fields=['category', 'date']),
             models.Index(fields=['type', 'date']),
+            # Pagination par curseur de la liste (transactions.pagination)
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='transaction_user_keyset_idx'),
+            # Progression des budgets : dépenses d'une catégorie sur une période
+            models.Index(fields=['user', 'type', 'category', 'date'], name='transaction_user_type_cat_idx'),
+            # Transactions d'un type sur une période (transferts vers l'épargne, statistiques)
+            models.Index(fields=['user', 'type', 'date'], name='transaction_user_type_date_idx'),
+            # Transferts reçus par un compte (soldes actuels et registre)
+            models.Index(
+                fields=['destination_account', 'date'],
+                name='transaction_transfer_dest_idx',
+                condition=models.Q(type='transfer'),
+            ),
         ]
 
     def __str__(self):
         return f"{self.get_type_display()} - {self.amount} - {self.date}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Mémorise si la transaction chargée était une règle de récurrence (mise
+        à jour de ses occurrences si elle cesse de l'être)
+        """
+        instance = super().from_db(db, field_names, values)
+        if 'is_recurring' not in instance.get_deferred_fields():
+            instance._stored_recurring = instance.is_recurring
+        return instance
+
+    def get_state(self):
+        """
+        Valeurs dont dépendent le registre des soldes et les agrégats journaliers
+        """
+        return {field: getattr(self, field) for field in STATE_FIELDS}
+
+    def get_balance_effects(self, state=None):
+        """
+        Effet de la transaction sur les soldes : {account_id: montant signé}
+        """
+        state = state or self.get_state()
+        return ledger.balance_effects(
+            state['type'], state['amount'], state['account_id'], state['destination_account_id'],
+            state['adjustment_direction']
+        )
+
+    def get_updated_source(self, changes):
+        """
+        Source après une modification par l'utilisateur : une transaction
+        ios_uncategorized devient 'web' dès qu'une catégorie lui est assignée
+        (changes : données validées de la modification)
+        """
+        if self.source != 'ios_uncategorized':
+            return self.source
+        category = changes['category'] if 'category' in changes else self.category_id
+        return 'web' if category is not None else self.source
+
+    @staticmethod
+    def direction_from_notes(notes):
+        """
+        Lit le sens d'un ajustement dans l'ancien format des notes
+        (``ADJUSTMENT:+`` / ``ADJUSTMENT:-``), None si absent
+        """
+        if notes and 'ADJUSTMENT:' in notes:
+            sign = notes.split('ADJUSTMENT:')[1].strip()
+            return 'credit' if sign.startswith('+') else 'debit'
+        return None
+
+    def _get_stored_state(self):
+        """
+        État enregistré en base, relu avec verrou de ligne : deux modifications
+        concurrentes de la même transaction reportent chacune la différence
+        par rapport à l'état laissé par l'autre (à appeler dans un atomic())
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        return Transaction.objects.select_for_update().filter(pk=self.pk).values(*STATE_FIELDS).first()
+
+    def _get_cached_accounts(self):
+        return [
+            getattr(self, field) for field in ('account', 'destination_account')
+            if self._meta.get_field(field).is_cached(self)
+        ]
+
     def save(self, *args, **kwargs):
         """
-        Sauvegarde la transaction sans mettre à jour le solde du compte
-        (le solde est calculé dynamiquement à partir des transactions)
+        Sauvegarde la transaction et reporte la variation de son effet dans le
+        registre des soldes des comptes concernés (accounts.ledger) et dans les
+        agrégats journaliers (transactions.rollups)
         """
-        super().save(*args, **kwargs)
+        with db_transaction.atomic():
+            previous = self._get_stored_state()
+            sync_recurrence = self.is_recurring or getattr(self, '_stored_recurring', False)
+            previous_template = None
+            if sync_recurrence and previous:
+                previous_template = recurrence.get_stored_templates([self.pk]).get(self.pk)
+            super().save(*args, **kwargs)
+            current = self.get_state()
+            previous_effects = self.get_balance_effects(previous) if previous else {}
+            ledger.apply_deltas(
+                ledger.merge_effects(self.get_balance_effects(current),
+                                     ledger.merge_effects(previous_effects, sign=-1)),
+                self._get_cached_accounts()
+            )
+            rollups.apply_change(previous, current)
+            # Règle de récurrence créée, modifiée ou désactivée : mise à jour de ses occurrences
+            if sync_recurrence:
+                recurrence.sync_rule(self, previous=previous_template)
+        self._stored_recurring = self.is_recurring
 
     def delete(self, *args, **kwargs):
         """
-        Supprime la transaction (le solde est recalculé dynamiquement)
+        Supprime la transaction et retire son effet du registre des soldes et
+        des agrégats journaliers
         """
-        super().delete(*args, **kwargs)
+        with db_transaction.atomic():
+            if self.is_recurring:
+                recurrence.delete_future_occurrences([self.pk])
+            previous = self._get_stored_state()
+            result = super().delete(*args, **kwargs)
+            if previous:
+                ledger.apply_deltas(
+                    ledger.merge_effects(self.get_balance_effects(previous), sign=-1),
+                    self._get_cached_accounts()
+                )
+                rollups.apply_change(previous, None)
+        return result
+
+
+class TransactionDailyRollup(models.Model):
+    """
+    Agrégat journalier des transactions par (utilisateur, date, compte, catégorie, type)
+    Maintenu automatiquement, voir transactions.rollups
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transaction_rollups',
+        verbose_name='Utilisateur'
+    )
+    date = models.DateField(
+        verbose_name='Date'
+    )
+    account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.CASCADE,
+        related_name='transaction_rollups',
+        verbose_name='Compte'
+    )
+    # SET_NULL comme Transaction.category : les agrégats d'une catégorie supprimée
+    # rejoignent ceux des transactions sans catégorie
+    category = models.ForeignKey(
+        'categories.Category',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transaction_rollups',
+        verbose_name='Catégorie'
+    )
+    type = models.CharField(
+        max_length=10,
+        choices=Transaction.TYPE_CHOICES,
+        verbose_name='Type'
+    )
+    total = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        verbose_name='Total'
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name='Nombre de transactions'
+    )
+
+    class Meta:
+        db_table = 'transaction_daily_rollup'
+        verbose_name = 'Agrégat journalier'
+        verbose_name_plural = 'Agrégats journaliers'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'account', 'category', 'type'],
+                name='unique_transaction_daily_rollup'
+            ),
+            # Les NULL sont distincts dans la contrainte ci-dessus : une seule
+            # ligne sans catégorie par clé
+            models.UniqueConstraint(
+                fields=['user', 'date', 'account', 'type'],
+                condition=models.Q(category__isnull=True),
+                name='unique_transaction_daily_rollup_uncategorized'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'type', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_type_display()} - {self.total} ({self.count})"
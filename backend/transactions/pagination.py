@@ -0,0 +1,154 @@
+"""
+Pagination par curseur (keyset) de la liste des transactions.
+
+Activée avec ``?pagination=cursor`` (ou dès qu'un paramètre ``cursor`` est
+fourni). Les transactions sont triées sur (date, created_at, id) décroissants
+et chaque page filtre à partir de la clé de la dernière transaction de la page
+précédente : pas d'OFFSET ni de COUNT(*), le coût d'une page reste constant
+quelle que soit sa profondeur. La condition est une comparaison de valeurs de
+ligne, ``(date, created_at, id) < (%s, %s, %s)``, que le planificateur
+utilise comme borne de parcours de l'index transaction_user_keyset_idx.
+
+L'ordre étant fixe, le paramètre ``ordering`` est refusé (400) dans ce mode.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import DateField, DateTimeField, F, Func, IntegerField, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowValue(Func):
+    """Valeur de ligne SQL : ``(a, b, c)``"""
+    template = '(%(expressions)s)'
+    arg_joiner = ', '
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Pagination keyset sur (date, created_at, id), du plus récent au plus ancien.
+    Réponse : { "next": url, "previous": url, "results": [...] }
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-date', '-created_at', '-id')
+    invalid_cursor_message = 'Curseur invalide.'
+    ordering_message = "Le tri n'est pas modifiable avec la pagination par curseur (date, created_at, id décroissants)."
+
+    @staticmethod
+    def is_requested(request):
+        """Indique si la requête demande la pagination par curseur."""
+        params = request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return api_settings.PAGE_SIZE or 50
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('ordering'):
+            raise ValidationError({'ordering': [self.ordering_message]})
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, reverse))
+        # Page précédente : parcours dans l'ordre croissant depuis le curseur
+        ordering = [field.lstrip('-') for field in self.ordering] if reverse else list(self.ordering)
+
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first_key = self.get_key(results[0]) if results else position
+        self.last_key = self.get_key(results[-1]) if results else position
+        return results
+
+    @staticmethod
+    def get_key(transaction):
+        return (transaction.date, transaction.created_at, transaction.pk)
+
+    @staticmethod
+    def get_position_filter(position, reverse):
+        """
+        Transactions strictement après la clé (ordre décroissant), ou avant
+        elle pour la page précédente
+        """
+        day, created_at, pk = position
+        lookup = GreaterThan if reverse else LessThan
+        return lookup(
+            RowValue(F('date'), F('created_at'), F('id'), output_field=IntegerField()),
+            RowValue(
+                Value(day, output_field=DateField()),
+                Value(created_at, output_field=DateTimeField()),
+                Value(pk, output_field=IntegerField()),
+                output_field=IntegerField(),
+            ),
+        )
+
+    def encode_cursor(self, key, reverse=False):
+        day, created_at, pk = key
+        payload = {'k': [day.isoformat(), created_at.isoformat(), pk]}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            day, created_at, pk = payload['k']
+            position = (date.fromisoformat(day), datetime.fromisoformat(created_at), int(pk))
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
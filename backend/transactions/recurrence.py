@@ -0,0 +1,231 @@
+"""
+Génération des occurrences des transactions récurrentes.
+
+Une transaction récurrente (``is_recurring``) est une règle : sa date est la
+première échéance, les suivantes sont espacées de ``recurrence_interval``
+jours, semaines, mois ou années jusqu'à ``recurrence_end_date``. Chaque
+échéance est matérialisée par une transaction « occurrence » liée à la règle
+(``recurrence_parent``), générée jusqu'à un horizon borné
+(RECURRENCE_HORIZON_DAYS). Les soldes projetés et les budgets voient ainsi les
+flux futurs sans calcul à chaque requête.
+
+- Génération idempotente : chaque occurrence porte une clé unique
+  ``<règle>:<date prévue>`` (``occurrence_key``) et la règle mémorise la date
+  jusqu'à laquelle ses occurrences ont été générées
+  (``recurrence_generated_until``). La commande generate_recurring_transactions
+  prolonge l'horizon chaque jour et rattrape les jours manqués.
+- Les échéances passées ne sont jamais générées rétroactivement : la
+  génération commence à la date de création de la règle au plus tôt.
+- Modification d'une règle : ses occurrences futures sont alignées sur la
+  nouvelle règle (échéances supprimées, montants et champs mis à jour,
+  échéances ajoutées). Les occurrences passées restent inchangées, de même
+  que les occurrences futures modifiées individuellement (qui ne
+  correspondent plus à l'ancienne règle).
+"""
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+# Unité de relativedelta par fréquence
+FREQUENCY_UNITS = {
+    'daily': 'days',
+    'weekly': 'weeks',
+    'monthly': 'months',
+    'yearly': 'years',
+}
+
+# Champs recopiés de la règle vers ses occurrences
+TEMPLATE_FIELDS = ('user_id', 'account_id', 'category_id', 'type', 'amount', 'adjustment_direction',
+                   'description', 'notes', 'destination_account_id', 'source')
+
+BATCH_SIZE = 1000
+
+
+def get_horizon(today=None):
+    """Dernière date pour laquelle les occurrences sont générées."""
+    today = today or date.today()
+    return today + timedelta(days=settings.RECURRENCE_HORIZON_DAYS)
+
+
+def is_rule(transaction):
+    return bool(
+        transaction.is_recurring
+        and transaction.recurrence_frequency in FREQUENCY_UNITS
+        and transaction.recurrence_parent_id is None
+    )
+
+
+def get_elapsed_units(start, end, unit):
+    """
+    Nombre d'unités (jours, semaines, mois ou années) entre deux dates, sans
+    tenir compte du jour pour les mois et les années
+    """
+    if unit == 'days':
+        return (end - start).days
+    if unit == 'weeks':
+        return (end - start).days // 7
+    if unit == 'months':
+        return (end.year - start.year) * 12 + end.month - start.month
+    return end.year - start.year
+
+
+def iter_dates(rule, after, until):
+    """
+    Échéances de la règle strictement après ``after`` et jusqu'à ``until``
+    inclus. Chaque échéance est calculée depuis la date de la règle (pas de
+    dérive : une règle du 31 donne le 28/29 février puis le 31 mars).
+    """
+    unit = FREQUENCY_UNITS[rule.recurrence_frequency]
+    interval = max(rule.recurrence_interval or 1, 1)
+    if rule.recurrence_end_date:
+        until = min(until, rule.recurrence_end_date)
+
+    step = 1
+    if after > rule.date:
+        # Saut direct vers la dernière échéance au plus tard dans la période
+        # de ``after`` : les échéances précédentes sont toutes avant ``after``
+        step = max(get_elapsed_units(rule.date, after, unit) // interval, 1)
+    while True:
+        day = rule.date + relativedelta(**{unit: step * interval})
+        if day > until:
+            return
+        if day > after:
+            yield day
+        step += 1
+
+
+def get_occurrence_key(rule, day):
+    return f'{rule.pk}:{day.isoformat()}'
+
+
+def get_template(rule):
+    return {field: getattr(rule, field) for field in TEMPLATE_FIELDS}
+
+
+def get_stored_templates(rule_ids):
+    """Champs recopiés tels qu'enregistrés en base, par identifiant de règle."""
+    from .models import Transaction
+
+    return {
+        row.pop('id'): row
+        for row in Transaction.objects.filter(pk__in=rule_ids).values('id', *TEMPLATE_FIELDS)
+    }
+
+
+def get_start(rule, today):
+    """
+    Date à partir de laquelle (exclue) générer les occurrences d'une règle :
+    jamais avant sa date de création
+    """
+    if rule.recurrence_generated_until:
+        return rule.recurrence_generated_until
+    created = rule.created_at.date() if rule.created_at else today
+    return max(rule.date, min(created, today) - timedelta(days=1))
+
+
+def build_occurrences(rule, after, until):
+    """Occurrences (non enregistrées) de la règle entre deux dates."""
+    from .models import Transaction
+
+    template = get_template(rule)
+    return [
+        Transaction(
+            **template,
+            date=day,
+            recurrence_parent_id=rule.pk,
+            occurrence_key=get_occurrence_key(rule, day),
+        )
+        for day in iter_dates(rule, after, until)
+    ]
+
+
+def generate(rules, today=None):
+    """
+    Génère les occurrences manquantes des règles jusqu'à l'horizon.
+    Retourne le nombre d'occurrences créées.
+    """
+    from .models import Transaction
+
+    today = today or date.today()
+    horizon = get_horizon(today)
+    rules = [rule for rule in rules if is_rule(rule)]
+
+    pending, updated_rules = [], []
+    for rule in rules:
+        start = get_start(rule, today)
+        if start >= horizon:
+            continue
+        pending.extend(build_occurrences(rule, start, horizon))
+        rule.recurrence_generated_until = horizon
+        updated_rules.append(rule)
+
+    with db_transaction.atomic():
+        # Clés déjà présentes (génération concurrente ou rattrapage partiel)
+        existing = set()
+        keys = [occurrence.occurrence_key for occurrence in pending]
+        for index in range(0, len(keys), BATCH_SIZE):
+            existing.update(Transaction.objects.filter(
+                occurrence_key__in=keys[index:index + BATCH_SIZE]
+            ).values_list('occurrence_key', flat=True))
+        pending = [occurrence for occurrence in pending if occurrence.occurrence_key not in existing]
+
+        if pending:
+            Transaction.objects.bulk_create(pending, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        if updated_rules:
+            # Pas d'effet sur les soldes ni les agrégats : mise à jour simple
+            Transaction.objects.bulk_update(updated_rules, ['recurrence_generated_until'], batch_size=BATCH_SIZE)
+    return len(pending)
+
+
+def delete_future_occurrences(rule_ids, today=None, exclude_keys=()):
+    """
+    Supprime les occurrences futures (après aujourd'hui) des règles données
+    (identifiants ou sous-requête). Retourne le nombre d'occurrences supprimées.
+    """
+    from .models import Transaction
+
+    rule_ids = list(rule_ids.values_list('pk', flat=True)) if hasattr(rule_ids, 'values_list') else list(rule_ids)
+    if not rule_ids:
+        return 0
+    occurrences = Transaction.objects.filter(
+        recurrence_parent_id__in=rule_ids, date__gt=today or date.today()
+    ).exclude(occurrence_key__in=exclude_keys)
+    return occurrences.delete()[0]
+
+
+def sync_rule(rule, today=None, previous=None):
+    """
+    Aligne les occurrences futures d'une règle créée ou modifiée, puis génère
+    celles qui manquent jusqu'à l'horizon. ``previous`` : champs recopiés de
+    la règle avant modification (get_stored_templates) ; seules les
+    occurrences qui y correspondent encore sont mises à jour.
+    """
+    from .models import Transaction
+
+    today = today or date.today()
+    with db_transaction.atomic():
+        if not is_rule(rule):
+            delete_future_occurrences([rule.pk], today)
+            if rule.recurrence_generated_until:
+                rule.recurrence_generated_until = None
+                Transaction.objects.filter(pk=rule.pk).update(recurrence_generated_until=None)
+            return
+
+        if rule.recurrence_generated_until:
+            # Échéances futures déjà générées qui ne font plus partie de la règle
+            generated_until = max(rule.recurrence_generated_until, today)
+            keys = [get_occurrence_key(rule, day) for day in iter_dates(rule, today, generated_until)]
+            delete_future_occurrences([rule.pk], today, exclude_keys=keys)
+
+            # Champs modifiés sur la règle : reportés sur les occurrences futures
+            template = get_template(rule)
+            occurrences = Transaction.objects.filter(recurrence_parent_id=rule.pk, date__gt=today)
+            if previous is not None:
+                # Occurrences modifiées depuis leur génération : conservées telles quelles
+                occurrences = occurrences.filter(**previous)
+            occurrences.exclude(**template).update(**template)
+
+            rule.recurrence_generated_until = min(rule.recurrence_generated_until, today)
+        generate([rule], today)
@@ -0,0 +1,211 @@
+"""
+Calculs de reporting sur les transactions (statistiques, répartition par
+catégorie, résumé périodique).
+
+Les calculs lisent les agrégats journaliers (TransactionDailyRollup) plutôt
+que les transactions : leur coût dépend du nombre de jours de la période et
+non du nombre de transactions. Les ajustements de solde sont exclus.
+"""
+from datetime import date, datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncQuarter, TruncYear
+
+from .models import TransactionDailyRollup
+
+# Granularités du résumé périodique : fonction de troncature et pas entre deux périodes
+GRANULARITIES = {
+    'day': (TruncDay, relativedelta(days=1)),
+    'week': (TruncWeek, relativedelta(weeks=1)),
+    'month': (TruncMonth, relativedelta(months=1)),
+    'quarter': (TruncQuarter, relativedelta(months=3)),
+    'year': (TruncYear, relativedelta(years=1)),
+}
+
+# Nombre maximal de périodes retournées par le résumé périodique
+MAX_SUMMARY_PERIODS = 3660
+
+
+def get_rollups(user, start_date=None, end_date=None):
+    """
+    Agrégats journaliers de l'utilisateur entre deux dates, hors ajustements
+    """
+    queryset = TransactionDailyRollup.objects.filter(user=user).exclude(type='adjustment')
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    return queryset
+
+
+def statistics(user, start_date=None, end_date=None, today=None):
+    """
+    Totaux et nombres de transactions par type jusqu'à aujourd'hui, plus les
+    montants futurs jusqu'à la fin de la période (une seule requête groupée)
+    """
+    today = today or date.today()
+    stats = get_rollups(user, start_date, end_date).values('type').annotate(
+        amount=Sum('total', filter=Q(date__lte=today)),
+        transactions=Sum('count', filter=Q(date__lte=today)),
+        future=Sum('total', filter=Q(date__gt=today)),
+    ).order_by()
+    return format_statistics(stats)
+
+
+def format_statistics(stats):
+    """
+    Résultat des statistiques à partir des totaux par type
+    (type, amount, transactions, future)
+    """
+    result = {
+        'income': {'total': 0, 'count': 0, 'future': 0},
+        'expense': {'total': 0, 'count': 0, 'future': 0},
+        'transfer': {'total': 0, 'count': 0, 'future': 0},
+    }
+
+    for stat in stats:
+        result[stat['type']] = {
+            'total': float(stat['amount'] or 0),
+            'count': stat['transactions'] or 0,
+            'future': float(stat['future'] or 0),
+        }
+
+    # Calcul du solde net
+    result['net'] = result['income']['total'] - result['expense']['total']
+    return result
+
+
+def by_category(user, transaction_type='expense', start_date=None, end_date=None, today=None):
+    """
+    Totaux par catégorie pour un type de transaction, jusqu'à aujourd'hui
+    """
+    today = today or date.today()
+    stats = get_rollups(user, start_date, end_date).filter(
+        type=transaction_type, date__lte=today
+    ).values(
+        'category__id',
+        'category__name',
+        'category__color'
+    ).annotate(
+        amount=Sum('total'),
+        transactions=Sum('count')
+    ).order_by('-amount')
+    return format_by_category(stats)
+
+
+def format_by_category(stats):
+    """
+    Résultat de la répartition par catégorie à partir des totaux par catégorie
+    (category__id, category__name, category__color, amount, transactions)
+    """
+    return [
+        {
+            'category_id': stat['category__id'],
+            'category_name': stat['category__name'] or 'Sans catégorie',
+            'color': stat['category__color'] or 'gray',
+            'total': float(stat['amount']),
+            'count': stat['transactions']
+        }
+        for stat in stats
+    ]
+
+
+def truncate_date(value, granularity):
+    """
+    Retourne le début de la période (jour, semaine, mois, trimestre, année) contenant la date
+    """
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'quarter':
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if granularity == 'year':
+        return value.replace(month=1, day=1)
+    return value
+
+
+def period_summary(user, granularity, start, end):
+    """
+    Revenus et dépenses par période entre deux dates, en une seule requête groupée.
+    Les périodes sans transaction sont incluses avec des totaux nuls.
+    """
+    trunc, step = GRANULARITIES[granularity]
+
+    rows = get_rollups(user, start, end).annotate(
+        period=trunc('date')
+    ).values('period').annotate(
+        income=Sum('total', filter=Q(type='income')),
+        expense=Sum('total', filter=Q(type='expense')),
+    ).order_by('period')
+
+    totals = {}
+    for row in rows:
+        period = row['period']
+        if isinstance(period, datetime):
+            period = period.date()
+        totals[period] = (row['income'] or 0, row['expense'] or 0)
+    return format_period_summary(totals, granularity, start, end)
+
+
+def format_period_summary(totals, granularity, start, end):
+    """
+    Liste des périodes entre deux dates à partir des totaux
+    {début de période: (revenus, dépenses)}, périodes vides incluses
+    """
+    _, step = GRANULARITIES[granularity]
+    result = []
+    period = truncate_date(start, granularity)
+    while period <= end:
+        income, expense = totals.get(period, (0, 0))
+        result.append({
+            'period': period.isoformat(),
+            'income': float(income),
+            'expense': float(expense),
+            'net': float(income - expense),
+        })
+        period += step
+    return result
+
+
+def monthly_summary(user, year, today=None):
+    """
+    Résumé mensuel d'une année jusqu'à aujourd'hui, indexé par numéro de mois
+    """
+    today = today or date.today()
+    periods = period_summary(user, 'month', date(year, 1, 1), min(date(year, 12, 31), today))
+    return format_monthly_summary(periods)
+
+
+def format_monthly_summary(periods):
+    """Résumé mensuel indexé par numéro de mois à partir des périodes mensuelles de l'année."""
+    months_data = {}
+    for month in range(1, 13):
+        period = periods[month - 1] if month <= len(periods) else {'income': 0.0, 'expense': 0.0, 'net': 0.0}
+        months_data[month] = {
+            'month': month,
+            'income': period['income'],
+            'expense': period['expense'],
+            'net': period['net'],
+        }
+    return months_data
+
+
+def month_rollups(user, year, today=None):
+    """
+    Totaux passés (jusqu'à aujourd'hui) et futurs de l'année par mois, type et
+    catégorie, en une seule requête groupée : au plus une ligne par
+    combinaison, d'où le tableau de bord (core.dashboard) tire les
+    statistiques, la répartition par catégorie et le résumé mensuel.
+    """
+    today = today or date.today()
+    return get_rollups(user, date(year, 1, 1), date(year, 12, 31)).annotate(
+        month=TruncMonth('date')
+    ).values(
+        'month', 'type', 'category__id', 'category__name', 'category__color', 'category__icon'
+    ).annotate(
+        amount=Sum('total', filter=Q(date__lte=today)),
+        transactions=Sum('count', filter=Q(date__lte=today)),
+        future=Sum('total', filter=Q(date__gt=today)),
+    ).order_by()
@@ -0,0 +1,151 @@
+"""
+Agrégats journaliers des transactions (TransactionDailyRollup).
+
+Chaque ligne contient le total et le nombre de transactions d'un utilisateur
+pour une clé (date, compte, catégorie, type). Les agrégats sont maintenus de
+façon incrémentale par Transaction.save()/delete() et reconstruits par le
+TransactionQuerySet après les opérations en masse (ou par la commande
+``rebuild_rollups``). Les endpoints de reporting lisent ces agrégats : leur
+coût dépend du nombre de jours et non du nombre de transactions.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+ZERO = Decimal('0.00')
+
+# Champs (attname) d'une transaction qui composent la clé d'agrégation
+KEY_FIELDS = ('user_id', 'date', 'account_id', 'category_id', 'type')
+
+
+def rollup_key(state):
+    """Clé d'agrégation d'une transaction à partir de ses valeurs."""
+    return tuple(state[field] for field in KEY_FIELDS)
+
+
+def _apply(key, total, count):
+    """
+    Ajoute (ou retire) un total et un nombre de transactions à une ligne d'agrégat.
+    La ligne est créée si besoin et supprimée quand elle ne compte plus rien.
+    """
+    from .models import TransactionDailyRollup
+
+    lookup = dict(zip(KEY_FIELDS, key))
+    with db_transaction.atomic():
+        row = TransactionDailyRollup.objects.select_for_update().filter(**lookup).first()
+        if row is None and count > 0:
+            try:
+                with db_transaction.atomic():
+                    TransactionDailyRollup.objects.create(total=total, count=count, **lookup)
+                return
+            except IntegrityError:
+                # Créée en parallèle par une autre requête
+                row = TransactionDailyRollup.objects.select_for_update().filter(**lookup).first()
+        if row is None:
+            return
+
+        row.total += total
+        row.count += count
+        if row.count <= 0:
+            row.delete()
+        else:
+            row.save(update_fields=['total', 'count'])
+
+
+def apply_change(previous, current):
+    """
+    Reporte la modification d'une transaction (états avant/après, None si
+    absente) dans les agrégats journaliers.
+    """
+    changes = defaultdict(lambda: [ZERO, 0])
+    if previous is not None:
+        key = rollup_key(previous)
+        changes[key][0] -= Decimal(previous['amount'])
+        changes[key][1] -= 1
+    if current is not None:
+        key = rollup_key(current)
+        changes[key][0] += Decimal(current['amount'])
+        changes[key][1] += 1
+
+    for key, (total, count) in changes.items():
+        if total or count:
+            _apply(key, total, count)
+
+
+def apply_transactions(transactions, sign=1):
+    """
+    Reporte une liste de transactions en mémoire dans les agrégats (``sign=-1``
+    pour les retirer), en regroupant par clé. Utilisé après ``bulk_create``.
+    """
+    changes = defaultdict(lambda: [ZERO, 0])
+    for transaction in transactions:
+        key = rollup_key(transaction.get_state())
+        changes[key][0] += sign * Decimal(transaction.amount)
+        changes[key][1] += sign
+
+    for key, (total, count) in changes.items():
+        _apply(key, total, count)
+
+
+def rebuild(user_dates=None, user_ids=None):
+    """
+    Reconstruit les agrégats à partir des transactions.
+
+    - ``user_dates`` : ensemble de couples (user_id, date) à recalculer
+    - ``user_ids`` : utilisateurs dont tous les agrégats sont recalculés
+    - sans argument : reconstruction complète
+    """
+    from .models import Transaction, TransactionDailyRollup
+
+    if user_dates is not None:
+        by_user = defaultdict(set)
+        for user_id, day in user_dates:
+            by_user[user_id].add(day)
+        if not by_user:
+            return 0
+        scope = Q()
+        for user_id, days in by_user.items():
+            scope |= Q(user_id=user_id, date__in=days)
+    elif user_ids is not None:
+        scope = Q(user_id__in=user_ids)
+    else:
+        scope = Q()
+
+    with db_transaction.atomic():
+        TransactionDailyRollup.objects.filter(scope).delete()
+        rows = Transaction.objects.filter(scope).values(*KEY_FIELDS).annotate(
+            sum_amount=Sum('amount'), nb=Count('id')
+        ).order_by()
+        rollups = [
+            TransactionDailyRollup(
+                total=row.pop('sum_amount'), count=row.pop('nb'), **row
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ]
+        TransactionDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+@receiver(pre_delete, sender='categories.Category')
+def remove_category_rollups(sender, instance, **kwargs):
+    """
+    Catégorie supprimée : ses agrégats sont retirés avant la mise à NULL
+    (ils entreraient en conflit avec les agrégats sans catégorie), puis les
+    journées concernées sont reconstruites après la suppression
+    """
+    from .models import TransactionDailyRollup
+
+    rows = TransactionDailyRollup.objects.filter(category=instance)
+    instance._rollup_user_dates = set(rows.values_list('user_id', 'date'))
+    rows.delete()
+
+
+@receiver(post_delete, sender='categories.Category')
+def rebuild_category_rollups(sender, instance, **kwargs):
+    user_dates = getattr(instance, '_rollup_user_dates', None)
+    if user_dates:
+        rebuild(user_dates=user_dates)
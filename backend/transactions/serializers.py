@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import Transaction
 from accounts.serializers import AccountListSerializer
@@ -27,6 +28,8 @@ class TransactionSerializer(serializers.ModelSerializer):
             'type',
             'type_display',
             'amount',
+            'adjustment_direction',
+            'signed_amount',
             'description',
             'date',
             'notes',
@@ -36,13 +39,14 @@ class TransactionSerializer(serializers.ModelSerializer):
             'recurrence_frequency',
             'recurrence_interval',
             'recurrence_end_date',
+            'recurrence_parent',
             'source',
             'source_display',
             'created_at',
             'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'type_display', 'source_display',
-                           'source', 'account_details', 'category_details', 'destination_account_details']
+                           'source', 'signed_amount', 'recurrence_parent', 'account_details', 'category_details', 'destination_account_details']
 
     def validate(self, data):
         """
@@ -50,7 +54,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         """
         # Vérifier que le compte appartient à l'utilisateur
         if 'account' in data:
-            if data['account'].user != self.context['request'].user:
+            if data['account'].user_id != self.context['request'].user.pk:
                 raise serializers.ValidationError({"account": "Ce compte ne vous appartient pas."})
 
         # Vérifier le compte destination pour les transferts
@@ -59,7 +63,7 @@ class TransactionSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     {"destination_account": "Un compte destination est requis pour un transfert."}
                 )
-            if data['destination_account'].user != self.context['request'].user:
+            if data['destination_account'].user_id != self.context['request'].user.pk:
                 raise serializers.ValidationError(
                     {"destination_account": "Ce compte ne vous appartient pas."}
                 )
@@ -68,6 +72,23 @@ class TransactionSerializer(serializers.ModelSerializer):
                     {"destination_account": "Le compte source et destination doivent être différents."}
                 )
 
+        # Vérifier le sens des ajustements (compatibilité avec l'ancien format
+        # ADJUSTMENT:+/- dans les notes)
+        transaction_type = data.get('type', self.instance.type if self.instance else None)
+        if transaction_type == 'adjustment':
+            direction = (
+                data.get('adjustment_direction')
+                or Transaction.direction_from_notes(data.get('notes'))
+                or (self.instance.adjustment_direction if self.instance else None)
+            )
+            if not direction:
+                raise serializers.ValidationError(
+                    {"adjustment_direction": "Le sens est requis pour un ajustement de solde."}
+                )
+            data['adjustment_direction'] = direction
+        elif 'type' in data:
+            data['adjustment_direction'] = None
+
         # Vérifier que la catégorie correspond au type
         if data.get('category') and data.get('type') in ['income', 'expense']:
             if data['category'].type != data['type']:
@@ -78,6 +99,37 @@ class TransactionSerializer(serializers.ModelSerializer):
         return data
 
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Relation résolue dans les objets préchargés du contexte
+    (``context['preloaded'][Model] = {pk: objet}``) plutôt que par une requête
+    par valeur. Sans préchargement du modèle, se comporte comme
+    PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get('preloaded', {}).get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in objects:
+            self.fail('does_not_exist', pk_value=data)
+        return objects[pk]
+
+
+class TransactionBatchSerializer(TransactionSerializer):
+    """
+    Serializer des opérations groupées (voir transactions.batch) : comptes et
+    catégories sont lus dans ceux préchargés pour l'utilisateur
+    """
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
+
 class TransactionListSerializer(serializers.ModelSerializer):
     """
     Serializer simplifié pour la liste des transactions
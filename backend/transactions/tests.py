@@ -1,3 +1,496 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts import ledger
+from accounts.models import Account
+from categories.models import Category
+from core.models import IdempotencyRecord
+from transactions import importers, recurrence, rollups
+from transactions.models import Transaction, TransactionDailyRollup
+
+User = get_user_model()
+
+
+class TransactionTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.account = Account.objects.create(user=self.user, name='Courant', account_type='checking')
+        self.other_account = Account.objects.create(user=self.user, name='Épargne', account_type='savings')
+        self.category = Category.objects.create(user=self.user, name='Alimentation', type='expense')
+        self.today = date.today()
+
+    def create(self, **kwargs):
+        values = {
+            'user': self.user, 'account': self.account, 'category': self.category,
+            'type': 'expense', 'amount': Decimal('10.00'), 'date': self.today,
+        }
+        values.update(kwargs)
+        return Transaction.objects.create(**values)
+
+
+class RollupTestCase(TransactionTestCase):
+    """Les agrégats journaliers maintenus doivent correspondre à une reconstruction"""
+
+    def get_rollups(self):
+        return {
+            rollups.rollup_key({
+                'user_id': row.user_id, 'date': row.date, 'account_id': row.account_id,
+                'category_id': row.category_id, 'type': row.type,
+            }): (row.total, row.count)
+            for row in TransactionDailyRollup.objects.filter(user=self.user)
+        }
+
+    def assertRollupsConsistent(self):
+        maintained = self.get_rollups()
+        rollups.rebuild(user_ids=[self.user.pk])
+        self.assertEqual(maintained, self.get_rollups())
+
+    def test_create_update_delete(self):
+        first = self.create()
+        self.create(amount=Decimal('5.50'))
+        self.create(type='income', category=None, amount=Decimal('100.00'))
+        self.assertRollupsConsistent()
+        self.assertEqual(
+            TransactionDailyRollup.objects.get(user=self.user, type='expense').total, Decimal('15.50')
+        )
+
+        first.date = self.today - timedelta(days=1)
+        first.amount = Decimal('12.00')
+        first.save()
+        self.assertRollupsConsistent()
+
+        first.category = None
+        first.account = self.other_account
+        first.save()
+        self.assertRollupsConsistent()
+
+        first.delete()
+        self.assertRollupsConsistent()
+        self.assertFalse(TransactionDailyRollup.objects.filter(date=first.date).exists())
+
+    def test_bulk_operations(self):
+        transactions = Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.account, category=self.category, type='expense',
+                        amount=Decimal(index + 1), date=self.today - timedelta(days=index % 3))
+            for index in range(6)
+        ])
+        self.assertRollupsConsistent()
+
+        for transaction in transactions[:3]:
+            transaction.date -= timedelta(days=7)
+            transaction.amount += 1
+        Transaction.objects.bulk_update(transactions[:3], ['date', 'amount'])
+        self.assertRollupsConsistent()
+
+        Transaction.objects.filter(pk__in=[t.pk for t in transactions[3:]]).update(category=None)
+        self.assertRollupsConsistent()
+
+        Transaction.objects.filter(date__lt=self.today - timedelta(days=7)).delete()
+        self.assertRollupsConsistent()
+
+    def test_category_delete(self):
+        self.create(category=None, amount=Decimal('3.00'))
+        self.create(amount=Decimal('4.00'))
+        self.create(amount=Decimal('5.00'), date=self.today - timedelta(days=1))
+
+        self.category.delete()
+        self.assertRollupsConsistent()
+        uncategorized = TransactionDailyRollup.objects.get(user=self.user, date=self.today, category=None)
+        self.assertEqual((uncategorized.total, uncategorized.count), (Decimal('7.00'), 2))
+
+
+class RecurrenceTestCase(TransactionTestCase):
+
+    def create_rule(self, **kwargs):
+        return self.create(is_recurring=True, recurrence_frequency='monthly', recurrence_interval=1, **kwargs)
+
+    def get_occurrences(self, rule):
+        return Transaction.objects.filter(recurrence_parent=rule).order_by('date')
+
+    def test_generation(self):
+        rule = self.create_rule()
+        expected = list(recurrence.iter_dates(rule, rule.date, recurrence.get_horizon(self.today)))
+
+        occurrences = self.get_occurrences(rule)
+        self.assertTrue(expected)
+        self.assertEqual([occurrence.date for occurrence in occurrences], expected)
+        self.assertTrue(all(occurrence.date > self.today for occurrence in occurrences))
+
+        # Génération idempotente : rien de plus au deuxième passage
+        rule.refresh_from_db()
+        self.assertEqual(recurrence.generate([rule], self.today), 0)
+        self.assertEqual(self.get_occurrences(rule).count(), len(expected))
+
+        balances = dict(Account.objects.values_list('pk', 'ledger_balance'))
+        self.assertEqual(balances, ledger.compute_balances(balances))
+
+    def test_rule_update(self):
+        rule = self.create_rule()
+        count = self.get_occurrences(rule).count()
+
+        rule.amount = Decimal('20.00')
+        rule.save()
+        amounts = set(self.get_occurrences(rule).values_list('amount', flat=True))
+        self.assertEqual(amounts, {Decimal('20.00')})
+        self.assertEqual(self.get_occurrences(rule).count(), count)
+
+        rule.recurrence_end_date = self.today + timedelta(days=40)
+        rule.save()
+        self.assertTrue(all(
+            occurrence.date <= rule.recurrence_end_date for occurrence in self.get_occurrences(rule)
+        ))
+
+        rule.is_recurring = False
+        rule.save()
+        self.assertFalse(self.get_occurrences(rule).exists())
+
+    def test_iter_dates_jump(self):
+        rule = Transaction(date=date(2020, 1, 31), recurrence_interval=2)
+        cases = {
+            'daily': [date(2024, 3, 2), date(2024, 3, 4)],
+            'weekly': [date(2024, 3, 8), date(2024, 3, 22)],
+            'monthly': [date(2024, 3, 31), date(2024, 5, 31)],
+            'yearly': [date(2026, 1, 31)],
+        }
+        for frequency, expected in cases.items():
+            rule.recurrence_frequency = frequency
+            # Premières échéances calculées directement, sans parcourir celles depuis 2020
+            with mock.patch('transactions.recurrence.relativedelta', wraps=recurrence.relativedelta) as delta:
+                dates = list(recurrence.iter_dates(rule, date(2024, 3, 1), date(2026, 6, 1)))
+            self.assertEqual(dates[:len(expected)], expected, frequency)
+            self.assertLess(delta.call_count, len(dates) + 3, frequency)
+
+        # Fin de mois : pas de dérive après février
+        rule.recurrence_frequency, rule.recurrence_interval = 'monthly', 1
+        self.assertEqual(
+            list(recurrence.iter_dates(rule, date(2024, 2, 1), date(2024, 4, 30))),
+            [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+        )
+
+    def test_rule_update_keeps_edited_occurrences(self):
+        rule = self.create_rule()
+        edited = self.get_occurrences(rule).first()
+        edited.amount = Decimal('12.00')
+        edited.description = 'Montant ajusté'
+        edited.save()
+
+        rule.amount = Decimal('20.00')
+        rule.save()
+        edited.refresh_from_db()
+        self.assertEqual((edited.amount, edited.description), (Decimal('12.00'), 'Montant ajusté'))
+        self.assertEqual(
+            set(self.get_occurrences(rule).exclude(pk=edited.pk).values_list('amount', flat=True)),
+            {Decimal('20.00')}
+        )
+
+    def test_rule_delete(self):
+        rule = self.create_rule()
+        rule.delete()
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(Account.objects.get(pk=self.account.pk).ledger_balance, Decimal('0.00'))
+
+
+class IdempotencyTestCase(TransactionTestCase):
+    """En-tête Idempotency-Key sur les écritures de l'API"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = {
+            'account': self.account.pk, 'category': self.category.pk, 'type': 'expense',
+            'amount': '12.00', 'description': 'Courses', 'date': self.today.isoformat(),
+        }
+
+    def post(self, data, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/v1/transactions/', data, format='json', **headers)
+
+    def test_replay(self):
+        first = self.post(self.data, 'key-1')
+        second = self.post(self.data, 'key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_different_request(self):
+        self.post(self.data, 'key-1')
+        response = self.post({**self.data, 'amount': '13.00'}, 'key-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_in_progress(self):
+        self.post(self.data, 'key-1')
+        # Première requête encore en cours : aucune réponse enregistrée
+        IdempotencyRecord.objects.filter(key='key-1').update(status_code=None, response=None)
+        response = self.post(self.data, 'key-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_validation_error_replayed(self):
+        first = self.post({'amount': '1.00'}, 'key-1')
+        second = self.post({'amount': '1.00'}, 'key-1')
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_without_key(self):
+        self.post(self.data)
+        self.post(self.data)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_keys_per_user(self):
+        self.post(self.data, 'key-1')
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        account = Account.objects.create(user=other, name='Courant', account_type='checking')
+        self.client.force_authenticate(other)
+
+        response = self.post({**self.data, 'account': account.pk, 'category': None}, 'key-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+
+class CursorPaginationTestCase(TransactionTestCase):
+    """Pagination par curseur de la liste des transactions"""
+
+    url = '/api/v1/transactions/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Dates et horodatages en partie identiques : départage par id
+        for index in range(7):
+            self.create(date=self.today - timedelta(days=index // 3), description=f'T{index}')
+        created_at = Transaction.objects.earliest('created_at').created_at
+        Transaction.objects.filter(description__in=['T0', 'T1']).update(created_at=created_at)
+        self.expected = list(
+            Transaction.objects.filter(user=self.user).order_by('-date', '-created_at', '-id')
+            .values_list('pk', flat=True)
+        )
+
+    def get_ids(self, data):
+        return [transaction['id'] for transaction in data['results']]
+
+    def test_forward_and_back(self):
+        pages = []
+        data = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 3}).json()
+        self.assertIsNone(data['previous'])
+        pages.append(self.get_ids(data))
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            pages.append(self.get_ids(data))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # Retour en arrière depuis la dernière page
+        for page in reversed(pages[:-1]):
+            data = self.client.get(data['previous']).json()
+            self.assertEqual(self.get_ids(data), page)
+        self.assertIsNone(data['previous'])
+
+    def test_filters_and_errors(self):
+        data = self.client.get(self.url, {'pagination': 'cursor', 'date': self.today.isoformat()}).json()
+        self.assertEqual(self.get_ids(data), self.expected[:3])
+
+        response = self.client.get(self.url, {'pagination': 'cursor', 'ordering': 'amount'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'invalide'}).status_code, 404)
+
+
+class ImportTestCase(TransactionTestCase):
+    """Import de relevés CSV, OFX et camt.053"""
+
+    def import_file(self, content, file_format, encoding='utf-8', **kwargs):
+        return importers.import_file(
+            self.user, io.BytesIO(content.encode(encoding)), file_format, account=self.account, **kwargs
+        )
+
+    def test_parse_values(self):
+        self.assertEqual(importers.parse_amount("-1'234.50"), Decimal('-1234.50'))
+        self.assertEqual(importers.parse_amount('1 234,50'), Decimal('1234.50'))
+        self.assertEqual(importers.parse_amount('1.234,50'), Decimal('1234.50'))
+        self.assertEqual(importers.parse_amount('(12.00)'), Decimal('-12.00'))
+        self.assertEqual(importers.parse_amount('12.00-'), Decimal('-12.00'))
+        for value in ('abc', 'Infinity', ''):
+            with self.assertRaises(importers.ImportRowError):
+                importers.parse_amount(value)
+
+        self.assertEqual(importers.parse_date('31.01.2024'), date(2024, 1, 31))
+        self.assertEqual(importers.parse_date('2024-01-31T12:00:00'), date(2024, 1, 31))
+        self.assertEqual(importers.parse_date('20240131120000[-5:EST]'), date(2024, 1, 31))
+        with self.assertRaises(importers.ImportRowError):
+            importers.parse_date('31/13/2024')
+
+    def test_csv(self):
+        content = (
+            'Date;Libellé;Débit;Crédit;Catégorie\n'
+            '31.01.2024;Migros;45.30;;alimentation\n'
+            '01.02.2024;Salaire;;5000.00;\n'
+            'pas une date;Erreur;1.00;;\n'
+            '02.02.2024;Énorme;1e30;;\n'
+        )
+        report = self.import_file(content, 'csv')
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['line'] for error in report['errors']], [4, 5])
+        expense = Transaction.objects.get(description='Migros')
+        self.assertEqual((expense.type, expense.amount, expense.category), ('expense', Decimal('45.30'), self.category))
+        self.assertEqual(Transaction.objects.get(description='Salaire').type, 'income')
+        self.assertEqual(Account.objects.get(pk=self.account.pk).ledger_balance, Decimal('4954.70'))
+
+    def test_duplicates(self):
+        content = 'date,amount,description\n2024-01-31,-45.30,Migros\n2024-02-01,-10.00,Coop\n'
+        self.import_file(content, 'csv')
+
+        dry_run = self.import_file(content + '2024-02-02,-5.00,Kiosque\n', 'csv', dry_run=True)
+        self.assertEqual((dry_run['created'], dry_run['duplicates']), (1, 2))
+        self.assertEqual(Transaction.objects.count(), 2)
+
+        report = self.import_file(content + '2024-02-02,-5.00,Kiosque\n', 'csv')
+        self.assertEqual((report['created'], report['duplicates']), (1, 2))
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_ofx(self):
+        content = (
+            '<OFX><BANKTRANLIST>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240131120000<TRNAMT>-12.50<NAME>Café<MEMO>Gare</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240201<TRNAMT>100.00<NAME>Remboursement</STMTTRN>\n'
+            '</BANKTRANLIST></OFX>\n'
+        )
+        # OFX 1.x : SGML en latin-1
+        report = self.import_file(content, 'ofx', encoding='latin-1')
+
+        self.assertEqual(report['created'], 2)
+        cafe = Transaction.objects.get(description='Café')
+        self.assertEqual((cafe.date, cafe.amount, cafe.notes), (date(2024, 1, 31), Decimal('12.50'), 'Gare'))
+
+    def test_camt(self):
+        content = (
+            '<?xml version="1.0"?>'
+            '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.04"><BkToCstmrStmt><Stmt>'
+            '<Ntry><Amt Ccy="CHF">80.00</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2024-01-31</Dt></BookgDt>'
+            '<NtryDtls><TxDtls><RmtInf><Ustrd>Facture électricité</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>'
+            '<Ntry><Amt Ccy="CHF">20.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2024-02-01</Dt></BookgDt>'
+            '<AddtlNtryInf>Virement reçu</AddtlNtryInf></Ntry>'
+            '</Stmt></BkToCstmrStmt></Document>'
+        )
+        report = self.import_file(content, 'camt')
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(Transaction.objects.get(description='Facture électricité').type, 'expense')
+        self.assertEqual(Transaction.objects.get(description='Virement reçu').amount, Decimal('20.00'))
+
+    def test_xml_entities_rejected(self):
+        content = (
+            '<?xml version="1.0"?><!DOCTYPE d [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;">]>'
+            '<Document><Ntry><Amt>1.00</Amt><AddtlNtryInf>&b;</AddtlNtryInf></Ntry></Document>'
+        )
+        report = self.import_file(content, 'camt')
+
+        self.assertIn('fatal', report)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_invalid_file(self):
+        report = self.import_file('foo,bar\n1,2\n', 'csv')
+        self.assertIn('fatal', report)
+        self.assertEqual(report['created'], 0)
+
+
+class BatchTestCase(TransactionTestCase):
+    """Opérations groupées (POST /api/v1/transactions/batch/)"""
+
+    url = '/api/v1/transactions/batch/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item(self, **kwargs):
+        return {
+            'account': self.account.pk, 'category': self.category.pk, 'type': 'expense',
+            'amount': '10.00', 'description': 'Lot', 'date': self.today.isoformat(), **kwargs
+        }
+
+    def assertLedgerConsistent(self):
+        stored = dict(Account.objects.filter(user=self.user).values_list('pk', 'ledger_balance'))
+        self.assertEqual(stored, ledger.compute_balances(stored))
+
+    def test_apply(self):
+        updated, deleted = self.create(), self.create()
+        response = self.client.post(self.url, {
+            'create': [self.item(), self.item(amount='5.00', type='income', category=None)],
+            'update': [{'id': updated.pk, 'amount': '30.00', 'description': 'Modifiée'}],
+            'delete': [deleted.pk],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertTrue(result['applied'])
+        self.assertEqual((result['created'], result['updated']), (2, 1))
+        self.assertEqual([item['status'] for item in result['create']], ['created', 'created'])
+        self.assertEqual(result['update'][0]['transaction']['description'], 'Modifiée')
+        self.assertFalse(Transaction.objects.filter(pk=deleted.pk).exists())
+        self.assertEqual(Account.objects.get(pk=self.account.pk).ledger_balance, Decimal('-35.00'))
+        self.assertLedgerConsistent()
+
+    def test_invalid_operation_rejects_batch(self):
+        kept = self.create()
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        foreign = Transaction.objects.create(
+            user=other, account=Account.objects.create(user=other, name='B', account_type='checking'),
+            type='expense', amount=Decimal('1.00'), date=self.today,
+        )
+        response = self.client.post(self.url, {
+            'create': [self.item(), self.item(amount='abc')],
+            'update': [{'id': kept.pk, 'amount': '1.00'}, {'id': kept.pk, 'amount': '2.00'}],
+            'delete': [foreign.pk],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        result = response.json()
+        self.assertFalse(result['applied'])
+        self.assertEqual(result['create'][0]['status'], 'not_applied')
+        self.assertIn('amount', result['create'][1]['errors'])
+        self.assertIn('id', result['update'][1]['errors'])
+        self.assertIn('id', result['delete'][0]['errors'])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Transaction.objects.get(pk=kept.pk).amount, Decimal('10.00'))
+
+    def test_rollback_on_failure(self):
+        kept = self.create()
+        with mock.patch('transactions.batch.recurrence.generate', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {
+                    'create': [self.item()], 'delete': [kept.pk],
+                }, format='json')
+
+        self.assertEqual(list(Transaction.objects.filter(user=self.user)), [kept])
+        self.assertLedgerConsistent()
+
+    def test_malformed_body(self):
+        for body in ({}, {'create': 'x'}, {'delete': list(range(1001))}):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
 
-# Create your tests here.
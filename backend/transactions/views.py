@@ -1,20 +1,29 @@
 from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
-from datetime import datetime, timedelta
+from django.db.models import Prefetch
+from datetime import date
+from accounts.models import Account
+from core.cache import cached_response
+from core.conditional import ConditionalGetMixin
+from core.idempotency import IdempotentMixin
+from . import exports, importers, reports
+from .batch import BatchError, TransactionBatch
+from .filters import TransactionFilter
 from .models import Transaction
+from .pagination import TransactionCursorPagination
 from .serializers import TransactionSerializer, TransactionListSerializer
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(IdempotentMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les transactions
     """
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['type', 'account', 'category', 'date', 'is_recurring']
+    filterset_class = TransactionFilter
     search_fields = ['description', 'notes']
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date', '-created_at']
@@ -22,11 +31,32 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retourne uniquement les transactions de l'utilisateur connecté
+        Hors liste, les comptes liés sont chargés avec leurs soldes annotés
+        (account_details) en une requête par relation
         """
-        return Transaction.objects.filter(user=self.request.user).select_related(
-            'account', 'category', 'destination_account'
+        queryset = Transaction.objects.filter(user=self.request.user)
+        if self.action == 'export':
+            # Lecture par values() (voir transactions.exports)
+            return queryset
+        if self.action == 'list':
+            return queryset.select_related('account', 'category', 'destination_account')
+
+        accounts = Account.objects.with_balances()
+        return queryset.select_related('category').prefetch_related(
+            Prefetch('account', queryset=accounts),
+            Prefetch('destination_account', queryset=accounts),
         )
 
+    @property
+    def paginator(self):
+        """
+        Pagination par curseur (keyset) sur demande (?pagination=cursor),
+        pagination par numéro de page sinon
+        """
+        if not hasattr(self, '_paginator') and TransactionCursorPagination.is_requested(self.request):
+            self._paginator = TransactionCursorPagination()
+        return super().paginator
+
     def get_serializer_class(self):
         """
         Utilise un serializer différent pour la liste
@@ -48,156 +78,175 @@ class TransactionViewSet(viewsets.ModelViewSet):
         afin d'indiquer que la transaction a été corrigée par l'utilisateur.
         La source est un champ read_only dans le serializer, il faut donc passer
         la nouvelle valeur directement via save().
+        L'instance est celle déjà chargée par le serializer (pas de nouvelle requête).
         """
-        instance = self.get_object()
-        new_source = instance.source
-
-        # Upgrade source from ios_uncategorized to web once the user
-        # has corrected/categorized the transaction through the web UI.
-        if instance.source == 'ios_uncategorized':
-            # Check if a category is being assigned in this request
-            incoming_category = serializer.validated_data.get('category', None)
-            # Use the existing category if not being changed
-            effective_category = incoming_category if 'category' in serializer.validated_data else instance.category
-            if effective_category is not None:
-                new_source = 'web'
-
-        serializer.save(source=new_source)
+        instance = serializer.instance
+        serializer.save(source=instance.get_updated_source(serializer.validated_data))
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def statistics(self, request):
         """
         Retourne des statistiques sur les transactions (excluant les transactions futures)
         Inclut aussi les montants des transactions futures jusqu'à la fin de la période
+        Calculées à partir des agrégats journaliers (voir transactions.reports)
         """
-        from datetime import date
-        # Filtres de date
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-
-        queryset = self.get_queryset()
-
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-
-        # Transactions actuelles (jusqu'à aujourd'hui)
-        # Exclure les ajustements des statistiques
-        current_queryset = queryset.filter(date__lte=date.today()).exclude(type='adjustment')
-
-        # Calcul des totaux par type pour les transactions actuelles
-        stats = current_queryset.values('type').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
-
-        # Organiser les résultats
-        result = {
-            'income': {'total': 0, 'count': 0, 'future': 0},
-            'expense': {'total': 0, 'count': 0, 'future': 0},
-            'transfer': {'total': 0, 'count': 0, 'future': 0},
-        }
-
-        for stat in stats:
-            result[stat['type']] = {
-                'total': float(stat['total']),
-                'count': stat['count'],
-                'future': 0
-            }
-
-        # Calcul des transactions futures (après aujourd'hui jusqu'à la fin de la période)
-        # Exclure les ajustements des statistiques
-        future_queryset = queryset.filter(date__gt=date.today()).exclude(type='adjustment')
-        future_stats = future_queryset.values('type').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
-
-        for stat in future_stats:
-            if stat['type'] in result:
-                result[stat['type']]['future'] = float(stat['total'])
-
-        # Calcul du solde net
-        result['net'] = result['income']['total'] - result['expense']['total']
-
-        return Response(result)
+        return Response(reports.statistics(
+            request.user,
+            start_date=request.query_params.get('start_date'),
+            end_date=request.query_params.get('end_date'),
+        ))
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def by_category(self, request):
         """
         Retourne les dépenses/revenus par catégorie (excluant les transactions futures)
+        Calculés à partir des agrégats journaliers (voir transactions.reports)
         """
-        from datetime import date
-        transaction_type = request.query_params.get('type', 'expense')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-
-        queryset = self.get_queryset().filter(type=transaction_type)
-
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-
-        # Exclure les transactions futures et les ajustements par défaut
-        queryset = queryset.filter(date__lte=date.today()).exclude(type='adjustment')
-
-        # Grouper par catégorie
-        stats = queryset.values(
-            'category__id',
-            'category__name',
-            'category__color'
-        ).annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('-total')
-
-        result = [
-            {
-                'category_id': stat['category__id'],
-                'category_name': stat['category__name'] or 'Sans catégorie',
-                'color': stat['category__color'] or 'gray',
-                'total': float(stat['total']),
-                'count': stat['count']
-            }
-            for stat in stats
-        ]
-
-        return Response(result)
+        return Response(reports.by_category(
+            request.user,
+            transaction_type=request.query_params.get('type', 'expense'),
+            start_date=request.query_params.get('start_date'),
+            end_date=request.query_params.get('end_date'),
+        ))
 
     @action(detail=False, methods=['get'])
+    @cached_response
     def monthly_summary(self, request):
         """
-        Retourne un résumé mensuel des transactions (excluant les transactions futures)
+        Retourne un résumé périodique des transactions (excluant les transactions futures)
+
+        Sans paramètre : résumé mensuel de l'année `year` (défaut : année en cours),
+        indexé par numéro de mois.
+        Avec `granularity` (day, week, month, quarter, year), `start_date` et/ou
+        `end_date` : liste des périodes de l'intervalle demandé.
+        Dans les deux cas, une seule requête groupée est exécutée sur les
+        agrégats journaliers (voir transactions.reports).
         """
-        from datetime import date as date_class
-        year = request.query_params.get('year', datetime.now().year)
+        today = date.today()
+        params = request.query_params
+        if not any(key in params for key in ('granularity', 'start_date', 'end_date')):
+            try:
+                year = int(params.get('year', today.year))
+                date(year, 1, 1)
+            except ValueError:
+                return Response({'error': 'Année invalide.'}, status=400)
+
+            return Response(reports.monthly_summary(request.user, year, today))
+
+        granularity = params.get('granularity', 'month')
+        if granularity not in reports.GRANULARITIES:
+            return Response(
+                {'error': f"Granularité invalide. Valeurs possibles : {', '.join(reports.GRANULARITIES)}."},
+                status=400
+            )
+
+        try:
+            end = date.fromisoformat(params['end_date']) if params.get('end_date') else today
+            start = (
+                date.fromisoformat(params['start_date']) if params.get('start_date')
+                else date(end.year, 1, 1)
+            )
+        except ValueError:
+            return Response({'error': 'Date invalide (format attendu : AAAA-MM-JJ).'}, status=400)
+
+        end = min(end, today)
+        if start > end:
+            return Response({'error': 'La date de début doit précéder la date de fin.'}, status=400)
+
+        _, step = reports.GRANULARITIES[granularity]
+        if reports.truncate_date(start, granularity) + step * reports.MAX_SUMMARY_PERIODS <= end:
+            return Response(
+                {'error': f'Intervalle trop long (maximum {reports.MAX_SUMMARY_PERIODS} périodes).'},
+                status=400
+            )
+
+        return Response({
+            'granularity': granularity,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'periods': reports.period_summary(request.user, granularity, start, end),
+        })
 
-        queryset = self.get_queryset().filter(date__year=year)
-
-        # Exclure les transactions futures et les ajustements par défaut
-        queryset = queryset.filter(date__lte=date_class.today()).exclude(type='adjustment')
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporte en flux toutes les transactions filtrées (CSV ou JSON lines)
 
-        # Grouper par mois et type
-        months_data = {}
+        GET /api/v1/transactions/export/?file_format=csv|ndjson
+        Accepte les mêmes filtres, recherche et tri que la liste
+        (type, account, category, date, is_recurring, start_date, end_date,
+        search, ordering), sans pagination.
+        """
+        export_format = request.query_params.get('file_format', 'csv')
+        if export_format not in exports.EXPORT_FORMATS:
+            return Response(
+                {'error': f"Format invalide. Valeurs possibles : {', '.join(exports.EXPORT_FORMATS)}."},
+                status=400
+            )
+        return exports.export_response(self.filter_queryset(self.get_queryset()), export_format)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        """
+        Importe un relevé bancaire (CSV, OFX ou CAMT.053)
 
-        for month in range(1, 13):
-            month_transactions = queryset.filter(date__month=month)
+        POST /api/v1/transactions/import/ (multipart)
+        - file : fichier du relevé
+        - account : compte des lignes qui n'en précisent pas
+        - file_format : csv, ofx ou camt (défaut : déduit de l'extension)
+        - dry_run : valider sans enregistrer
 
-            income = month_transactions.filter(type='income').aggregate(
-                total=Sum('amount')
-            )['total'] or 0
+        Les lignes invalides sont listées dans `errors` sans interrompre l'import
+        (voir transactions.importers).
+        """
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({'error': 'Le fichier est requis.'}, status=400)
+
+        file_format = request.data.get('file_format') or None
+        if file_format and file_format not in importers.FORMATS:
+            return Response(
+                {'error': f"Format invalide. Valeurs possibles : {', '.join(importers.FORMATS)}."},
+                status=400
+            )
+
+        account = None
+        if request.data.get('account'):
+            account = Account.objects.filter(user=request.user, pk=request.data['account']).first()
+            if account is None:
+                return Response({'error': 'Compte introuvable.'}, status=400)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        report = importers.import_file(
+            request.user, uploaded.file,
+            file_format=file_format, filename=uploaded.name,
+            account=account, dry_run=dry_run,
+        )
+        if 'fatal' in report:
+            return Response({'error': report['fatal'], **report}, status=400)
+        return Response(report, status=200 if dry_run else 201)
 
-            expense = month_transactions.filter(type='expense').aggregate(
-                total=Sum('amount')
-            )['total'] or 0
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Crée, modifie et supprime des transactions en une seule requête
 
-            months_data[month] = {
-                'month': month,
-                'income': float(income),
-                'expense': float(expense),
-                'net': float(income - expense)
-            }
+        POST /api/v1/transactions/batch/
+        {
+            "create": [{...}, ...],
+            "update": [{"id": 12, "category": 3}, ...],
+            "delete": [15, 16]
+        }
 
-        return Response(months_data)
+        Toutes les opérations sont validées avant d'être appliquées dans une
+        seule transaction : si une opération est invalide, aucune ne l'est
+        (réponse 400). Le résultat de chaque opération est retourné dans
+        l'ordre reçu (voir transactions.batch).
+        """
+        try:
+            result = TransactionBatch(request, request.data).run()
+        except BatchError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(result, status=200 if result['applied'] else 400)
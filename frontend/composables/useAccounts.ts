@@ -1,4 +1,4 @@
-import type { Account, AccountSummary, PaginatedResponse } from '~/types';
+import type { Account, AccountBalanceHistory, AccountSummary, PaginatedResponse } from '~/types';
 
 export const useAccounts = () => {
   const { apiFetch } = useApi();
@@ -115,6 +115,35 @@ export const useAccounts = () => {
     }
   };
 
+  const getBalanceHistory = async (params?: {
+    account?: number;
+    start_date?: string;
+    end_date?: string;
+    granularity?: 'day' | 'month';
+  }) => {
+    try {
+      const queryParams = new URLSearchParams();
+      if (params) {
+        Object.entries(params).forEach(([key, value]) => {
+          if (value !== undefined && value !== null) {
+            queryParams.append(key, value.toString());
+          }
+        });
+      }
+
+      const query = queryParams.toString();
+      const endpoint = query ? `/api/v1/accounts/history/?${query}` : '/api/v1/accounts/history/';
+      const history = await apiFetch<AccountBalanceHistory>(endpoint);
+      return { success: true, data: history };
+    } catch (error: any) {
+      console.error('Get balance history error:', error);
+      return {
+        success: false,
+        error: error.message || 'Failed to fetch balance history',
+      };
+    }
+  };
+
   const toggleAccountActive = async (id: number) => {
     try {
       const account = await apiFetch<Account>(`/api/v1/accounts/${id}/toggle_active/`, {
@@ -137,6 +166,7 @@ export const useAccounts = () => {
     updateAccount,
     deleteAccount,
     getAccountsSummary,
+    getBalanceHistory,
     toggleAccountActive,
   };
 };
@@ -0,0 +1,35 @@
+export type DashboardSection =
+  | 'statistics'
+  | 'by_category'
+  | 'monthly_summary'
+  | 'budgets_summary'
+  | 'budget_dashboard'
+  | 'accounts'
+  | 'categories'
+  | 'recent_transactions'
+  | 'alerts'
+
+export const useDashboard = () => {
+  const { apiFetch } = useApi()
+
+  /**
+   * Récupérer les données de la page d'accueil en une requête
+   * (toutes les sections par défaut)
+   */
+  const getDashboard = async (
+    sections?: DashboardSection[]
+  ): Promise<{ data: Record<string, any> | null; success: boolean; error?: any }> => {
+    try {
+      const data = await apiFetch<Record<string, any>>('/api/v1/dashboard/', {
+        method: 'GET',
+        params: sections?.length ? { sections: sections.join(',') } : undefined
+      })
+      return { data, success: true }
+    } catch (error) {
+      console.error('Error fetching dashboard:', error)
+      return { data: null, success: false, error }
+    }
+  }
+
+  return { getDashboard }
+}
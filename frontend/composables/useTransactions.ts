@@ -1,5 +1,14 @@
 import type { Transaction, PaginatedResponse } from '~/types'
 
+/**
+ * Clé d'idempotence aléatoire (crypto.randomUUID n'existe qu'en HTTPS,
+ * crypto.getRandomValues est disponible partout)
+ */
+const generateIdempotencyKey = (): string => {
+  const bytes = crypto.getRandomValues(new Uint8Array(16))
+  return Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('')
+}
+
 export const useTransactions = () => {
   const { apiFetch } = useApi()
 
@@ -46,9 +55,14 @@ export const useTransactions = () => {
    */
   const createTransaction = async (transactionData: Partial<Transaction>): Promise<{ data: Transaction | null; success: boolean; error?: any }> => {
     try {
+      // Même clé pour les nouvelles tentatives : une seule transaction créée
       const data = await apiFetch<Transaction>('/api/v1/transactions/', {
         method: 'POST',
-        body: transactionData
+        body: transactionData,
+        headers: { 'Idempotency-Key': generateIdempotencyKey() },
+        retry: 2,
+        // Laisse à la première requête (409 pendant son traitement) le temps d'aboutir
+        retryDelay: 1000
       })
       return { data, success: true }
     } catch (error) {
@@ -171,6 +185,40 @@ export const useTransactions = () => {
     }
   }
 
+  /**
+   * Récupérer un résumé périodique (jour, semaine, mois, trimestre, année) sur un intervalle
+   */
+  const getPeriodSummary = async (params: {
+    granularity: 'day' | 'week' | 'month' | 'quarter' | 'year'
+    start_date?: string
+    end_date?: string
+  }): Promise<{
+    data: {
+      granularity: string
+      start_date: string
+      end_date: string
+      periods: Array<{
+        period: string
+        income: number
+        expense: number
+        net: number
+      }>
+    } | null
+    success: boolean
+    error?: any
+  }> => {
+    try {
+      const data = await apiFetch('/api/v1/transactions/monthly_summary/', {
+        method: 'GET',
+        params
+      })
+      return { data, success: true }
+    } catch (error) {
+      console.error('Error fetching period summary:', error)
+      return { data: null, success: false, error }
+    }
+  }
+
   return {
     getTransactions,
     getTransaction,
@@ -179,6 +227,7 @@ export const useTransactions = () => {
     deleteTransaction,
     getStatistics,
     getByCategory,
-    getMonthlySummary
+    getMonthlySummary,
+    getPeriodSummary
   }
 }
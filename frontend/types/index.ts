@@ -33,6 +33,23 @@ export interface AccountSummary {
   };
 }
 
+export interface AccountBalanceHistory {
+  granularity: 'day' | 'month';
+  start_date: string;
+  end_date: string;
+  dates: string[];
+  accounts: {
+    id: number;
+    name: string;
+    currency: Account['currency'];
+    balances: number[];
+  }[];
+  // Total par devise : une série par devise, alignée sur dates
+  total: {
+    [currency: string]: number[];
+  };
+}
+
 // Category types
 export interface Category {
   id: number;